@@ -47,13 +47,24 @@ from .fastled_progmem import *
 
 from .lib8tion import *
 from .pixeltypes import *
+from .pixelbuffer import *
+from .encoder import *
+from .waveform import *
+from .apa102 import *
+from .xymap import *
 from .hsv2rgb import *
 from .colorutils import *
 from .pixelset import *
+from .matrix import *
 from .colorpalettes import *
 
 from .noise import *
 from .power_mgt import *
+from .sinks import *
+from .showworker import *
+from .metrics import *
+from . import profiling
+from .profiling import CProfileHook, CChromeTraceHook, add_hook, remove_hook, clear_hooks
 
 from .fastspi import *
 from .chipsets import *
@@ -68,6 +79,8 @@ P9813 = 5
 APA102 = 6
 SK9822 = 7
 DOTSTAR = 8
+HD107 = 9
+HD108 = 10
 
 SMART_MATRIX = 0
 OCTOWS2811 = 0
@@ -274,9 +287,17 @@ class CFastLED(object):
     def __init__(self):
         self.m_Scale = 255  # < The current global brightness scale setting
         self.m_nFPS = 0  # < Tracking for current FPS value
+        self.m_nFPSFrames = 0  # < frames counted by countFPS since m_FPSStart
+        self.m_FPSStart = None  # < ticks countFPS started counting at
+        self.m_Metrics = CFrameMetrics()  # < timings of the last frames, see getMetrics
         self.m_nMinMicros = 0  # < minimum µs between frames, used for capping frame rates.
+        self.m_Pacer = CFramePacer()  # < holds frames to m_nMinMicros apart
         self.m_nPowerData = 0xFFFFFFFF  # < max power use parameter
         self.m_pPowerFunc = None  # < function for overriding brightness when using FastLED.show()
+        self.m_FrameBuffers = []  # < CFrameBuffer objects that are swapped by show()
+        self.m_Worker = None  # < CShowWorker used by show_async(), made the first time it is needed
+        self.m_Pool = None  # < CShowPool that shows the controllers side by side, see setParallel
+        self.m_Groups = {}  # < named lists of controllers, see addToGroup
 
     # Add a CLEDController instance to the world.  Exposed to the public to allow people to implement their own
     # CLEDController objects or instances.  There are two ways to call this method (as well as the other addLeds)
@@ -289,12 +310,19 @@ class CFastLED(object):
     # @param nLedsOrOffset - number of leds (3 argument version) or offset into the data array
     # @param nLedsIfOffset - number of leds (4 argument version)
     # @returns a reference to the added controller
+    #
+    # data can also be a CFrameBuffer, the controller then shows the front buffer and show() swaps the buffers.
     def addLeds(self, pLed, data, nLedsOrOffset, nLedsIfOffset=0):
         nOffset = nLedsOrOffset if nLedsIfOffset > 0 else 0
         nLeds = nLedsIfOffset if nLedsIfOffset > 0 else nLedsOrOffset
 
         pLed.init()
-        pLed.setLeds(data[nOffset:], nLeds)
+        if isinstance(data, CFrameBuffer):
+            data.bind(pLed, nOffset, nLeds)
+            if data not in self.m_FrameBuffers:
+                self.m_FrameBuffers.append(data)
+        else:
+            pLed.setLeds(data[nOffset:], nLeds)
         self.setMaxRefreshRate(pLed.getMaxRefreshRate(), True)
         return pLed
 
@@ -343,6 +371,12 @@ class CFastLED(object):
         if CHIPSET == SK9822:
             c = SK9822Controller(DATA_PIN, CLOCK_PIN, RGB_ORDER, SPI_DATA_RATE)
             return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
+        if CHIPSET == HD107:
+            c = HD107Controller(DATA_PIN, CLOCK_PIN, RGB_ORDER, SPI_DATA_RATE)
+            return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
+        if CHIPSET == HD108:
+            c = HD108Controller(DATA_PIN, CLOCK_PIN, RGB_ORDER, SPI_DATA_RATE)
+            return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
 
     def addLeds(self, CHIPSET, DATA_PIN, CLOCK_PIN, data, nLedsOrOffset, nLedsIfOffset=0):
         if CHIPSET == LPD6803:
@@ -369,6 +403,12 @@ class CFastLED(object):
         if CHIPSET == SK9822:
             c = SK9822Controller(DATA_PIN, CLOCK_PIN)
             return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
+        if CHIPSET == HD107:
+            c = HD107Controller(DATA_PIN, CLOCK_PIN)
+            return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
+        if CHIPSET == HD108:
+            c = HD108Controller(DATA_PIN, CLOCK_PIN)
+            return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
 
     def addLeds(self, CHIPSET, DATA_PIN, CLOCK_PIN, RGB_ORDER, data, nLedsOrOffset, nLedsIfOffset=0):
         if CHIPSET == LPD6803:
@@ -395,6 +435,12 @@ class CFastLED(object):
         if CHIPSET == SK9822:
             c = SK9822Controller(DATA_PIN, CLOCK_PIN, RGB_ORDER)
             return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
+        if CHIPSET == HD107:
+            c = HD107Controller(DATA_PIN, CLOCK_PIN, RGB_ORDER)
+            return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
+        if CHIPSET == HD108:
+            c = HD108Controller(DATA_PIN, CLOCK_PIN, RGB_ORDER)
+            return addLeds(c, data, nLedsOrOffset, nLedsIfOffset)
 
     def addLeds(self, CHIPSET, data, nLedsOrOffset, nLedsIfOffset=0):
         if SPI_DATA:
@@ -763,31 +809,213 @@ class CFastLED(object):
 
     # Update all our controllers with the current led colors, using the passed in brightness
     # @param scale temporarily override the scale
-    def show(self, scale=None):
+    # @param group only update the controllers in this group (see addToGroup)
+    def show(self, scale=None, group=None):
+        if profiling.hooks:
+            profiling.call('show', self._show, scale, group)
+        else:
+            self._show(scale, group)
+
+    def _show(self, scale, group):
+        # frames handed to show_async have to go out before this one
+        if self.m_Worker is not None:
+            self.m_Worker.wait()
+
+        metrics = self.m_Metrics
+        metrics.begin()
+
+        scale = self._beginFrame(scale)
+        controllers = self._controllers(group)
+
+        # the controllers turn their dithering down, or off, when the refresh rate is too low for it
+        if self.m_Pool is not None and len(controllers) > 1:
+            self.m_Pool.run([(pCur.showLeds, (scale,)) for pCur in controllers])
+        else:
+            for pCur in controllers:
+                pCur.showLeds(scale)
+
+        for pCur in controllers:
+            metrics.add(METRIC_ENCODE, pCur.m_nEncodeUs)
+            metrics.add(METRIC_OUTPUT, pCur.m_nShowUs - pCur.m_nEncodeUs)
+
+        metrics.end()
+        self.countFPS()
+
+    # the controllers in a group, all of them when group is None
+    def _controllers(self, group=None):
+        if group is None:
+            return CLEDController.controllers()
+        return self.m_Groups[group]
+
+    # Add controllers to a named group, show(group=name) then only updates those controllers.  A controller can be
+    # in any number of groups.
+    # @param name - name of the group, it is made if there is no group by that name
+    # @returns the list of controllers in the group
+    def addToGroup(self, name, *controllers):
+        group = self.m_Groups.setdefault(name, [])
+        for pLed in controllers:
+            if pLed not in group:
+                group.append(pLed)
+        return group
+
+    # Take controllers out of a group, the whole group when none are given
+    def removeFromGroup(self, name, *controllers):
+        if not controllers:
+            del self.m_Groups[name]
+            return
+
+        group = self.m_Groups[name]
+        for pLed in controllers:
+            if pLed in group:
+                group.remove(pLed)
+
+    # Get the controllers in a named group
+    # @returns the list of controllers, KeyError if there is no such group
+    def group(self, name):
+        return self.m_Groups[name]
+
+    # Show the controllers of a frame side by side on a pool of threads instead of one after another, for rigs with
+    # many outputs whose writes (SPI/RMT/DMA, sinks) can overlap.  Used by show() and by the show_async() worker.
+    # @param threads - number of threads to show on, counting the calling one, 0 or 1 goes back to one at a time
+    def setParallel(self, threads):
+        if self.m_Pool is not None:
+            self.m_Pool.close()
+            self.m_Pool = None
+
+        if threads > 1:
+            self.m_Pool = CShowPool(threads)
+
+        if self.m_Worker is not None:
+            self.m_Worker.pool = self.m_Pool
+
+    # the work done before the leds of a frame are written out, waiting out the minimum time between frames,
+    # swapping the frame buffers and working out the power limited brightness
+    # @param pace - wait for the frame's deadline, False when it has already been waited for
+    # @returns the brightness to show the frame at
+    def _beginFrame(self, scale, pace=True):
         if scale is None:
             scale = self.m_Scale
 
+        metrics = self.m_Metrics
+
         # guard against showing too rapidly
-        global lastshow
-        while self.m_nMinMicros and time.ticks_diff(time.ticks_us(), lastshow) < self.m_nMinMicros:
-            lastshow = time.ticks_us()
+        if pace:
+            start = ticks_us()
+            self.m_Pacer.wait()
+            metrics.since(METRIC_WAIT, start)
+
+        # the frame that was drawn into the back buffers is the one to show
+        for fb in self.m_FrameBuffers:
+            fb.swap()
 
         # If we have a function for computing power, use it!
         if self.m_pPowerFunc:
-            scale = self.m_pPowerFunc(scale, self.m_nPowerData)
+            start = ticks_us()
+            scale = self._limitPower(scale)
+            metrics.since(METRIC_POWER, start)
+
+        return scale
+
+    # the brightness the power function limits scale to
+    def _limitPower(self, scale):
+        if profiling.hooks:
+            return profiling.call('power', self.m_pPowerFunc, scale, self.m_nPowerData)
+
+        return self.m_pPowerFunc(scale, self.m_nPowerData)
+
+    # Get the CShowWorker that show_async() hands frames to, it is made the first time.
+    # @param depth - frames that can be waiting or being shown at once, only used when the worker is made
+    def getShowWorker(self, depth=1):
+        if self.m_Worker is None:
+            self.m_Worker = CShowWorker(depth)
+            self.m_Worker.pool = self.m_Pool
+        return self.m_Worker
+
+    # frames the worker can still have pending when the next frame is started.  A frame buffer can not be
+    # swapped while the worker is showing the buffer that becomes the back buffer, with three buffers that is
+    # the frame before last so one frame can still be going out, with two it is the last frame.
+    def _showRoom(self, worker):
+        room = worker.depth - 1
+        for fb in self.m_FrameBuffers:
+            room = min(room, len(fb.buffers) - 2)
+        return room
+
+    # Update all our controllers from a background thread and return without waiting for the leds to be
+    # written.  The frame is taken when this is called, leds in a CRGBBuffer are copied and a CFrameBuffer is
+    # swapped, so the next frame can be drawn right away while the worker thread encodes this one and sends it
+    # out to the leds and sinks.
+    #
+    # When the worker has fallen behind, getShowWorker(depth) frames already waiting or being shown, this
+    # blocks until it catches up.
+    # @param scale - the brightness to show the frame at, the global brightness if not given
+    # @param group only update the controllers in this group (see addToGroup)
+    def show_async(self, scale=None, group=None):
+        worker = self.getShowWorker()
+        worker.wait(self._showRoom(worker))
+
+        if profiling.hooks:
+            profiling.call('show_async', self._showAsync, worker, scale, True, group)
+        else:
+            self._showAsync(worker, scale, True, group)
+
+    # the encode and output times of these frames are not timed, that is done by the worker thread while the next
+    # frame is being drawn
+    def _showAsync(self, worker, scale, pace, group, wait=0):
+        metrics = self.m_Metrics
+        metrics.begin()
+        metrics.add(METRIC_WAIT, wait)
+
+        scale = self._beginFrame(scale, pace)
+
+        bound = []
+        for fb in self.m_FrameBuffers:
+            bound.extend(pLed for pLed, _ in fb.m_Bindings)
 
-        pCur = CLEDController.head()
-        while pCur:
-            d = pCur.getDither()
-            if self.m_nFPS < 100:
-                pCur.setDither(0)
+        frame = []
+        for pCur in self._controllers(group):
+            data = pCur.m_Data
+            seg = pCur.m_Segment
+            generation = None if seg is None else seg[2]
 
-            pCur.showLeds(scale)
-            pCur.setDither(d)
-            pCur = pCur.next()
+            # the front of a frame buffer is left alone until the worker is done with it
+            if pCur not in bound:
+                data = worker.snapshot(pCur, data)
 
+            frame.append((pCur, data, generation))
+
+        worker.put(frame, scale)
+        metrics.end()
         self.countFPS()
 
+    # show_async() for asyncio, the wait for the worker to catch up is done by yielding to the event loop
+    # instead of blocking it.
+    # @param scale - the brightness to show the frame at, the global brightness if not given
+    # @param group only update the controllers in this group (see addToGroup)
+    async def ashow(self, scale=None, group=None):
+        try:
+            import asyncio
+        except ImportError:
+            import uasyncio as asyncio
+
+        worker = self.getShowWorker()
+        room = self._showRoom(worker)
+        while worker.pending() > room:
+            await asyncio.sleep(0.001)
+
+        start = ticks_us()
+        await self.m_Pacer.wait_async()
+        wait = ticks_diff(ticks_us(), start)
+
+        if profiling.hooks:
+            profiling.call('show_async', self._showAsync, worker, scale, False, group, wait)
+        else:
+            self._showAsync(worker, scale, False, group, wait)
+
+    # Block until every frame handed to show_async() has been written out.
+    def show_wait(self):
+        if self.m_Worker is not None:
+            self.m_Worker.wait()
+
     # clear the leds, wiping the local array of data, optionally black out the leds as well
     # @param writeData whether or not to write out to the leds as well
     def clear(self, writeData=False):
@@ -797,36 +1025,56 @@ class CFastLED(object):
 
     # clear out the local data array
     def clearData(self):
-        pCur = CLEDController.head()
-        while pCur:
+        for pCur in CLEDController.controllers():
             pCur.clearLedData()
-            pCur = pCur.next()
+
+        for fb in self.m_FrameBuffers:
+            fb.clear()
 
     # Set all leds on all controllers to the given color/scale
     # @param color what color to set the leds to
     # @param scale what brightness scale to show at
-    def showColor(self, color, scale=None):
+    # @param group only set the controllers in this group (see addToGroup)
+    def showColor(self, color, scale=None, group=None):
+        if profiling.hooks:
+            profiling.call('showColor', self._showColor, color, scale, group)
+        else:
+            self._showColor(color, scale, group)
+
+    def _showColor(self, color, scale, group):
+        if self.m_Worker is not None:
+            self.m_Worker.wait()
+
         if scale is None:
             scale = self.m_Scale
 
-        global lastshow
-        while self.m_nMinMicros and time.ticks_diff(time.ticks_us(), lastshow) < self.m_nMinMicros:
-            lastshow = time.ticks_us()
+        metrics = self.m_Metrics
+        metrics.begin()
+
+        start = ticks_us()
+        self.m_Pacer.wait()
+        start = metrics.since(METRIC_WAIT, start)
 
         # If we have a function for computing power, use it!
         if self.m_pPowerFunc:
-            scale = self.m_pPowerFunc(scale, self.m_nPowerData)
-
-        pCur = CLEDController.head()
-        while pCur:
-            d = pCur.getDither()
-            if self.m_nFPS < 100:
-                pCur.setDither(0)
-
-            pCur.showColor(color, scale)
-            pCur.setDither(d)
-            pCur = pCur.next()
-
+            scale = self._limitPower(scale)
+            start = metrics.since(METRIC_POWER, start)
+
+        # the controllers take the number of leds and the adjustment, one color for every led is encoded once and
+        # repeated down the strip
+        controllers = self._controllers(group)
+        for pCur in controllers:
+            pCur.m_nEncodeUs = 0
+            pCur.showColor(color, pCur.size(), pCur.getAdjustment(scale))
+
+        # showColor is not timed by the controllers, what is not encoding is put down to output
+        encode = 0
+        for pCur in controllers:
+            encode += pCur.m_nEncodeUs
+
+        metrics.add(METRIC_ENCODE, encode)
+        metrics.add(METRIC_OUTPUT, max(0, ticks_diff(ticks_us(), start) - encode))
+        metrics.end()
         self.countFPS()
 
     # Delay for the given number of milliseconds.  Provided to allow the library to be used on platforms
@@ -848,28 +1096,24 @@ class CFastLED(object):
     # previous color temperature those controllers may have had
     # @param temp A CRGB structure describing the color temperature
     def setTemperature(self, temp):
-        pCur = CLEDController.head()
-        while pCur:
+        for pCur in CLEDController.controllers():
             pCur.setTemperature(temp)
-            pCur = pCur.next()
 
     # Set a global color correction.  Sets the color correction for all added led strips,
     # overriding whatever previous color correction those controllers may have had.
     # @param correction A CRGB structure describin the color correction.
     def setCorrection(self, correction):
-        pCur = CLEDController.head()
-        while pCur:
+        for pCur in CLEDController.controllers():
             pCur.setCorrection(correction)
-            pCur = pCur.next()
 
     # Set the dithering mode.  Sets the dithering mode for all added led strips, overriding
     # whatever previous dithering option those controllers may have had.
+    # The shows of leds that have not changed are only skipped while dithering when FASTLED_SKIP_UNCHANGED_DITHER
+    # is set to 1, DISABLE_DITHER lets static scenes be skipped without it.
     # @param ditherMode - what type of dithering to use, either BINARY_DITHER or DISABLE_DITHER
     def setDither(self, ditherMode=BINARY_DITHER):
-        pCur = CLEDController.head()
-        while pCur:
+        for pCur in CLEDController.controllers():
             pCur.setDither(ditherMode)
-            pCur = pCur.next()
 
     # Set the maximum refresh rate.  This is global for all leds.  Attempts to
     # call show faster than this rate will simply wait.  Note that the refresh rate
@@ -882,32 +1126,73 @@ class CFastLED(object):
         if constrain:
             # if we're constraining, the new value of m_nMinMicros _must_ be higher than previously (because we're only
             # allowed to slow things down if constraining)
-            if refresh > 0 and (1000000 / refresh) > self.m_nMinMicros:
-                self.m_nMinMicros = 1000000 / refresh
+            if refresh > 0 and (1000000 // refresh) > self.m_nMinMicros:
+                self.m_nMinMicros = 1000000 // refresh
 
         elif refresh > 0:
-            self.m_nMinMicros = 1000000 / refresh
+            self.m_nMinMicros = 1000000 // refresh
         else:
             self.m_nMinMicros = 0
 
+        self.m_Pacer.setPeriod(self.m_nMinMicros)
+
+    # How late frames have gone out against the deadlines set by setMaxRefreshRate
+    # @returns dict of frames, missed, mean, p99 and max, the times in µs (see CFramePacer.stats)
+    def getFrameStats(self):
+        return self.m_Pacer.stats()
+
+    # The timings of the last frames shown, the fps and how long each stage of a frame took (see METRIC_STAGES).
+    # @returns dict of frames, fps and a dict of min, mean, p95, p99 and max for every stage keyed on its name, the
+    # times in µs (see CFrameMetrics.stats)
+    def getMetrics(self):
+        return self.m_Metrics.stats()
+
+    # Get the CFrameMetrics the frames are timed by, to change the history it keeps or to turn it off
+    # (metrics.enabled = False)
+    def getFrameMetrics(self):
+        return self.m_Metrics
+
+    # Set the number of frames getMetrics works the timings out over
+    def setMetricsHistory(self, history):
+        enabled = self.m_Metrics.enabled
+        self.m_Metrics = CFrameMetrics(history)
+        self.m_Metrics.enabled = enabled
+
     # for debugging, will keep track of time between calls to countFPS, and every
     # nFrames calls, it will update an internal counter for the current FPS.
-    # @todo make this a rolling counter
     # @param nFrames - how many frames to time for determining FPS
     def countFPS(self, nFrames=25):
-        br = 1
-        lastframe = 0  # millis()
-
-        if br >= nFrames:
-            now = time.ticks_ms()
-            now -= lastframe
-
-            if now == 0:
-                now = 1  # prevent division by zero below
-
-            self.m_nFPS = (br * 1000) / now
-            br = 0
-            lastframe = time.ticks_ms()
+        now = ticks_us()
+
+        if self.m_FPSStart is None:
+            self.m_FPSStart = now
+            self.m_nFPSFrames = 0
+            return
+
+        self.m_nFPSFrames += 1
+        if self.m_nFPSFrames >= nFrames:
+            elapsed = ticks_diff(now, self.m_FPSStart)
+            if elapsed <= 0:
+                elapsed = 1  # prevent division by zero below
+
+            self.m_nFPS = (self.m_nFPSFrames * 1000000) // elapsed
+            self.m_nFPSFrames = 0
+            self.m_FPSStart = now
+
+    # How much work show() has skipped because the leds had not changed since they were last shown.  Dithering
+    # controllers only skip shows when FASTLED_SKIP_UNCHANGED_DITHER is set to 1, it is 0 by default (see
+    # CLEDController.showLeds).
+    # @returns (number of leds not re-shown, number of leds the power use was not re-calculated for), totalled over
+    # all of the controllers
+    def getSkippedLeds(self):
+        shows = 0
+        power = 0
+        for pCur in CLEDController.controllers():
+            s, p = pCur.getSkippedLeds()
+            shows += s
+            power += p
+
+        return shows, power
 
     # Get the number of frames/second being written out
     # @returns the most recently computed FPS value
@@ -917,26 +1202,15 @@ class CFastLED(object):
     # Get how many controllers have been registered
     # @returns the number of controllers (strips) that have been added with addLeds
     def count(self):
-        x = 0
-        pCur = CLEDController.head()
-        while pCur:
-            x += 1
-            pCur = pCur.next()
-
-        return x
+        return len(CLEDController.controllers())
 
     # Get a reference to a registered controller
-    # @returns a reference to the Nth controller
+    # @returns a reference to the Nth controller, the first one if there is no Nth controller
     def __getitem__(self, x):
-        pCur = CLEDController.head()
-        while x and pCur:
-            x -= 1
-            pCur = pCur.next()
-
-        if pCur is None:
-            return CLEDController.head()
-        else:
-            return pCur
+        controllers = CLEDController.controllers()
+        if 0 <= x < len(controllers):
+            return controllers[x]
+        return CLEDController.head()
 
     # Get the number of leds in the first controller
     # @returns the number of LEDs in the first controller
@@ -957,10 +1231,6 @@ LEDS = FastLED
 fuckit = 0
 pSmartMatrix = None
 
-CLEDController.m_pHead = None
-CLEDController.m_pTail = None
-lastshow = 0
-
 _frame_cnt = 0
 _retry_cnt = 0
 noise_min = 0
@@ -0,0 +1,168 @@
+# @file apa102.py
+# the SPI frames of APA102 style leds (APA102/DOTSTAR, SK9822, HD107), with
+# a 5 bit global brightness field in front of every led, and HD108 with 16
+# bit channels
+
+from .pixeltypes import CRGB
+
+
+# Split a brightness/color adjustment between the 5 bit brightness field of
+# the leds and the 8 bit channels.  The brightness field is set as low as it
+# can go with the brightest channel still reaching its level, which leaves the
+# 8 bit channels as much of their range as possible.  At low brightness that
+# keeps the detail that scaling the channels down alone would crush.  This is
+# the FASTLED_USE_GLOBAL_BRIGHTNESS split of the C++ controllers.
+#
+# @param scale - CRGB adjustment (see CLEDController.getAdjustment)
+# @returns (brightness, scale), brightness is 1 to 31 and scale is the CRGB
+#          adjustment that is left for the channels
+def apa102_brightness(scale):
+    key = (scale.r, scale.g, scale.b)
+    split = _apa102_splits.get(key)
+
+    if split is None:
+        brightness = ((((max(key) + 1) * 0x1F) - 1) >> 8) + 1
+        half = brightness >> 1
+        split = (
+            brightness,
+            CRGB(*[(0x1F * s + half) // brightness for s in key])
+        )
+
+        if len(_apa102_splits) >= 64:
+            _apa102_splits.clear()
+        _apa102_splits[key] = split
+
+    return split
+
+
+# splits worked out by apa102_brightness, keyed on the adjustment
+_apa102_splits = {}
+
+
+# Builds the frames of APA102 style leds in one bytearray that is kept from
+# frame to frame:
+#
+#   start frame - 4 zero bytes
+#   every led   - 0xE0 | brightness, then the 3 color bytes in wire order
+#   end frame   - 4 bytes for every 32 leds (rounded up), enough extra clocks
+#                 for the data to get to the end of the strip
+#
+# The led bytes are written with a stepped slice for each of the 4 slots, the
+# brightness bytes are only rewritten when the brightness changes.
+#
+# @param end - the 4 bytes the end frame is made of, 0xFF 0 0 0 for APA102 and
+#              HD107, zeros for SK9822 which latches on them
+class CAPA102Encoder(object):
+
+    def __init__(self, end=b'\xff\x00\x00\x00'):
+        self.end = bytes(end)
+        self.buf = bytearray(0)
+        self.m_nLeds = -1
+        self.m_nBrightness = -1
+
+    # the bytearray a frame of nLeds leds is built in
+    def output(self, nLeds):
+        if nLeds != self.m_nLeds:
+            size = 4 + nLeds * 4
+            self.buf = bytearray(size) + self.end * (nLeds // 32 + 1)
+            self.m_nLeds = nLeds
+            self.m_nBrightness = -1
+
+        return self.buf
+
+    # Build a frame
+    # @param data - the color bytes of the leds, 3 a led in wire order (the output of a CPixelEncoder)
+    # @param nLeds - number of leds
+    # @param brightness - the 5 bit brightness field, 0 to 31
+    # @returns the frame bytearray, it is reused by the next frame
+    def encode(self, data, nLeds, brightness=0x1F):
+        out = self.output(nLeds)
+        end = 4 + nLeds * 4
+
+        if brightness != self.m_nBrightness:
+            out[4:end:4] = bytes((0xE0 | (brightness & 0x1F),)) * nLeds
+            self.m_nBrightness = brightness
+
+        try:
+            for slot in range(3):
+                out[5 + slot:end:4] = data[slot:nLeds * 3:3]
+
+        except (NotImplementedError, AttributeError):
+            # MicroPython has no stepped slices
+            header = 0xE0 | (brightness & 0x1F)
+            pos = 4
+            for i in range(0, nLeds * 3, 3):
+                out[pos] = header
+                out[pos + 1] = data[i]
+                out[pos + 2] = data[i + 1]
+                out[pos + 3] = data[i + 2]
+                pos += 4
+
+        return out
+
+
+# Builds the frames of HD108 leds, 16 bits for every channel:
+#
+#   start frame - 8 zero bytes
+#   every led   - 2 header bytes, a 1 bit then a 5 bit gain for each channel,
+#                 then the 3 channels high byte first
+#   end frame   - 0xFF bytes, one for every 16 leds (at least 4)
+#
+# The led bytes come from a CRGB16Buffer in wire order, two stepped slices
+# for each channel.  The header bytes are only rewritten when the gains
+# change.
+class CHD108Encoder(object):
+
+    def __init__(self):
+        self.buf = bytearray(0)
+        self.m_nLeds = -1
+        self.m_Gains = None
+
+    # the bytearray a frame of nLeds leds is built in
+    def output(self, nLeds):
+        if nLeds != self.m_nLeds:
+            self.buf = bytearray(8 + nLeds * 8) + b'\xff' * max(4, (nLeds + 15) // 16)
+            self.m_nLeds = nLeds
+            self.m_Gains = None
+
+        return self.buf
+
+    # Build a frame
+    # @param data - the 16 bit leds, 6 bytes a led low byte first in wire order (CRGB16Buffer.raw())
+    # @param nLeds - number of leds
+    # @param gains - the 5 bit gain (drive current) of each channel, in wire order
+    # @returns the frame bytearray, it is reused by the next frame
+    def encode(self, data, nLeds, gains=(0x1F, 0x1F, 0x1F)):
+        out = self.output(nLeds)
+        end = 8 + nLeds * 8
+
+        gains = tuple(gains)
+        header = (
+            0x80 | ((gains[0] & 0x1F) << 2) | ((gains[1] & 0x1F) >> 3),
+            ((gains[1] & 0x07) << 5) | (gains[2] & 0x1F)
+        )
+
+        try:
+            if gains != self.m_Gains:
+                out[8:end:8] = bytes((header[0],)) * nLeds
+                out[9:end:8] = bytes((header[1],)) * nLeds
+                self.m_Gains = gains
+
+            data = bytes(data[:nLeds * 6])
+            for slot in range(3):
+                out[10 + slot * 2:end:8] = data[slot * 2 + 1::6]
+                out[11 + slot * 2:end:8] = data[slot * 2::6]
+
+        except (NotImplementedError, AttributeError):
+            # MicroPython has no stepped slices
+            pos = 8
+            for i in range(0, nLeds * 6, 6):
+                out[pos] = header[0]
+                out[pos + 1] = header[1]
+                for slot in range(3):
+                    out[pos + 2 + slot * 2] = data[i + slot * 2 + 1]
+                    out[pos + 3 + slot * 2] = data[i + slot * 2]
+                pos += 8
+            self.m_Gains = gains
+
+        return out
@@ -0,0 +1,5 @@
+# Micro benchmarks for the python port.  Each module has a run() function
+# that prints its results, e.g.
+#
+#   import fastled.benchmarks.bench_pixeltypes as b
+#   b.run()
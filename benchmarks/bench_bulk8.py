@@ -0,0 +1,82 @@
+# cost of whole strip CPixelView operators, per pixel CRGB calls against
+# the lib8tion bulk kernels (NumPy when it is installed).
+
+import time
+
+from ..pixeltypes import CRGB
+from ..pixelbuffer import CRGBBuffer
+from ..pixelset import CPixelView
+from ..lib8tion import bulk8
+
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(end, start):
+        return end - start
+
+
+def _time(func, frames):
+    start = _ticks_us()
+    for _ in range(frames):
+        func()
+    return _ticks_diff(_ticks_us(), start) / frames  # us per frame
+
+
+def _view(n):
+    leds = CRGBBuffer(n)
+    leds.buf[:] = bytes(i & 0xFF for i in range(n * 3))
+    return CPixelView(leds, n)
+
+
+# the same operators done one pixel at a time, the way CPixelView did
+# them before the bulk kernels
+def _per_pixel(view, op, rhs):
+    def bench():
+        if isinstance(rhs, CPixelView):
+            for pixel, other in zip(view, rhs):
+                op(pixel, other)
+        else:
+            for pixel in view:
+                op(pixel, rhs)
+    return bench
+
+
+def _bulk(view, op, rhs):
+    def bench():
+        op(view, rhs)
+    return bench
+
+
+# Run the benchmark and print us per frame for each operator.
+# @param n - number of leds in the strip
+# @param frames - number of frames to average over
+def run(n=1000, frames=20):
+    view = _view(n)
+    other = _view(n)
+    color = CRGB(10, 20, 30)
+
+    cases = (
+        ('fadeToBlackBy(64)', CRGB.fadeToBlackBy, CPixelView.fadeToBlackBy, 64),
+        ('nscale8(200)', CRGB.nscale8, CPixelView.nscale8, 200),
+        ('nscale8_video(200)', CRGB.nscale8_video, CPixelView.nscale8_video, 200),
+        ('+= CRGB', CRGB.__iadd__, CPixelView.__iadd__, color),
+        ('+= set', CRGB.__iadd__, CPixelView.__iadd__, other),
+        ('-= set', CRGB.__isub__, CPixelView.__isub__, other),
+        ('|= set', CRGB.__ior__, CPixelView.__ior__, other),
+    )
+
+    print('%d leds, numpy %s' % (n, 'yes' if bulk8.numpy is not None else 'no'))
+    print('%-22s %12s %12s' % ('us/frame', 'per pixel', 'bulk'))
+    for name, pixel_op, view_op, rhs in cases:
+        b = _time(_per_pixel(view, pixel_op, rhs), frames)
+        a = _time(_bulk(view, view_op, rhs), frames)
+        print('%-22s %12.0f %12.0f' % (name, b, a))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,51 @@
+# getting a strip ready to send, CRGB.get_data_stream one pixel at a time
+# against the controller's CPixelEncoder doing the whole strip.
+
+import time
+
+from ..pixeltypes import CRGB, GRB
+from ..pixelbuffer import CRGBBuffer
+from ..encoder import CPixelEncoder
+
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(end, start):
+        return end - start
+
+
+def _per_pixel(leds, order):
+    for pixel in leds:
+        pixel.get_data_stream(order)
+
+
+# Run the benchmark and print ms per frame and frames per second.
+# @param n - number of leds
+# @param frames - number of frames to average the encoder over
+def run(n=1000, frames=50):
+    leds = CRGBBuffer(n)
+    leds.buf[:] = bytes(i & 0xFF for i in range(n * 3))
+    scale = CRGB(255, 176, 240)
+    encoder = CPixelEncoder(GRB)
+
+    start = _ticks_us()
+    _per_pixel(leds, GRB)
+    single = _ticks_diff(_ticks_us(), start) / 1000
+
+    start = _ticks_us()
+    for _ in range(frames):
+        encoder.encode(leds, n, scale, [3, 5, 2], [7, 11, 6])
+    bulk = _ticks_diff(_ticks_us(), start) / 1000 / frames
+
+    print('%d leds' % n)
+    print('get_data_stream %8.2f ms/frame %8.1f fps' % (single, 1000 / single))
+    print('CPixelEncoder   %8.2f ms/frame %8.1f fps' % (bulk, 1000 / bulk))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,59 @@
+# hsv2rgb_rainbow of a whole strip, one CHSV at a time against a
+# CHSVBuffer converted in a single call.
+
+import time
+
+from ..pixeltypes import CRGB, CHSV
+from ..pixelbuffer import CRGBBuffer, CHSVBuffer
+from ..hsv2rgb import hsv2rgb_rainbow
+from ..lib8tion import bulk8
+
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(end, start):
+        return end - start
+
+
+def _per_pixel(hsv, rgb):
+    pixel = CHSV()
+    out = CRGB()
+    for i in range(len(hsv)):
+        pixel.hue = hsv.h[i]
+        pixel.sat = hsv.s[i]
+        pixel.val = hsv.v[i]
+        hsv2rgb_rainbow(pixel, out)
+        rgb[i] = out
+
+
+# Run the benchmark and print ms per frame and frames per second.
+# @param n - number of leds
+# @param frames - number of frames to average the buffer conversion over
+def run(n=10000, frames=20):
+    hsv = CHSVBuffer(n)
+    hsv.h[:] = bytes(i & 0xFF for i in range(n))
+    hsv.s[:] = bytes([240]) * n
+    hsv.v[:] = bytes((i * 7) & 0xFF for i in range(n))
+    rgb = CRGBBuffer(n)
+
+    start = _ticks_us()
+    _per_pixel(hsv, rgb)
+    single = _ticks_diff(_ticks_us(), start) / 1000
+
+    start = _ticks_us()
+    for _ in range(frames):
+        hsv2rgb_rainbow(hsv, rgb)
+    bulk = _ticks_diff(_ticks_us(), start) / 1000 / frames
+
+    print('%d leds, numpy %s' % (n, 'yes' if bulk8.numpy is not None else 'no'))
+    print('per pixel   %8.2f ms/frame %8.1f fps' % (single, 1000 / single))
+    print('CHSVBuffer  %8.2f ms/frame %8.1f fps' % (bulk, 1000 / bulk))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,173 @@
+# per pixel cost of CRGB/CHSV attribute access and construction.
+#
+# _LegacyCRGB is the dict + stacked @property layout CRGB used before it
+# was moved over to __slots__, it is kept here so the two can be compared
+# on the same interpreter.
+
+import time
+
+from ..pixeltypes import CRGB, CHSV
+
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(end, start):
+        return end - start
+
+
+class _LegacyCRGB(object):
+
+    @property
+    def red(self):
+        return self._red
+
+    @red.setter
+    def red(self, value):
+        self._red = value
+
+    @property
+    def r(self):
+        return self._red
+
+    @r.setter
+    def r(self, value):
+        self._red = value
+
+    @property
+    def g(self):
+        return self._green
+
+    @g.setter
+    def g(self, value):
+        self._green = value
+
+    @property
+    def b(self):
+        return self._blue
+
+    @b.setter
+    def b(self, value):
+        self._blue = value
+
+    @property
+    def raw(self):
+        if self._white is None:
+            return [self._red, self._green, self._blue]
+        else:
+            return [self._red, self._green, self._blue, self._white]
+
+    def __getitem__(self, index):
+        return self.raw[index]
+
+    def __init__(self, iR=None, iG=None, iB=None, iW=None, colorcode=None, rhs=None):
+        if isinstance(iR, _LegacyCRGB):
+            self._red, self._green, self._blue = iR.raw
+            self._white = None
+        elif isinstance(rhs, _LegacyCRGB):
+            self._red, self._green, self._blue = rhs.raw
+            self._white = None
+        elif isinstance(colorcode, int):
+            self._red = (colorcode >> 16) & 0xFF
+            self._green = (colorcode >> 8) & 0xFF
+            self._blue = colorcode & 0xFF
+            self._white = None
+        else:
+            self._red = iR or 0
+            self._green = iG or 0
+            self._blue = iB or 0
+            self._white = iW
+
+
+def _time(func, n):
+    start = _ticks_us()
+    func(n)
+    return _ticks_diff(_ticks_us(), start) * 1000 / n  # ns per pixel
+
+
+def _construct(cls):
+    def bench(n):
+        for i in range(n):
+            cls(i & 0xFF, 0x80, 0x40)
+    return bench
+
+
+def _construct_code(cls):
+    def bench(n):
+        for i in range(n):
+            cls(colorcode=0x102030)
+    return bench
+
+
+def _from_code(n):
+    from_code = CRGB.from_code
+    for i in range(n):
+        from_code(0x102030)
+
+
+def _from_bytes(n):
+    data = bytes(i & 0xFF for i in range(3 * 256))
+    from_bytes = CRGB.from_bytes
+    for i in range(n):
+        from_bytes(data, (i & 0xFF) * 3)
+
+
+def _read(pixel):
+    def bench(n):
+        p = pixel
+        for i in range(n):
+            p.r + p.g + p.b
+    return bench
+
+
+def _write(pixel):
+    def bench(n):
+        p = pixel
+        for i in range(n):
+            p.r = i & 0xFF
+            p.g = i & 0xFF
+            p.b = i & 0xFF
+    return bench
+
+
+def _index(pixel):
+    def bench(n):
+        p = pixel
+        for i in range(n):
+            p[0] + p[1] + p[2]
+    return bench
+
+
+def _hsv_read(n):
+    hsv = CHSV(10, 20, 30)
+    for i in range(n):
+        hsv.hue + hsv.sat + hsv.val
+
+
+# Run the benchmark and print ns per pixel for the legacy and slotted layouts.
+# @param n - number of pixels to time each case over
+def run(n=20000):
+    cases = (
+        ('construct (r, g, b)', _construct(_LegacyCRGB), _construct(CRGB)),
+        ('construct colorcode', _construct_code(_LegacyCRGB), _construct_code(CRGB)),
+        ('from_code', None, _from_code),
+        ('from_bytes', None, _from_bytes),
+        ('read r + g + b', _read(_LegacyCRGB(1, 2, 3)), _read(CRGB(1, 2, 3))),
+        ('write r, g, b', _write(_LegacyCRGB(1, 2, 3)), _write(CRGB(1, 2, 3))),
+        ('raw[0..2]', _index(_LegacyCRGB(1, 2, 3)), _index(CRGB(1, 2, 3))),
+        ('CHSV read', None, _hsv_read),
+    )
+
+    print('%-22s %12s %12s' % ('ns/pixel', 'before', 'after'))
+    for name, before, after in cases:
+        b = '%.0f' % _time(before, n) if before is not None else '-'
+        a = '%.0f' % _time(after, n)
+        print('%-22s %12s %12s' % (name, b, a))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,54 @@
+# parallel output, rendering 8 lanes of leds and bit transposing them into a
+# single stream, with the transpose timed on its own
+
+import time
+
+from ..pixeltypes import CRGB, GRB
+from ..pixelbuffer import CRGBBuffer
+from ..controller import PixelController
+from ..bitswap import transpose_lanes
+
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(end, start):
+        return end - start
+
+
+# Run the benchmark and print ms per frame and MB/s of transposed output.
+# @param n - number of leds in each lane
+# @param lanes - number of lanes, up to 16
+# @param frames - number of frames to average over
+def run(n=1000, lanes=8, frames=10):
+    leds = CRGBBuffer(n * lanes)
+    leds.buf[:] = bytes((i * 13) & 0xFF for i in range(n * lanes * 3))
+    scale = CRGB(255, 176, 240)
+
+    pixels = PixelController(GRB, lanes)
+    pixels(leds, n, scale)
+    out = pixels.render_transposed()
+    rendered = [bytes(lane) for lane in pixels.render_lanes()]
+
+    start = _ticks_us()
+    for _ in range(frames):
+        transpose_lanes(rendered, out)
+    transpose = _ticks_diff(_ticks_us(), start) / frames
+
+    start = _ticks_us()
+    for _ in range(frames):
+        pixels(leds, n, scale)
+        pixels.render_transposed(out)
+    total = _ticks_diff(_ticks_us(), start) / frames
+
+    print('%d lanes x %d leds, %d bytes out' % (lanes, n, len(out)))
+    print('transpose only   %8.2f ms/frame %8.1f MB/s' % (transpose / 1000, len(out) / transpose))
+    print('render+transpose %8.2f ms/frame %8.1f fps' % (total / 1000, 1000000 / total))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,47 @@
+# throughput of the clockless waveform encoders, in MB/s of encoded output
+
+import time
+
+from ..waveform import CSPIWaveformEncoder, CRMTWaveformEncoder
+from ..lib8tion import bulk8
+
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(end, start):
+        return end - start
+
+
+# Run the benchmark and print us per frame and MB/s for each encoding.
+# @param n - number of leds (3 bytes each) in a frame
+# @param frames - number of frames to average over
+def run(n=1000, frames=20):
+    data = bytes((i * 7) & 0xFF for i in range(n * 3))
+
+    # WS2812 timing
+    cases = (
+        ('SPI 3 bit', CSPIWaveformEncoder(250, 625, 375, 3)),
+        ('SPI 4 bit', CSPIWaveformEncoder(250, 625, 375, 4)),
+        ('RMT items', CRMTWaveformEncoder(250, 625, 375)),
+    )
+
+    print('%d leds, numpy %s' % (n, 'yes' if bulk8.numpy is not None else 'no'))
+    print('%-12s %10s %10s %10s' % ('', 'bytes', 'us/frame', 'MB/s'))
+    for name, encoder in cases:
+        encoder.encode(data)
+
+        start = _ticks_us()
+        for _ in range(frames):
+            out = encoder.encode(data)
+        us = _ticks_diff(_ticks_us(), start) / frames
+
+        print('%-12s %10d %10.0f %10.1f' % (name, len(out), us, len(out) / us))
+
+
+if __name__ == '__main__':
+    run()
@@ -374,6 +374,65 @@ def transpose8x1_noinline(A, B):
     return B
 
 
+# spread tables that have already been built, keyed on the width of an output word
+_spread_tables = {}
+
+
+# Table of every byte value with its bits spread out, one bit per output word, most significant bit first.  Word j
+# of entry v is 1 when bit 7 - j of v is set.  Words are width bytes, little endian.
+def _spread_table(width):
+    table = _spread_tables.get(width)
+
+    if table is None:
+        table = []
+        for v in range(256):
+            entry = bytearray(8 * width)
+            for j in range(8):
+                entry[j * width] = (v >> (7 - j)) & 0x1
+
+            table.append(bytes(entry))
+
+        _spread_tables[width] = table
+
+    return table
+
+
+# Transpose the bytes of up to 16 lanes of output into the parallel bit stream used by parallel (I2S, GPIO port)
+# output.  For every byte position of the lanes and every bit of it, most significant bit first, there is one output
+# word and bit k of that word is the bit from lane k.  The words are a byte for up to 8 lanes and 2 bytes (little
+# endian) for up to 16.
+#
+# Every lane is spread out with a lookup table into one bit per word, then the lanes are shifted into their bit and
+# or'ed together as whole frames, so the work per byte of led data is a table lookup.
+#
+# @param lanes - the bytes of each lane, all the same length (see PixelController.render_lanes)
+# @param out - bytearray to write the stream into, one is made if not given
+# @returns out, len(lanes[0]) * 8 bytes for 8 lanes or fewer, * 16 for more
+def transpose_lanes(lanes, out=None):
+    if not lanes:
+        raise ValueError('there are no lanes to transpose')
+    if len(lanes) > 16:
+        raise ValueError('at most 16 lanes can be transposed')
+
+    count = len(lanes[0])
+    width = 1 if len(lanes) <= 8 else 2
+    size = count * 8 * width
+
+    if out is None:
+        out = bytearray(size)
+
+    table = _spread_table(width)
+    frame = 0
+    for k, lane in enumerate(lanes):
+        if len(lane) != count:
+            raise ValueError('every lane has to be the same length')
+
+        frame |= int.from_bytes(b''.join([table[b] for b in lane]), 'little') << k
+
+    out[:size] = frame.to_bytes(size, 'little')
+    return out
+
+
 def get_bit(value, bit_num):
     return (value >> bit_num) & 1
 
@@ -0,0 +1,341 @@
+# @file chipsets.h
+# contains the bulk of the definitions for the various LED chipsets supported.
+
+from .fastled_config import FASTLED_USE_GLOBAL_BRIGHTNESS
+from .pixeltypes import *
+from .controller import *
+from .fastled_delay import CMinWait, ticks_us, ticks_diff
+from .waveform import CSPIWaveformEncoder, CRMTWaveformEncoder
+from .apa102 import *
+
+
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # /
+#
+# SPI based chipsets
+#
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # /
+
+# APA102 controller class.
+#
+# The frame is built by a CAPA102Encoder, every led is sent as 0xE0 | brightness followed by the three color bytes.
+# With global_brightness on (FASTLED_USE_GLOBAL_BRIGHTNESS) the brightness is split between the 5 bit field and
+# the 8 bit channels by apa102_brightness, otherwise the field is always 31 and the channels do all of the scaling.
+# The frame goes to the sink of the controller (see CPixelLEDController.setSink).
+#
+# @param DATA_PIN the data pin for these leds
+# @param CLOCK_PIN the clock pin for these leds
+# @param RGB_ORDER the RGB ordering for these leds
+# @param SPI_SPEED the SPI clock for these leds, in Hz
+# @param global_brightness use the 5 bit brightness field for part of the brightness
+class APA102Controller(CPixelLEDController):
+    END_FRAME = b'\xff\x00\x00\x00'
+
+    def __init__(
+        self,
+        DATA_PIN,
+        CLOCK_PIN,
+        RGB_ORDER=RGB,
+        SPI_SPEED=12000000,
+        global_brightness=FASTLED_USE_GLOBAL_BRIGHTNESS == 1
+    ):
+        self._DATA_PIN = DATA_PIN
+        self._CLOCK_PIN = CLOCK_PIN
+        self._SPI_SPEED = SPI_SPEED
+        self.m_bGlobalBrightness = global_brightness
+        self.m_nBrightness = 0x1F
+        self.m_Frame = CAPA102Encoder(self.END_FRAME)
+
+        CPixelLEDController.__init__(self, RGB_ORDER)
+
+    # turn the split of the brightness between the 5 bit field and the channels on or off
+    def setGlobalBrightness(self, enable):
+        self.m_bGlobalBrightness = enable
+        return self
+
+    def _pixels(self, data, nLeds, scale):
+        if self.m_bGlobalBrightness:
+            self.m_nBrightness, scale = apa102_brightness(scale)
+        else:
+            self.m_nBrightness = 0x1F
+
+        return CPixelLEDController._pixels(self, data, nLeds, scale)
+
+    # Build the SPI frame for the pixels
+    # @returns the frame bytearray, it is reused by the next frame
+    def frame(self, pixels):
+        return self.m_Frame.encode(pixels.encode(), pixels.size(), self.m_nBrightness)
+
+    def showPixels(self, pixels):
+        frame = self.frame(pixels)
+        if self.m_Sink is not None:
+            self.m_Sink.write(frame)
+
+    # the sink gets the whole SPI frame
+    def sinkOrder(self):
+        return None
+
+
+# SK9822 controller class.  The same as the APA102 except the end frame is all zeros, which the SK9822 needs to latch
+# the frame.
+class SK9822Controller(APA102Controller):
+    END_FRAME = b'\x00\x00\x00\x00'
+
+    def __init__(
+        self,
+        DATA_PIN,
+        CLOCK_PIN,
+        RGB_ORDER=RGB,
+        SPI_SPEED=24000000,
+        global_brightness=FASTLED_USE_GLOBAL_BRIGHTNESS == 1
+    ):
+        APA102Controller.__init__(self, DATA_PIN, CLOCK_PIN, RGB_ORDER, SPI_SPEED, global_brightness)
+
+
+# HD107(S) controller class.  The APA102 frame, clocked up to 40MHz.
+class HD107Controller(APA102Controller):
+
+    def __init__(
+        self,
+        DATA_PIN,
+        CLOCK_PIN,
+        RGB_ORDER=RGB,
+        SPI_SPEED=40000000,
+        global_brightness=FASTLED_USE_GLOBAL_BRIGHTNESS == 1
+    ):
+        APA102Controller.__init__(self, DATA_PIN, CLOCK_PIN, RGB_ORDER, SPI_SPEED, global_brightness)
+
+
+# HD108 controller class, 16 bits for every channel and a 5 bit gain for each channel in front of every led.
+#
+# The leds go through the 16 bit path, expanded with the scale and gamma applied at 16 bits (see setGamma), and the
+# frame is built by a CHD108Encoder and written to the sink of the controller.
+#
+# @param DATA_PIN the data pin for these leds
+# @param CLOCK_PIN the clock pin for these leds
+# @param RGB_ORDER the RGB ordering for these leds
+# @param SPI_SPEED the SPI clock for these leds, in Hz
+class HD108Controller(CPixelLEDController):
+
+    def __init__(self, DATA_PIN, CLOCK_PIN, RGB_ORDER=RGB, SPI_SPEED=40000000):
+        self._DATA_PIN = DATA_PIN
+        self._CLOCK_PIN = CLOCK_PIN
+        self._SPI_SPEED = SPI_SPEED
+        self.m_Gains = (0x1F, 0x1F, 0x1F)
+        self.m_Frame = CHD108Encoder()
+
+        CPixelLEDController.__init__(self, RGB_ORDER)
+
+    # set the 5 bit gain (drive current) of each channel, in wire order
+    def setGains(self, gains):
+        self.m_Gains = tuple(gains)
+        return self
+
+    def getGains(self):
+        return self.m_Gains
+
+    # Build the SPI frame of the leds
+    # @returns the frame bytearray, it is reused by the next frame
+    def frame(self, data, nLeds, scale):
+        return self.m_Frame.encode(self._pixels16(data, nLeds, scale).raw(), nLeds, self.m_Gains)
+
+    def show(self, data, nLeds, scale):
+        start = ticks_us()
+        frame = self.frame(data, nLeds, scale)
+        self.m_nEncodeUs += ticks_diff(ticks_us(), start)
+
+        if self.m_Sink is not None:
+            self.m_Sink.write(frame)
+
+    def showColor(self, data, nLeds, scale):
+        self.m_LastShown = None
+        self.show(data, nLeds, scale)
+
+    # the sink gets the whole SPI frame
+    def sinkOrder(self):
+        return None
+
+
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # /
+#
+# Clockless (3 wire) chipsets
+#
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # /
+
+# Timing of the clockless chipsets, the C_NS values of chipsets.h, one row for every chipset controller:
+#
+#   (T1, T2, T3, bits, flip, latch)
+#
+#   T1, T2, T3 - the bit timing in ns (see CWaveformEncoder)
+#   bits - bits sent on the wire for every channel, 8 or 12 (8 bits of data and 4 zero bits)
+#   flip - the data line is inverted
+#   latch - the low time after a frame that latches it, in µs
+#
+# A class of the same name is made for every row, adding a row adds a chipset.
+CLOCKLESS_CHIPSETS = {
+    'GE8822Controller800Khz': (350, 660, 350, 12, False, 50),
+    'GW6205Controller400Khz': (800, 800, 800, 12, False, 50),
+    'GW6205Controller800Khz': (400, 400, 400, 12, False, 50),
+    'UCS1903Controller400Khz': (500, 1500, 500, 8, False, 50),
+    'UCS1903BController800Khz': (400, 450, 450, 8, False, 50),
+    'UCS1904Controller800Khz': (400, 400, 450, 8, False, 50),
+    'UCS2903Controller': (250, 750, 250, 8, False, 50),
+    'TM1809Controller800Khz': (350, 350, 450, 8, False, 50),
+    'WS2811Controller800Khz': (320, 320, 640, 8, False, 50),
+    'WS2813Controller': (320, 320, 640, 8, False, 50),
+    'WS2812Controller800Khz': (250, 625, 375, 8, False, 50),
+    'WS2811Controller400Khz': (800, 800, 900, 8, False, 50),
+    'TM1803Controller400Khz': (700, 1100, 700, 8, False, 50),
+    'TM1829Controller800Khz': (340, 340, 550, 8, True, 500),
+    'TM1829Controller1600Khz': (100, 300, 200, 8, True, 500),
+    'LPD1886Controller1250Khz': (200, 400, 200, 12, False, 50),
+    'LPD1886Controller1250Khz_8bit': (200, 400, 200, 8, False, 50),
+    'SK6822Controller': (375, 1000, 375, 8, False, 50),
+    'SK6812Controller': (300, 300, 600, 8, False, 50),
+    'SM16703Controller': (300, 600, 300, 8, False, 50),
+    'PL9823Controller': (350, 1010, 350, 8, False, 50),
+}
+
+
+# Clockless controller for any timing, the Python ClocklessController<DATA_PIN, T1, T2, T3, RGB_ORDER, XTRA0, FLIP,
+# WAIT_TIME> of the platforms.
+#
+# The frame is encoded by the controller's CPixelEncoder and line coded by a waveform encoder made from the timing.
+# The led data goes to the sink of the controller (see CPixelLEDController.setSink) and the line coded frame to the
+# output set with setOutput, anything with a write method, an SPI bus clocked at getWaveform().spi_rate for 'spi' or
+# an RMT channel for 'rmt'.  The SPI frames end with the latch time of low bits, for RMT the latch time is waited out
+# between frames.
+#
+# Chipsets with more than 8 bits a channel (XTRA0, the 12 bit LPD1886 and the like) are sent from the 16 bit path,
+# the leds are expanded to 16 bits with the scale and gamma applied (see setGamma) and the top 8 + XTRA0 bits of
+# every channel go out on the wire, where 8 bit data would only fill the extra bits with zeros.
+#
+# @param DATA_PIN the data pin for these leds
+# @param T1, T2, T3 the bit timing in ns
+# @param RGB_ORDER the RGB ordering for these leds
+# @param XTRA0 zero bits sent after the 8 bits of every channel
+# @param FLIP the data line is inverted
+# @param WAIT_TIME the latch time after a frame, in µs
+# @param waveform 'spi' (4 SPI bits a bit) or 'rmt' (ESP32 RMT items)
+class ClocklessController(CPixelLEDController):
+
+    def __init__(
+        self,
+        DATA_PIN,
+        T1,
+        T2,
+        T3,
+        RGB_ORDER=RGB,
+        XTRA0=0,
+        FLIP=False,
+        WAIT_TIME=50,
+        waveform='spi'
+    ):
+        # the extra bits are sent by encode16, from the low byte of the 16 bit values
+        if waveform == 'spi':
+            encoder = CSPIWaveformEncoder(T1, T2, T3, 4, FLIP, WAIT_TIME)
+        elif waveform == 'rmt':
+            encoder = CRMTWaveformEncoder(T1, T2, T3, FLIP)
+        else:
+            raise ValueError('waveform must be spi or rmt')
+
+        self._DATA_PIN = DATA_PIN
+        self._T1 = T1
+        self._T2 = T2
+        self._T3 = T3
+        self._XTRA0 = XTRA0
+        self._FLIP = FLIP
+        self._WAIT_TIME = WAIT_TIME
+        self.m_Waveform = encoder
+        self.m_Output = None
+        self.m_Wait = None if waveform == 'spi' else CMinWait(WAIT_TIME)
+
+        CPixelLEDController.__init__(self, RGB_ORDER)
+
+    # Send the line coded frames to an output, anything with a write method.  Pass None to stop.
+    def setOutput(self, output):
+        self.m_Output = output
+        return self
+
+    def getOutput(self):
+        return self.m_Output
+
+    # get the waveform encoder the frames are line coded with
+    def getWaveform(self):
+        return self.m_Waveform
+
+    # How long a frame of nLeds leds takes on the wire, the bits of every channel at T1 + T2 + T3 each and the latch
+    # @param nLeds - number of leds, the leds of this controller if not given
+    # @returns the time in µs
+    def frameTime(self, nLeds=None):
+        if nLeds is None:
+            nLeds = self.m_nLeds
+
+        bits = nLeds * self.getEncoder().channels * (8 + self._XTRA0)
+        return (bits * (self._T1 + self._T2 + self._T3) + 999) // 1000 + self._WAIT_TIME
+
+    # the fastest the leds can be refreshed, from the time a frame takes on the wire
+    def getMaxRefreshRate(self):
+        return 1000000 // max(1, self.frameTime())
+
+    def show(self, data, nLeds, scale):
+        if self._XTRA0:
+            self._show16(data, nLeds, scale)
+        else:
+            CPixelLEDController.show(self, data, nLeds, scale)
+
+    def showColor(self, data, nLeds, scale):
+        if self._XTRA0:
+            self.m_LastShown = None
+            self._show16(data, nLeds, scale)
+        else:
+            CPixelLEDController.showColor(self, data, nLeds, scale)
+
+    def _show16(self, data, nLeds, scale):
+        start = ticks_us()
+        pixels = self._pixels16(data, nLeds, scale)
+        self.m_nEncodeUs += ticks_diff(ticks_us(), start)
+
+        self._write(pixels.raw())
+
+    def showPixels(self, pixels):
+        self._write(pixels.encode())
+
+    # with extra bits the sink gets the 16 bit leds
+    def sinkOrder(self):
+        if self._XTRA0:
+            return None
+
+        return CPixelLEDController.sinkOrder(self)
+
+    # send led data, 8 bits a channel or 16 bit values when there are extra bits, to the sink and the output
+    def _write(self, data):
+        if self.m_Sink is not None:
+            self.m_Sink.write(data)
+
+        if self.m_Output is not None:
+            if self._XTRA0:
+                frame = self.m_Waveform.encode16(data, 8 + self._XTRA0)
+            else:
+                frame = self.m_Waveform.encode(data)
+
+            if self.m_Wait is None:
+                self.m_Output.write(frame)
+            else:
+                self.m_Wait.wait()
+                self.m_Output.write(frame)
+                self.m_Wait.mark()
+
+
+# A clockless controller with the timing of a row of CLOCKLESS_CHIPSETS, CHIPSET is the name of the row.
+class ClocklessChipsetController(ClocklessController):
+    CHIPSET = None
+
+    def __init__(self, DATA_PIN, RGB_ORDER=RGB, waveform='spi'):
+        T1, T2, T3, bits, flip, latch = CLOCKLESS_CHIPSETS[self.CHIPSET]
+        ClocklessController.__init__(self, DATA_PIN, T1, T2, T3, RGB_ORDER, bits - 8, flip, latch, waveform)
+
+
+for _name in CLOCKLESS_CHIPSETS:
+    globals()[_name] = type(_name, (ClocklessChipsetController,), {'CHIPSET': _name})
+
+del _name
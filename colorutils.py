@@ -4,6 +4,9 @@
 
 from .FatsLED import *
 from .pixeltypes import *
+from .pixelbuffer import *
+from .xymap import *
+from .profiling import profiled
 from fastled_progmem import *
 from math import *
 
@@ -15,6 +18,9 @@ from math import *
 # @{
 
 def fill_solid(leds, numToFill, color):
+    if isinstance(leds, CRGBBuffer):
+        leds.fill(color, 0, numToFill)
+        return
 
     for i in range(numToFill):
         if isinstance(color, CHSV):
@@ -27,7 +33,14 @@ def fill_solid(leds, numToFill, color):
 
 # fill_rainbow - fill a range of LEDs with a rainbow of colors, at
 #                full saturation and full value (brightness)
+@profiled
 def fill_rainbow(targetArray, numToFill, initialhue, deltahue):
+    if isinstance(targetArray, CRGBBuffer):
+        hues = bytearray((initialhue + i * deltahue) & 0xFF for i in range(numToFill))
+        hsv = CHSVBuffer(numToFill, hues, bytearray([240]) * numToFill, bytearray([255]) * numToFill)
+        hsv2rgb_rainbow(hsv, targetArray, numToFill)
+        return
+
     hsv = CHSV(initialhue, 240, 255)
 
     for i in range(numToFill):
@@ -93,6 +106,7 @@ saccum87 = int
 
 # Convenience functions to fill an array of colors with a
 # two-color, three-color, or four-color gradient
+@profiled
 def fill_gradient(targetArray, startpos, startcolor, endpos, endcolor=SHORTEST_HUES, directionCode=SHORTEST_HUES, c1=SHORTEST_HUES, c2=None, c3=None, c4=None, numLeds=None):
     
     if isinstance(directionCode, CHSV):
@@ -203,6 +217,7 @@ fill_gradient_HSV = fill_gradient
 #                     Unlike HSV, there is no 'color wheel' in RGB space,
 #                     and therefore there's only one 'direction' for the
 #                     gradient to go, and no 'direction code' is needed.
+@profiled
 def fill_gradient_RGB(leds, startpos, startcolor, endpos, endcolor, c1=None, c2=None, c3=None, c4=None):
     if isinstance(endpos, CRGB):
         c4 = endpos
@@ -289,7 +304,12 @@ def fade_video(leds, num_leds, fadeBy):
 # nscale8_video - scale down the brightness of an array of pixels
 #                 all at once.  Guaranteed to never scale a pixel
 #                 all the way down to black, unless 'scale' is zero.
+@profiled
 def nscale8_video(leds, num_leds, scale):
+    if isinstance(leds, CRGBBuffer):
+        leds.nscale8_video(scale, num_leds)
+        return
+
     for i in range(num_leds):
         leds[i].nscale8_video(scale)
 
@@ -309,7 +329,12 @@ def fade_raw(leds, num_leds, fadeBy):
 # nscale8 - scale down the brightness of an array of pixels
 #           all at once.  This function can scale pixels all the
 #           way down to black even if 'scale' is not zero.
+@profiled
 def nscale8(leds, num_leds, scale):
+    if isinstance(leds, CRGBBuffer):
+        leds.nscale8(scale, num_leds)
+        return
+
     for i in range(num_leds):
         leds[i].nscale8(scale)
 
@@ -330,6 +355,7 @@ def nscale8_raw(leds, num_leds, scale):
 #                  You can also use colormasks like CRGB::Blue to
 #                  zero out the red and green elements, leaving blue
 #                  (largely) the same.
+@profiled
 def fadeUsingColor(leds, numLeds, colormask):
     fr = colormask.r
     fg = colormask.g
@@ -460,55 +486,94 @@ def nblend(existing, overlay, count, amountOfOverlay=None, directionCode=SHORTES
 #         calls to 'blur' will also result in the light fading,
 #         eventually all the way to black this is by design so that
 #         it can be used to (slowly) clear the LEDs to black.
+@profiled
 def blur1d(leds, numLeds, blur_amount):
+    blurIndexes(leds, range(numLeds), blur_amount)
+
+# blurIndexes: blur1d along an arbitrary path of led indexes, this is what
+# the rows and columns of a matrix are blurred with
+def blurIndexes(leds, indexes, blur_amount):
     keep = 255 - blur_amount
     seep = blur_amount >> 1
-    carryover = CRGB(CRGB.Black)
 
-    for i in range(numLeds):
+    if isinstance(leds, CRGBBuffer):
+        _blur_buffer(leds, indexes, keep, seep)
+        return
+
+    carryover = CRGB(0, 0, 0)
+    prev = None
+
+    for i in indexes:
         cur = CRGB(leds[i])
 
         part = CRGB(cur)
         part.nscale8(seep)
         cur.nscale8(keep)
         cur += carryover
-        if i:
-            leds[i - 1] += part
+        if prev is not None:
+            leds[prev] += part
 
         leds[i] = cur
         carryover = part
+        prev = i
+
+# blur working channel by channel on the raw bytes of a CRGBBuffer,
+# same math as the CRGB version without making any CRGB objects
+def _blur_buffer(leds, indexes, keep, seep):
+    if FASTLED_SCALE8_FIXED == 1:
+        keep += 1
+        seep += 1
+
+    buf = leds.buf
+    bpp = leds.bpp
+    positions = [leds.start + i * bpp for i in indexes]
+    if not positions:
+        return
+
+    leds.dirty.mark(min(positions), max(positions) + bpp)
+
+    for channel in range(bpp):
+        carryover = 0
+        prev = -1
+        for pos in positions:
+            pos += channel
+            c = buf[pos]
+            part = (c * seep) >> 8
+            cur = ((c * keep) >> 8) + carryover
+            if prev >= 0:
+                p = buf[prev] + part
+                buf[prev] = p if p < 255 else 255
+
+            buf[pos] = cur if cur < 255 else 255
+            carryover = part
+            prev = pos
 
-def blur2d(leds, width, height, blur_amount):
-    blurRows(leds, width, height, blur_amount)
-    blurColumns(leds, width, height, blur_amount)
+# The 2d blurs take the matrix layout from xymap, which can be a CRGBMatrix,
+# an xy_table or an XY(x, y) function.  leds can also be a CRGBMatrix.  With
+# neither a plain row by row layout is used.
+@profiled
+def blur2d(leds, width, height, blur_amount, xymap=None):
+    leds, table = resolve_xymap(leds, width, height, xymap)
+    blurRows(leds, width, height, blur_amount, table)
+    blurColumns(leds, width, height, blur_amount, table)
 
 # blurRows: perform a blur1d on every row of a rectangular matrix
-def blurRows(leds, width, height, blur_amount):
-    for row in range(height):
-        rowbase = leds[row * width:]
+@profiled
+def blurRows(leds, width, height, blur_amount, xymap=None):
+    leds, table = resolve_xymap(leds, width, height, xymap)
 
-        blur1d(rowbase, width, blur_amount)
+    for row in range(height):
+        rowbase = row * width
+        blurIndexes(leds, table[rowbase:rowbase + width], blur_amount)
 
 # blurColumns: perform a blur1d on each column of a rectangular matrix
-def blurColumns(leds, width, height, blur_amount):
-    keep = 255 - blur_amount
-    seep = blur_amount >> 1
+@profiled
+def blurColumns(leds, width, height, blur_amount, xymap=None):
+    leds, table = resolve_xymap(leds, width, height, xymap)
+    count = width * height
 
     for col in range(width):
-        carryover = CRGB(CRGB.Black)
-        for i in range(height):
-            cur = CRGB(leds[XY(col, i)])
-
-            part = CRGB(cur)
-            part.nscale8(seep)
-            cur.nscale8(keep)
-            cur += carryover
-
-            if i:
-                leds[XY(col, i - 1)] += part
-
-            leds[XY(col, i)] = cur
-            carryover = part
+        blurIndexes(leds, [table[i] for i in range(col, count, width)], blur_amount)
 
 
 
@@ -2169,6 +2234,7 @@ def ColorFromPalette(pal, index, brightness=255, blendType=None):
 
 
 # Fill a range of LEDs with a sequece of entryies from a palette
+@profiled
 def fill_palette(L, N, startIndex, incIndex, pal, brightness, blendType):
     colorIndex = startIndex
     for i in range(N):
@@ -2176,6 +2242,7 @@ def fill_palette(L, N, startIndex, incIndex, pal, brightness, blendType):
         colorIndex += incIndex
 
 
+@profiled
 def map_data_into_colors_through_palette(
     dataArray,
     dataCount,
@@ -2228,6 +2295,7 @@ def map_data_into_colors_through_palette(
 #               The default 'maximim number of changes' here is 12, meaning
 #               that only approximately a quarter of the palette entries
 #               will be changed per call.
+@profiled
 def nblendPaletteTowardPalette(current, target, maxChanges):
     changes = 0
     count = 0
@@ -5,15 +5,20 @@
 from . import *
 from .led_sysdefs import *
 from .pixeltypes import *
+from .pixelbuffer import *
+from .encoder import *
+from .bitswap import transpose_lanes
 from .color import *
 from .lib8tion import *
+from .fastled_delay import ticks_us, ticks_diff
+from . import profiling
 
 
-from . import NO_DITHERING, FASTLED_SCALE8_FIXED, NO_CORRECTION
+from . import NO_DITHERING, FASTLED_SCALE8_FIXED, NO_CORRECTION, FASTLED_SKIP_UNCHANGED, FASTLED_SKIP_UNCHANGED_DITHER
 
 
 def RO(RGB_ORDER, X):
-    return RGB_BYTE(RGB_ORDER, X)
+    return rgb_order_channels(RGB_ORDER)[X]
 
 
 def RGB_BYTE(RO, X):
@@ -32,6 +37,11 @@ def RGB_BYTE2(RO):
     return RO & 0x3
 
 
+# whether an rgb order (RGBW, GRBW, WRGB, ...) has a slot for the white channel
+def RGB_HAS_WHITE(RGB_ORDER):
+    return '3' in str(RGB_ORDER)
+
+
 # operator byte *(struct CRGB[] arr) { return (byte*)arr; }
 DISABLE_DITHER = 0x00
 BINARY_DITHER = 0x01
@@ -52,9 +62,14 @@ class EDitherMode(int):
 # checking of background writing of data (I'm looking at you, teensy 3.0 DMA controller!).  If you want to pass LED
 # controllers around to methods, make them references to this type, keeps your code saner.  However, most people
 # won't be seeing/using these objects directly at all
+#
+# Every controller made is added to the registry, CLEDController.m_Controllers, in the order they were made, and
+# to the chain of controllers head()/next() walk.  The registry and the ends of the chain belong to the class, a
+# controller looks itself up in the registry with getIndex().
 class CLEDController(object):
     m_pHead = None
     m_pTail = None
+    m_Controllers = []
 
     # create an led controller object, add it to the chain of controllers
     def __init__(self):
@@ -62,16 +77,43 @@ class CLEDController(object):
         self.m_ColorCorrection = CRGB(UncorrectedColor)
         self.m_ColorTemperature = CRGB(UncorrectedTemperature)
         self.m_DitherMode = BINARY_DITHER
+        self.m_Rgbw = None
+        self.m_VideoScale = False
         self.m_nLeds = 0
 
+        # temporal dithering, the counter carries on from frame to frame and the number of virtual bits follows the
+        # measured refresh rate unless it has been set (see nextDither)
+        self.m_nDitherCounter = 0
+        self.m_nVirtualBits = None
+        self.m_nRefreshRate = 0
+        self.m_LastFrame = None
+
+        # the last adjustment worked out by getAdjustment and what it was worked out from
+        self.m_AdjustmentKey = None
+        self.m_Adjustment = None
+
+        # change tracking for CRGBBuffer led data, see setLeds/showLeds
+        self.m_Segment = None
+        self.m_LastShown = None
+        self.m_Power = None
+        self.m_nSkippedLeds = 0
+        self.m_nSkippedPowerLeds = 0
+
+        # us the last showLeds took and how much of that was encoding the leds, see CFastLED.getMetrics
+        self.m_nShowUs = 0
+        self.m_nEncodeUs = 0
+
         self.m_pNext = None
-        if self.m_pHead is None:
-            self.m_pHead = self
+        self.m_nIndex = len(CLEDController.m_Controllers)
+        CLEDController.m_Controllers.append(self)
 
-        if self.m_pTail is not None:
-            self.m_pTail.m_pNext = self
-            
-        self.m_pTail = self
+        if CLEDController.m_pHead is None:
+            CLEDController.m_pHead = self
+
+        if CLEDController.m_pTail is not None:
+            CLEDController.m_pTail.m_pNext = self
+
+        CLEDController.m_pTail = self
 
     # initialize the LED controller
     def init(self):
@@ -85,9 +127,55 @@ class CLEDController(object):
     def show(self, data, nLeds, brightness):
         self.show(data, nLeds, self.getAdjustment(brightness))
 
-    # show function using the "attached to this controller" led data
-    def showLeds(self, brightness=255):
-        self.show(self.m_Data, self.m_nLeds, self.getAdjustment(brightness))
+    # show function using the "attached to this controller" led data.  When the leds are in a CRGBBuffer and none
+    # of them have been written to since the last time they were shown, at the same brightness, the leds already
+    # show the right colors and the show is skipped (see FASTLED_SKIP_UNCHANGED).  A dithering controller is only
+    # skipped when FASTLED_SKIP_UNCHANGED_DITHER is set to 1 (it is 0 by default), it then holds the last dither step
+    # of the leds while they are skipped.
+    #
+    # data and generation are given by CFastLED.show_async, a copy of the leds taken when the frame was handed
+    # to the worker thread and the generation of the led segment at that time.
+    def showLeds(self, brightness=255, data=None, generation=None):
+        start = ticks_us()
+        self.m_nEncodeUs = 0
+
+        if profiling.hooks:
+            profiling.enter('showLeds', dict(index=self.m_nIndex, leds=self.m_nLeds))
+            try:
+                self._showLeds(brightness, data, generation)
+            finally:
+                profiling.exit('showLeds')
+        else:
+            self._showLeds(brightness, data, generation)
+
+        self.m_nShowUs = ticks_diff(ticks_us(), start)
+
+    def _showLeds(self, brightness, data, generation):
+        self.countFrame()
+        adjustment = self.getAdjustment(brightness)
+        seg = self.m_Segment
+
+        if data is None:
+            data = self.m_Data
+
+        if seg is None:
+            self.show(data, self.m_nLeds, adjustment)
+            return
+
+        if generation is None:
+            generation = seg[2]
+
+        shown = (generation, adjustment.r, adjustment.g, adjustment.b)
+        if (
+            FASTLED_SKIP_UNCHANGED == 1 and
+            (FASTLED_SKIP_UNCHANGED_DITHER == 1 or not self.isDithering()) and
+            shown == self.m_LastShown
+        ):
+            self.m_nSkippedLeds += self.m_nLeds
+            return
+
+        self.show(data, self.m_nLeds, adjustment)
+        self.m_LastShown = shown
 
     # show function w/integer brightness, will scale for color correction and temperature
     def showColor(self, data, nLeds, brightness=None):
@@ -100,8 +188,18 @@ class CLEDController(object):
             self.showColor(data, nLeds, self.getAdjustment(brightness))
    
     # get the first led controller in the chain of controllers
-    def head(self):
-        return self.m_pHead
+    @staticmethod
+    def head():
+        return CLEDController.m_pHead
+
+    # get every led controller, in the order they were made
+    @staticmethod
+    def controllers():
+        return CLEDController.m_Controllers
+
+    # get where this controller is in the registry, FastLED[index] is this controller
+    def getIndex(self):
+        return self.m_nIndex
 
     # get the next controller in the chain after this one.  will return NULL at the end of the chain
     def next(self):
@@ -111,11 +209,28 @@ class CLEDController(object):
     def setLeds(self, data, nLeds):
         self.m_Data = data
         self.m_nLeds = nLeds
+
+        if isinstance(data, CRGBBuffer):
+            self.m_Segment = data[:nLeds].segment()
+        else:
+            self.m_Segment = None
+
+        self.m_LastShown = None
+        self.m_Power = None
         return self
 
+    # How much work has been skipped because the leds had not changed.  While the controller is dithering no shows
+    # are skipped, only the power calculations, unless FASTLED_SKIP_UNCHANGED_DITHER is set to 1.
+    # @returns (number of leds not re-shown, number of leds the power use was not re-calculated for)
+    def getSkippedLeds(self):
+        return self.m_nSkippedLeds, self.m_nSkippedPowerLeds
+
     # zero out the led data managed by this controller
     def clearLedData(self):
-        del self.m_Data[:]
+        if isinstance(self.m_Data, CRGBBuffer):
+            self.m_Data.clear()
+        else:
+            del self.m_Data[:]
 
     # How many leds does this controller manage?
     def size(self):
@@ -129,7 +244,61 @@ class CLEDController(object):
     def __getitem__(self, x):
         return self.m_Data[x]
 
-    # set the dithering mode for this controller to use
+    # Set the number of virtual bits of dithering, how many frames the dither pattern takes to go all the way
+    # around is 2 ** bits.  None (the default) picks it from the refresh rate, see dither_bits.  0 turns dithering
+    # off, which lets showLeds skip the leds when they have not changed (see FASTLED_SKIP_UNCHANGED_DITHER).
+    def setVirtualBits(self, bits=None):
+        if bits is not None and not 0 <= bits <= 8:
+            raise ValueError('virtual bits must be between 0 and 8')
+
+        self.m_nVirtualBits = bits
+        return self
+
+    # get the number of virtual bits of dithering being used
+    def getVirtualBits(self):
+        if self.m_nVirtualBits is not None:
+            return self.m_nVirtualBits
+
+        if self.m_nRefreshRate:
+            return dither_bits(self.m_nRefreshRate)
+
+        return VIRTUAL_BITS
+
+    # the refresh rate measured from the time between calls to showLeds, in hz
+    def getRefreshRate(self):
+        return self.m_nRefreshRate
+
+    # fold the time since the last frame into the measured refresh rate, this is done for every frame, shown or
+    # skipped
+    def countFrame(self):
+        now = ticks_us()
+        last = self.m_LastFrame
+        self.m_LastFrame = now
+
+        if last is not None:
+            elapsed = ticks_diff(now, last)
+            if elapsed > 0:
+                rate = 1000000 // elapsed
+                if self.m_nRefreshRate:
+                    # smooth out the odd slow or fast frame
+                    rate = (self.m_nRefreshRate * 7 + rate) >> 3
+
+                self.m_nRefreshRate = rate
+
+    # Step the dithering forward one frame, the counter moves on to the next step of the dither sequence for the
+    # current number of virtual bits.
+    # @returns the dither signal (Q) for this frame, None when the refresh rate is too low to dither without
+    # flickering (0 virtual bits)
+    def nextDither(self):
+        bits = self.getVirtualBits()
+        if not bits:
+            return None
+
+        self.m_nDitherCounter = (self.m_nDitherCounter + 1) & ((1 << bits) - 1)
+        return dither_sequence(bits)[self.m_nDitherCounter]
+
+    # Set the dithering mode for this controller to use.  While dithering, shows of unchanged leds are not skipped
+    # unless FASTLED_SKIP_UNCHANGED_DITHER is set to 1.
     def setDither(self, ditherMode=BINARY_DITHER):
         self.m_DitherMode = ditherMode
         return self
@@ -138,27 +307,63 @@ class CLEDController(object):
     def getDither(self):
         return self.m_DitherMode
 
-    # the the color corrction to use for this controller, expressed as an rgb object
+    # whether the next frame will be dithered, dithering is on and the refresh rate is high enough for it
+    def isDithering(self):
+        return NO_DITHERING != 1 and self.m_DitherMode == BINARY_DITHER and self.getVirtualBits() > 0
+
+    # the the color corrction to use for this controller, expressed as an rgb object (or a color code)
     def setCorrection(self, correction):
-        self.m_ColorCorrection = correction
+        self.m_ColorCorrection = CRGB(correction)
         return self
 
     # get the correction value used by this controller
     def getCorrection(self):
         return self.m_ColorCorrection
 
-    # set the color temperature, aka white point, for this controller
+    # set the color temperature, aka white point, for this controller (an rgb object or a color code)
     def setTemperature(self, temperature):
-        self.m_ColorTemperature = temperature
+        self.m_ColorTemperature = CRGB(temperature)
         return self
 
     # get the color temperature, aka whipe point, for this controller
     def getTemperature(self):
         return self.m_ColorTemperature
 
-    # Get the combined brightness/color adjustment for this controller
+    # set the RGBWConverter used to pull the white channel out of RGB led data for RGBW leds.  Either a converter or
+    # the color of the white leds (a color temperature constant) can be passed.
+    def setRgbw(self, rgbw=UncorrectedTemperature):
+        if not isinstance(rgbw, RGBWConverter):
+            rgbw = RGBWConverter(rgbw)
+
+        self.m_Rgbw = rgbw
+        return self
+
+    # get the RGBWConverter used by this controller, None if one has not been set
+    def getRgbw(self):
+        return self.m_Rgbw
+
+    # scale the leds with scale8_video instead of scale8, a channel that is on never gets scaled all the way off at
+    # low brightness
+    def setVideoScale(self, video=True):
+        self.m_VideoScale = video
+        return self
+
+    # get whether the leds are scaled with scale8_video
+    def getVideoScale(self):
+        return self.m_VideoScale
+
+    # Get the combined brightness/color adjustment for this controller.  The brightness, correction and temperature
+    # don't change from frame to frame very often, the adjustment is only worked out again when one of them does.
     def getAdjustment(self, scale):
-        return self.computeAdjustment(scale, self.m_ColorCorrection, self.m_ColorTemperature)
+        cc = self.m_ColorCorrection
+        ct = self.m_ColorTemperature
+        key = (scale, cc.r, cc.g, cc.b, ct.r, ct.g, ct.b)
+
+        if key != self.m_AdjustmentKey:
+            self.m_Adjustment = self.computeAdjustment(scale, cc, ct)
+            self.m_AdjustmentKey = key
+
+        return self.m_Adjustment
 
     def computeAdjustment(self, scale, colorCorrection, colorTemperature):
         if NO_CORRECTION == 1:
@@ -168,13 +373,13 @@ class CLEDController(object):
             
             if scale > 0:
                 for i in range(3):
-                    cc = colorCorrection.raw[i]
-                    ct = colorTemperature.raw[i]
+                    cc = colorCorrection[i]
+                    ct = colorTemperature[i]
                     if cc > 0 < ct:
                         work = (cc + 1) * (ct + 1) * scale
 
-                        work /= 0x10000
-                        adj.raw[i] = work & 0xFF
+                        work //= 0x10000
+                        adj[i] = work & 0xFF
 
             return adj
 
@@ -184,7 +389,7 @@ class CLEDController(object):
 
 MAX_LIKELY_UPDATE_RATE_HZ = 400
 MIN_ACCEPTABLE_DITHER_RATE_HZ = 50
-UPDATES_PER_FULL_DITHER_CYCLE = (MAX_LIKELY_UPDATE_RATE_HZ / MIN_ACCEPTABLE_DITHER_RATE_HZ)
+UPDATES_PER_FULL_DITHER_CYCLE = (MAX_LIKELY_UPDATE_RATE_HZ // MIN_ACCEPTABLE_DITHER_RATE_HZ)
 RECOMMENDED_VIRTUAL_BITS = (
     (UPDATES_PER_FULL_DITHER_CYCLE > 1) +
     (UPDATES_PER_FULL_DITHER_CYCLE > 2) +
@@ -197,11 +402,57 @@ RECOMMENDED_VIRTUAL_BITS = (
 )
 
 VIRTUAL_BITS = RECOMMENDED_VIRTUAL_BITS
+
+
+# The most virtual bits of dithering that can be used at a refresh rate without the full dither cycle (2 ** bits
+# frames) dropping below MIN_ACCEPTABLE_DITHER_RATE_HZ, 60hz gets 0 bits, 100hz 1 and 400hz 3.  At
+# MAX_LIKELY_UPDATE_RATE_HZ that is RECOMMENDED_VIRTUAL_BITS.
+# @param rate - refresh rate in hz
+def dither_bits(rate):
+    bits = 0
+    while bits < 8 and rate >= MIN_ACCEPTABLE_DITHER_RATE_HZ << (bits + 1):
+        bits += 1
+
+    return bits
+
+
+# dither sequences that have already been worked out, keyed on the number of virtual bits
+_dither_sequences = {}
+
+
+# The dither signal (Q) for every step of the dither counter.  Q is the counter with its bits reversed, so if bits is
+# 2 it goes (0, 128, 64, 192), moved to the middle of each range, (32, 160, 96, 224).
+# @param bits - number of virtual bits
+# @returns a tuple of 2 ** bits values
+def dither_sequence(bits):
+    seq = _dither_sequences.get(bits)
+
+    if seq is None:
+        seq = []
+        for R in range(1 << bits):
+            Q = 0
+            for i in range(8):
+                Q = set_bit(Q, 7 - i, get_bit(R, i))
+
+            if bits < 8:
+                Q += 0x01 << (7 - bits)
+
+            seq.append(Q)
+
+        seq = tuple(seq)
+        _dither_sequences[bits] = seq
+
+    return seq
             
             
 # Pixel controller class.  This is the class that we use to centralize pixel access in a block of data, including
 # support for things like RGB reordering, scaling, dithering, skipping (for ARGB data), and eventually, we will
 # centralize 8/12/16 conversions here as well.
+#
+# The led data is kept whole and walked with an integer cursor (mPos), advanceData moves the cursor instead of
+# copying the rest of the data.  render_into/encode do the rgb order, dithering and scale of the whole strip in one
+# go, the per byte functions (loadAndScale0, advanceAndLoadAndScale0, ...) are still there for controllers that
+# want to go a byte at a time.
 class PixelController(object):
 
     def __call__(
@@ -218,7 +469,9 @@ class PixelController(object):
             
             self.d = other.d[:]
             self.e = other.e[:]
+            self.mBuffer = other.mBuffer
             self.mData = other.mData
+            self.mPos = other.mPos
             self.mScale = other.mScale
             self.mAdvance = other.mAdvance
             self.mLenRemaining = other.mLen
@@ -227,36 +480,85 @@ class PixelController(object):
             for i in range(self._LANES):
                 self.mOffsets[i] = other.mOffsets[i]
 
+        elif isinstance(d, CRGBBuffer):
+            # the buffer already holds the channel bytes back to back.  RGB leds going out to an RGBW chipset have the
+            # white pulled out of the whole buffer here, once for the frame.
+            if d.bpp == 3 and RGB_HAS_WHITE(self._RGB_ORDER):
+                d = (self.mRgbw or DefaultRGBWConverter).convert(d, count=len_)
+
+            self.mBuffer = d
+            self.mData = bytes(d.raw())
+            self.mPos = 0
+            self.mLen = len_
+            self.mLenRemaining = len_
+            self.mScale = s
+            self.enable_dithering(dither)
+            self.mAdvance = d.bpp if advance else 0
+            self.initOffsets(len_)
+
         elif isinstance(d, list) and isinstance(d[0], int):
-            self.mData = d[:]
+            # skip is the number of bytes in front of every pixel (ARGB), the cursor starts past the first ones
+            self.mBuffer = None
+            self.mData = bytes(d)
+            self.mPos = skip
             self.mLen = len_
             self.mLenRemaining = len_
             self.mScale = s
             self.enable_dithering(dither)
-            self.mData = self.mData[skip:]
             self.mAdvance = 3 + skip if advance else 0
             self.initOffsets(len_)
 
         else:
-            self.mData = list(int(item) for item in d)
+            # a single color for every led (showColor), or a list of CRGB objects
+            self.mBuffer = None
+            if isinstance(d, CRGB):
+                self.mData = bytes(int(item) for item in d)
+                self.mAdvance = 0
+            else:
+                self.mData = bytes(int(item) for pixel in d for item in (pixel.r, pixel.g, pixel.b))
+                self.mAdvance = 3
+
+            self.mPos = 0
             self.mLen = len_
             self.mLenRemaining = len_
             self.mScale = s
             self.enable_dithering(dither)
-            self.mAdvance = 3
             self.initOffsets(len_)
 
+        # the scale is the same for the whole frame, it is turned into a lookup table for each channel here so the
+        # per byte scale() is a table lookup
+        scale = self.mScale
+        self.mScaleTables = (
+            scale8_table(scale.r, self.mVideo),
+            scale8_table(scale.g, self.mVideo),
+            scale8_table(scale.b, self.mVideo),
+            scale8_table(max(scale.r, scale.g, scale.b), self.mVideo)
+        )
+
     def __init__(
         self,
         RGB_ORDER,
         LANES=1,
-        MASK=0xFFFFFFFF
+        MASK=0xFFFFFFFF,
+        rgbw=None,
+        encoder=None,
+        video=False,
+        ditherQ=None
     ):
         self._LANES = LANES
         self._RGB_ORDER = RGB_ORDER
         self._MASK = MASK
-
-        self.mData = []
+        self.mOrder = rgb_order_channels(RGB_ORDER)
+        self.mRgbw = rgbw
+        self.mEncoder = encoder
+        self.mVideo = video
+        self.mDitherQ = ditherQ
+        self.mScaleTables = None
+        self.mEncodeUs = 0  # us spent in encode()
+
+        self.mBuffer = None
+        self.mData = b''
+        self.mPos = 0
         self.mLen = 0
         self.mLenRemaining = 0
         self.d = [0] * 3
@@ -274,42 +576,13 @@ class PixelController(object):
 
     def init_binary_dithering(self):
         if NO_DITHERING != 1:
-            # Set 'virtual bits' of dithering to the highest level
-            # that is not likely to cause excessive flickering at
-            # low brightness levels + low update rates.
-            # These pre-set values are a little ambitious, since
-            # a 400Hz update rate for WS2811-family LEDs is only
-            # possible with 85 pixels or fewer.
-            # Once we have a 'number of milliseconds since last update'
-            # value available here, we can quickly calculate the correct
-            # number of 'virtual bits' on the fly with a couple of 'if'
-            # statements -- no division required.  At this point,
-            # the division is done at compile time, so there's no runtime
-            # cost, but the values are still hard-coded.
-
-            # R is the digther signal 'counter'.
-            R = 1
-
-            # R is wrapped around at 2^ditherBits,
-            # so if ditherBits is 2, R will cycle through (0,1,2,3)
-            ditherBits = VIRTUAL_BITS
-            R &= (0x01 << ditherBits) - 1
-
-            # Q is the "unscaled dither signal" itself.
-            # It's initialized to the reversed bits of R.
-            # If 'ditherBits' is 2, Q here will cycle through (0,128,64,192)
-            Q = 0
-
-            # Reverse bits in a byte
-            for i in range(8):
-                Q = set_bit(Q, ~(i - 8), get_bit(R, i))
-
-            # Now we adjust Q to fall in the center of each range,
-            # instead of at the start of the range.
-            # If ditherBits is 2, Q will be (0, 128, 64, 192) at first,
-            # and this adjustment makes it (31, 159, 95, 223).
-            if ditherBits < 8:
-                Q += 0x01 << (7 - ditherBits)
+            # Q is the "unscaled dither signal" for this frame, it is handed in by the controller (see
+            # CLEDController.nextDither) which keeps the dither counter going from frame to frame and picks the number
+            # of virtual bits from the refresh rate.  Without a controller the second step of the default sequence
+            # is used.
+            Q = self.mDitherQ
+            if Q is None:
+                Q = dither_sequence(VIRTUAL_BITS)[1 & ((1 << VIRTUAL_BITS) - 1)]
 
             # D and E form the "scaled dither signal"
             # which is added to pixel values to affect the
@@ -317,7 +590,7 @@ class PixelController(object):
 
             # Setup the initial D and E values
             for i in range(3):
-                s = self.mScale.raw[i]
+                s = self.mScale[i]
                 self.e[i] = (256 // s) + 1 if s else 0
                 self.d[i] = scale8(Q, self.e[i])
                 
@@ -343,13 +616,113 @@ class PixelController(object):
     def size(self):
         return self.mLen
 
+    def _getEncoder(self):
+        if self.mEncoder is None:
+            self.mEncoder = CPixelEncoder(self._RGB_ORDER)
+
+        return self.mEncoder
+
+    # the led data of a lane from the cursor on as a CRGBBuffer, None when the data has bytes to skip and has to
+    # be done a byte at a time
+    def _lane(self, lane):
+        data = self.mData
+        bpp = self.mAdvance
+        start = self.mOffsets[lane] + self.mPos
+        if bpp in (3, 4) and start % bpp == 0:
+            return CRGBBuffer(self.mLenRemaining, bpp, data, start // bpp)
+
+        return None
+
+    # Write the pixels of every lane from the cursor on, scaled, dithered and in rgb order, into buf starting at
+    # pos.  The lanes are written one after the other, mLenRemaining * channels bytes each, which is all of the
+    # pixels unless advanceData has moved the cursor on.
+    # @returns the position in buf after the last byte written
+    def render_into(self, buf, pos=0):
+        encoder = self._getEncoder()
+        count = self.mLenRemaining
+
+        for lane in range(self._LANES):
+            if not (1 << lane) & self._MASK:
+                continue
+
+            if self.mAdvance == 0:
+                # the same pixel (a single color) for every led, one pair of leds is encoded and copied down the strip
+                bpp = len(self.mData) if self.mBuffer is None else self.mBuffer.bpp
+                pixel = self.mData[self.mPos:self.mPos + bpp]
+                encoder.encode_solid(pixel, count, self.mScale, self.d, self.e, self.mRgbw, buf, pos, self.mVideo)
+                pos += count * encoder.channels
+                continue
+
+            data = self._lane(lane)
+            if data is not None:
+                encoder.encode(data, count, self.mScale, self.d, self.e, self.mRgbw, buf, pos, self.mVideo)
+                pos += count * encoder.channels
+                continue
+
+            tables = encoder.tables(self.mScale, self.d, self.e, self.mVideo)
+            src = self.mOffsets[lane] + self.mPos
+            mData = self.mData
+            for i in range(count):
+                parity = i & 0x1
+                for channel in self.mOrder:
+                    buf[pos] = tables[channel][parity][mData[src + channel]]
+                    pos += 1
+
+                src += self.mAdvance
+
+        return pos
+
+    # The pixels from the cursor on scaled, dithered and in rgb order, the bytes to send out to the leds.  This does
+    # the whole strip at once with the controller's CPixelEncoder, in place of loading the pixels a byte at a time.
+    # @returns a bytearray of mLenRemaining * channels bytes for every lane, it is reused by the next frame
+    def encode(self):
+        encoder = self._getEncoder()
+        lanes = 0
+        for lane in range(self._LANES):
+            if (1 << lane) & self._MASK:
+                lanes += 1
+
+        start = ticks_us()
+        out = encoder.output(self.mLenRemaining * lanes)
+        self.render_into(out)
+        self.mEncodeUs += ticks_diff(ticks_us(), start)
+        return out
+
+    # The rendered bytes of each lane, one entry for every one of the LANES lanes.  Lanes that are masked off are
+    # all zeros so every lane stays on its own output bit.
+    # @returns a list of memoryviews into the encoder's output, they are reused by the next frame
+    def render_lanes(self):
+        data = memoryview(self.encode())
+        size = self.mLenRemaining * self._getEncoder().channels
+        idle = None
+
+        lanes = []
+        pos = 0
+        for lane in range(self._LANES):
+            if (1 << lane) & self._MASK:
+                lanes.append(data[pos:pos + size])
+                pos += size
+            else:
+                if idle is None:
+                    idle = bytes(size)
+                lanes.append(idle)
+
+        return lanes
+
+    # Every lane rendered and bit transposed into one parallel stream (see transpose_lanes), the output for drivers
+    # that clock up to 16 lanes out at once.  Bit k of every output word is lane k.
+    # @param out - bytearray to write the stream into, one is made if not given
+    # @returns out
+    def render_transposed(self, out=None):
+        return transpose_lanes(self.render_lanes(), out)
+
     # get the amount to advance the pointer by
     def advanceBy(self):
         return self.mAdvance
 
     # advance the data pointer forward, adjust position counter
     def advanceData(self):
-        self.mData = self.mData[self.mAdvance:]
+        self.mPos += self.mAdvance
         self.mLenRemaining -= 1
 
     # step the dithering forward
@@ -362,40 +735,40 @@ class PixelController(object):
 
     # Some chipsets pre-cycle the first byte, which means we want to cycle byte 0's dithering separately
     def preStepFirstByteDithering(self):
-        self.d[RO(self._RGB_ORDER, 0)] = self.e[RO(self._RGB_ORDER, 0)] - self.d[RO(self._RGB_ORDER, 0)]
-        
+        channel = self.mOrder[0]
+        if channel < 3:
+            self.d[channel] = self.e[channel] - self.d[channel]
+
     def loadByte(self, SLOT, pc, lane=None):
         if lane is None:
-            return pc.mData[RO(self._RGB_ORDER, SLOT)]
+            return pc.mData[pc.mPos + pc.mOrder[SLOT]]
         else:
-            return pc.mData[pc.mOffsets[lane] + RO(self._RGB_ORDER, SLOT)]
+            return pc.mData[pc.mOffsets[lane] + pc.mPos + pc.mOrder[SLOT]]
 
     def dither(self, SLOT, pc, b, d=None):
         if d is None:
-            return qadd8(b, pc.d[RO(self._RGB_ORDER, SLOT)]) if b else 0            
-        else:
-            return qadd8(b, d) if b else 0
+            d = pc.getd(SLOT, pc)
+
+        return qadd8(b, d) if b else 0
 
     def scale(self, SLOT, pc, b, scale=None):
         if scale is None:
-            return scale8(b, pc.mScale.raw[RO(self._RGB_ORDER, SLOT)])
-        else:
-            return scale8(b, scale)
+            return pc.mScaleTables[pc.mOrder[SLOT]][b]
+
+        return scale8_video(b, scale) if pc.mVideo else scale8(b, scale)
 
     # composite shortcut functions for loading, dithering, and scaling
     def loadAndScale(self, SLOT, pc, lane=None, d=None, scale=None):
-        if lane is None and d is None and scale is None:
-            return self.scale(self, SLOT, pc, pc.dither(SLOT, pc, pc.loadByte(SLOT, pc)))
-        elif d is None and scale is None:
-            return self.scale(SLOT, pc, pc.dither(SLOT, pc, pc.loadByte(SLOT, pc, lane)))
+        if d is None and scale is None:
+            return pc.scale(SLOT, pc, pc.dither(SLOT, pc, pc.loadByte(SLOT, pc, lane)))
         elif scale is not None and d is not None:
-            return scale8(pc.dither(SLOT, pc, pc.loadByte(SLOT, pc, lane), d), scale)
+            return pc.scale(SLOT, pc, pc.dither(SLOT, pc, pc.loadByte(SLOT, pc, lane), d), scale)
             
         else:
             if scale is None:
                 scale = d
                 
-            return scale8(pc.loadByte(SLOT, pc, lane), scale)
+            return pc.scale(SLOT, pc, pc.loadByte(SLOT, pc, lane), scale)
 
     def advanceAndLoadAndScale(self, SLOT, pc, lane=None, scale=None):
         if lane is None and scale is None:
@@ -408,11 +781,18 @@ class PixelController(object):
             pc.advanceData()
             return pc.loadAndScale(SLOT, pc, lane, scale)
 
+    # the white channel is not dithered and is scaled by the largest of the rgb scales, the same as CPixelEncoder
     def getd(self, SLOT, pc):
-        return pc.d[RO(self._RGB_ORDER, SLOT)]
+        channel = pc.mOrder[SLOT]
+        return pc.d[channel] if channel < 3 else 0
         
     def getscale(self, SLOT, pc):
-        return pc.mScale.raw[RO(self._RGB_ORDER, SLOT)]
+        channel = pc.mOrder[SLOT]
+        scale = pc.mScale
+        if channel < 3:
+            return scale[channel]
+
+        return max(scale.r, scale.g, scale.b)
 
     # Helper functions to get around gcc stupidities
     def loadAndScale0(self, lane=None, scale=None):
@@ -473,26 +853,130 @@ class CPixelLEDController(CLEDController):
         self._RGB_ORDER = RGB_ORDER
         self._LANES = LANES
         self._MASK = MASK
+        self.m_Encoder = None
+        self.m_Sink = None
+
+        # the 16 bit path of chipsets with more than 8 bits a channel, see _pixels16
+        self.m_Gamma = 1.0
+        self.m_Buffer16 = None
+        self.m_Tables16Key = None
+        self.m_Tables16 = None
 
         CLEDController.__init__(self)
 
+    # initialize the LED controller, the rgb order is compiled into the CPixelEncoder here so it is not worked out
+    # again on every frame
+    def init(self):
+        self.m_Encoder = CPixelEncoder(self._RGB_ORDER)
+
+    # get the CPixelEncoder for this controller's rgb order
+    def getEncoder(self):
+        if self.m_Encoder is None:
+            self.m_Encoder = CPixelEncoder(self._RGB_ORDER)
+
+        return self.m_Encoder
+
+    # Send every frame this controller shows to a sink (a CFrameSink) as well as the leds.  With a sink set the
+    # leds can be run without any led hardware, the sink gets the encoded frame.  Pass None to stop.
+    def setSink(self, sink):
+        self.m_Sink = sink
+        if sink is not None:
+            sink.setLayout(self.sinkOrder())
+        return self
+
+    # What the frames written to the sink are made of, the channel (0 r, 1 g, 2 b, 3 w) of each byte of a led in
+    # the order the leds take them.  Controllers whose frames are not a byte a channel (SPI frames with headers,
+    # 16 bit channels) return None.
+    def sinkOrder(self):
+        return self.getEncoder().order
+
+    # get the sink frames are being sent to, None if there isn't one
+    def getSink(self):
+        return self.m_Sink
+
+    # write out the pixels, chipset controllers override this.  The frame is handed to the sink if one is set.
     def showPixels(self, pixels):
-        pass
+        if self.m_Sink is not None:
+            self.m_Sink.write(pixels.encode())
+
+    # a PixelController for the next frame, with the dithering stepped forward when dithering is on
+    def _pixels(self, data, nLeds, scale):
+        dither = self.getDither()
+        Q = None
+        if dither == BINARY_DITHER:
+            Q = self.nextDither()
+            if Q is None:
+                dither = DISABLE_DITHER
+
+        pixels = PixelController(
+            self._RGB_ORDER, self._LANES, self._MASK, self.m_Rgbw, self.getEncoder(), self.m_VideoScale, Q
+        )
+        pixels(data, nLeds, scale, dither)
+        return pixels
+
+    # Set the gamma applied to the 8 bit leds when they are expanded to 16 bits, for chipsets with more than 8 bits a
+    # channel.  Done at 16 bits the gamma curve keeps the steps at the dark end that an 8 bit table merges.
+    # @param gamma - 1.0 is linear
+    def setGamma(self, gamma):
+        self.m_Gamma = gamma
+        return self
+
+    def getGamma(self):
+        return self.m_Gamma
+
+    # The leds as 16 bit values in wire order for chipsets with more than 8 bits a channel.  The scale and the gamma
+    # are applied at 16 bits by the expand16_table lookups that turn the 8 bit leds into 16 bit ones, leds that are
+    # already in a CRGB16Buffer are scaled at 16 bits.
+    # @param data - CRGBBuffer, CRGB16Buffer or a single CRGB for every led
+    # @returns a CRGB16Buffer, it is reused by the next frame
+    def _pixels16(self, data, nLeds, scale):
+        order = rgb_order_channels(self._RGB_ORDER)
+        if len(order) != 3:
+            raise ValueError('the 16 bit path is rgb only')
+
+        buf = self.m_Buffer16
+        if buf is None or len(buf) != nLeds:
+            buf = self.m_Buffer16 = CRGB16Buffer(nLeds)
+
+        if isinstance(data, CRGB16Buffer):
+            return buf.scaled_from(data, scale, nLeds, order)
+
+        key = (scale.r, scale.g, scale.b, self.m_Gamma)
+        if key != self.m_Tables16Key:
+            self.m_Tables16 = tuple(expand16_table(s, self.m_Gamma) for s in key[:3])
+            self.m_Tables16Key = key
+
+        if isinstance(data, CRGB):
+            # one led is expanded and repeated down the strip
+            pixel = CRGBBuffer(1)
+            pixel[0] = data
+            buf.from8(pixel, self.m_Tables16, 1, order)
+            buf.buf[6:nLeds * 6] = bytes(buf.buf[:6]) * (nLeds - 1)
+            return buf
+
+        return buf.from8(data, self.m_Tables16, nLeds, order)
 
     # set all the leds on the controller to a given color
     # @param data the crgb color to set the leds to
     # @param nLeds the numner of leds to set to this color
     # @param scale the rgb scaling value for outputting color
     def showColor(self, data, nLeds, scale):
-        pixels = PixelController(self._RGB_ORDER, self._LANES, self._MASK)
-        pixels(data, nLeds, scale, self.getDither())
-        self.showPixels(pixels)
+        # the leds are no longer showing the buffer, the next showLeds can not be skipped
+        self.m_LastShown = None
+        self._showPixels(data, nLeds, scale)
 
     # write the passed in rgb data out to the leds managed by this controller
     # @param data the rgb data to write out to the strip
     # @param nLeds the number of leds being written out
     # @param scale the rgb scaling to apply to each led before writing it out
     def show(self, data, nLeds, scale):
-        pixels = PixelController(self._RGB_ORDER, self._LANES, self._MASK)
-        pixels(data, nLeds, scale, self.getDither())
+        self._showPixels(data, nLeds, scale)
+
+    # showPixels with the time spent setting up and encoding the pixels added to m_nEncodeUs
+    def _showPixels(self, data, nLeds, scale):
+        start = ticks_us()
+        pixels = self._pixels(data, nLeds, scale)
+        self.m_nEncodeUs += ticks_diff(ticks_us(), start)
+
         self.showPixels(pixels)
+        self.m_nEncodeUs += pixels.mEncodeUs
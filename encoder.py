@@ -0,0 +1,158 @@
+# @file encoder.py
+# turns a strip of led data into the bytes that are sent out to the leds
+
+from .pixeltypes import *
+from .pixelbuffer import *
+from .hsv2rgb import DefaultRGBWConverter
+from .lib8tion import *
+
+
+# Writes the leds of a strip into a bytearray in the order the chipset wants
+# them (the rgb order), with the brightness/color adjustment and dithering
+# applied, ready to go out on the wire.
+#
+# The rgb order is worked out once when the encoder is made.  Encoding a strip
+# is then a lookup table per channel (the scale and dither of that channel
+# folded together) and one translate per output slot, the bytes of each
+# channel are moved to their slot with stepped slices.  The output bytearray
+# is kept and reused from frame to frame.
+#
+# With binary dithering the dither value flips on every pixel (see
+# PixelController.stepDithering), so even and odd pixels each get their own
+# table.
+#
+# @param RGB_ORDER - the rgb order of the chipset
+class CPixelEncoder(object):
+
+    def __init__(self, RGB_ORDER):
+        self.order = rgb_order_channels(RGB_ORDER)
+        self.channels = len(self.order)
+        self.buf = bytearray(0)
+        self.m_White = None
+        self.m_TableKey = None
+        self.m_Tables = None
+
+    # the bytearray the strip is encoded into, nLeds * channels bytes
+    def output(self, nLeds):
+        size = nLeds * self.channels
+        if len(self.buf) != size:
+            self.buf = bytearray(size)
+
+        return self.buf
+
+    # Lookup tables for every channel, (even pixel table, odd pixel table)
+    # with the white channel last.  The white channel is not color corrected,
+    # it is scaled by the largest of the rgb scales and is not dithered.
+    #
+    # The brightness, color correction and temperature are already folded
+    # into scale (see CLEDController.getAdjustment), so these tables are the
+    # whole per byte transform of a frame.  They are only rebuilt when the
+    # scale or dithering changes, the tables themselves come from the
+    # scale8_table cache.
+    # @param video - scale with scale8_video, a nonzero channel stays nonzero
+    def tables(self, scale, d=None, e=None, video=False):
+        if d is None or e is None or not any(e):
+            d = e = (0, 0, 0)
+
+        key = (scale.r, scale.g, scale.b, tuple(d), tuple(e), video)
+        if key != self.m_TableKey:
+            scales = (scale.r, scale.g, scale.b, max(scale.r, scale.g, scale.b))
+            tables = []
+
+            for i in range(4):
+                s = scales[i]
+                if i < 3 and e[i]:
+                    even = scale8_table(s, video, d[i])
+                    odd = scale8_table(s, video, e[i] - d[i])
+                else:
+                    even = odd = scale8_table(s, video)
+
+                tables.append((even, odd))
+
+            self.m_Tables = tables
+            self.m_TableKey = key
+
+        return self.m_Tables
+
+    # Encode the leds of a strip
+    # @param data - a CRGBBuffer, or the bytes of 3 byte per pixel led data
+    # @param nLeds - number of leds to encode
+    # @param scale - CRGB brightness/color adjustment (see CLEDController.getAdjustment)
+    # @param d - dither values of the first pixel, one per rgb channel
+    # @param e - dither step values, one per rgb channel
+    # @param rgbw - RGBWConverter used when RGB leds go out to an RGBW chipset
+    # @param out - bytearray to write into in place of the encoder's own
+    # @param pos - where in out to start writing
+    # @param video - scale with scale8_video
+    # @returns the encoded bytearray, nLeds * channels bytes long (or out)
+    def encode(self, data, nLeds, scale, d=None, e=None, rgbw=None, out=None, pos=0, video=False):
+        if not isinstance(data, CRGBBuffer):
+            data = CRGBBuffer(nLeds, 3, bytearray(data[:nLeds * 3]))
+
+        if self.channels == 4 and data.bpp == 3:
+            white = self.m_White
+            if white is None or len(white) != nLeds:
+                white = self.m_White = CRGBBuffer(nLeds, 4)
+
+            data = (rgbw or DefaultRGBWConverter).convert(data, white, nLeds)
+
+        if out is None:
+            out = self.output(nLeds)
+            pos = 0
+
+        if not nLeds:
+            return out
+
+        tables = self.tables(scale, d, e, video)
+        bpp = data.bpp
+        step = self.channels
+        end = pos + nLeds * step
+        raw = bytes(data.buf[data.start:data.start + nLeds * bpp])
+
+        try:
+            for slot, channel in enumerate(self.order):
+                even, odd = tables[channel]
+                if even is odd:
+                    out[pos + slot:end:step] = raw[channel::bpp].translate(even)
+                else:
+                    out[pos + slot:end:step * 2] = raw[channel::bpp * 2].translate(even)
+                    out[pos + slot + step:end:step * 2] = raw[channel + bpp::bpp * 2].translate(odd)
+
+        except (NotImplementedError, AttributeError):
+            # MicroPython has no stepped slices or bytes.translate
+            for i in range(nLeds):
+                src = i * bpp
+                parity = i & 0x1
+                for channel in self.order:
+                    out[pos] = tables[channel][parity][raw[src + channel]]
+                    pos += 1
+
+        return out
+
+    # Encode a strip where every led is the same color (showColor, clearing the leds).  Only the first two leds are
+    # worked out, the dithering alternates from one led to the next, and the pair is repeated down the strip.
+    # @param pixel - the r, g, b (and w) bytes of the color
+    # the rest of the parameters are the same as encode
+    def encode_solid(self, pixel, nLeds, scale, d=None, e=None, rgbw=None, out=None, pos=0, video=False):
+        pixel = bytes(pixel)
+        if self.channels == 4 and len(pixel) == 3:
+            pixel = bytes((rgbw or DefaultRGBWConverter).to_rgbw(*pixel))
+
+        if out is None:
+            out = self.output(nLeds)
+            pos = 0
+
+        if not nLeds:
+            return out
+
+        tables = self.tables(scale, d, e, video)
+        pair = bytes(tables[channel][parity][pixel[channel]] for parity in (0, 1) for channel in self.order)
+
+        step = self.channels
+        end = pos + nLeds * step
+        out[pos:pos + (nLeds >> 1) * step * 2] = pair * (nLeds >> 1)
+        if nLeds & 0x1:
+            out[end - step:end] = pair[:step]
+
+        return out
+
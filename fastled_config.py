@@ -60,6 +60,21 @@ FASTLED_INTERRUPT_RETRY_COUNT = 2
 FASTLED_USE_GLOBAL_BRIGHTNESS = 0
 # FASTLED_USE_GLOBAL_BRIGHTNESS = 1
 
+# Use this toggle to have show() skip controllers whose leds have not been written to since they were last
+# shown (at the same brightness).  Static or slowly changing scenes then cost next to nothing to show.  This only
+# works for leds stored in a CRGBBuffer, which is what tracks the writes.  Set it to 0 if the leds need to be
+# re-sent every frame, e.g. a strip that can be power cycled on its own.
+FASTLED_SKIP_UNCHANGED = 1
+# FASTLED_SKIP_UNCHANGED = 0
+
+# Temporal dithering changes the leds a little on every frame (by 1 at most on each channel), so by default the
+# shows of a dithering controller are not skipped, only the power calculations, and dithering is on by default.
+# Set this toggle to 1 to skip the unchanged leds of dithering controllers too.  They then stop dithering and hold
+# the dither step they were last shown at, which can be 1 off from the color they dither to.  Turning dithering off
+# (setDither(DISABLE_DITHER) or setVirtualBits(0)) gets the skipping without leaving it to this toggle.
+FASTLED_SKIP_UNCHANGED_DITHER = 0
+# FASTLED_SKIP_UNCHANGED_DITHER = 1
+
 
 NO_DITHERING = 0
 NO_CORRECTION = 0
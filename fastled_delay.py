@@ -1,6 +1,165 @@
 
 from . import *
-import utime
+import time
+
+try:
+    import utime
+except ImportError:
+    utime = time
+
+# microsecond ticks that work the same on MicroPython and CPython, use ticks_diff to subtract them since the
+# MicroPython ticks wrap around
+try:
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+    ticks_add = time.ticks_add
+except AttributeError:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+    def ticks_add(ticks, delta):
+        return ticks + delta
+
+try:
+    sleep_us = time.sleep_us
+except AttributeError:
+    def sleep_us(us):
+        time.sleep(us / 1000000)
+
+
+# Paces frames to a fixed rate by deadline.  wait() is called once a frame,
+# right before it is written out, and returns at the deadline of the frame.
+# The deadline of the next frame is a period after the deadline of this one,
+# not after the time wait() returned, so the rate does not drift with the
+# time spent drawing.
+#
+# Most of the wait is a sleep, which gives the time to other threads (and on
+# MicroPython lets the port idle), only the last spin_us is spent polling the
+# ticks so the sleep overshooting does not make the frame late.
+#
+# How late each frame went out, the jitter, is kept for the last history
+# frames.  A frame is missed when wait() is called after its deadline has
+# already gone by, drawing took longer than the period.  When it is late by
+# more than a whole period the deadlines start over from the time it went out
+# instead of rushing frames out to catch up.
+#
+# @param fps - frames per second to pace to, 0 does not pace
+# @param spin_us - how long before the deadline to stop sleeping and poll
+# @param history - number of frames the jitter statistics cover
+class CFramePacer(object):
+
+    def __init__(self, fps=0, spin_us=1000, history=64):
+        self.spin_us = spin_us
+        self.m_nPeriod = 0  # us between frames, 0 when not pacing
+        self.m_Deadline = None  # ticks of the next deadline
+        self.m_Jitter = [0] * history  # us each frame went out after its deadline
+        self.m_nFrames = 0
+        self.m_nMissed = 0
+        self.setRate(fps)
+
+    # @param fps - frames per second to pace to, 0 does not pace
+    def setRate(self, fps):
+        self.setPeriod(1000000 // fps if fps > 0 else 0)
+
+    # @param period - us between frames, 0 does not pace
+    def setPeriod(self, period):
+        period = int(period)
+        if period != self.m_nPeriod:
+            self.m_nPeriod = period
+            self.m_Deadline = None
+
+    def getPeriod(self):
+        return self.m_nPeriod
+
+    # us until the next deadline, negative once it has gone by and 0 when not pacing
+    def remaining(self):
+        if not self.m_nPeriod or self.m_Deadline is None:
+            return 0
+
+        return ticks_diff(self.m_Deadline, ticks_us())
+
+    # Wait for the deadline of this frame.
+    def wait(self):
+        if not self.m_nPeriod:
+            return
+
+        missed = False
+        if self.m_Deadline is not None:
+            remaining = ticks_diff(self.m_Deadline, ticks_us())
+            missed = remaining < 0
+            if remaining > self.spin_us:
+                sleep_us(remaining - self.spin_us)
+
+            while ticks_diff(ticks_us(), self.m_Deadline) < 0:
+                pass
+
+        self.mark(missed)
+
+    # wait() for asyncio, the sleep is done by the event loop so other tasks run while waiting.
+    async def wait_async(self):
+        if not self.m_nPeriod:
+            return
+
+        missed = False
+        if self.m_Deadline is not None:
+            try:
+                import asyncio
+            except ImportError:
+                import uasyncio as asyncio
+
+            remaining = ticks_diff(self.m_Deadline, ticks_us())
+            missed = remaining < 0
+            if remaining > self.spin_us:
+                await asyncio.sleep((remaining - self.spin_us) / 1000000)
+
+            while ticks_diff(ticks_us(), self.m_Deadline) < 0:
+                pass
+
+        self.mark(missed)
+
+    # a frame is going out now, record how late it is and set the next deadline
+    # @param missed - the frame was ready after its deadline
+    def mark(self, missed=False):
+        now = ticks_us()
+        deadline = self.m_Deadline
+
+        late = 0 if deadline is None else max(0, ticks_diff(now, deadline))
+
+        if deadline is None or late >= self.m_nPeriod:
+            deadline = now
+        if missed:
+            self.m_nMissed += 1
+
+        self.m_Jitter[self.m_nFrames % len(self.m_Jitter)] = late
+        self.m_nFrames += 1
+        self.m_Deadline = ticks_add(deadline, self.m_nPeriod)
+
+    # Jitter statistics of the last history frames
+    # @returns dict of frames, missed, mean, p99 and max, the times in us
+    def stats(self):
+        count = min(self.m_nFrames, len(self.m_Jitter))
+        samples = sorted(self.m_Jitter[:count])
+
+        if not count:
+            return dict(frames=0, missed=self.m_nMissed, mean=0, p99=0, max=0)
+
+        return dict(
+            frames=self.m_nFrames,
+            missed=self.m_nMissed,
+            mean=sum(samples) / count,
+            p99=samples[min(count - 1, (count * 99) // 100)],
+            max=samples[-1]
+        )
+
+    def reset(self):
+        self.m_Deadline = None
+        self.m_nFrames = 0
+        self.m_nMissed = 0
+
+
 # @file fastled_delay.h
 # Utility functions and classes for managing delaycycles
 
@@ -11,17 +170,23 @@ import utime
 class CMinWait(object):
 
     def __init__(self, WAIT):
-        self.mLastMicros = 0
+        self.mLastMicros = None
         self._wait = WAIT
 
+    # wait out whatever is left of WAIT µs since mark(), sleeping through all but the last spin of it
     def wait(self):
-        diff = 0
+        if self.mLastMicros is None:
+            return
+
+        remaining = self._wait - ticks_diff(ticks_us(), self.mLastMicros)
+        if remaining > 1000:
+            sleep_us(remaining - 1000)
 
-        while diff < self._wait:
-            diff = (utime.ticks_us() & 0xFFFF) - self.mLastMicros
+        while ticks_diff(ticks_us(), self.mLastMicros) < self._wait:
+            pass
 
     def mark(self):
-        self.mLastMicros = utime.ticks_us() & 0xFFFF
+        self.mLastMicros = ticks_us()
 
 
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # 
@@ -1,5 +1,8 @@
 
 from . import *
+from .pixelbuffer import *
+from .color import UncorrectedTemperature
+from .lib8tion import bulk8
 
 
 def FORCE_REFERENCE(_):
@@ -13,8 +16,14 @@ def FORCE_REFERENCE(_):
 #                   than a straight 'spectrum'.
 # 
 #                   NOTE: here hue is 0-255, not just 0-191
+#
+#                   Handing it a CHSVBuffer and a CRGBBuffer converts
+#                   the whole buffer at once.
 def hsv2rgb_rainbow(hsv, rgb, numLeds=None):
-    if numLeds is None:
+    if isinstance(hsv, CHSVBuffer) and isinstance(rgb, CRGBBuffer):
+        _hsv2rgb_rainbow_buffer(hsv, rgb, numLeds)
+
+    elif numLeds is None:
         # Yellow has a higher inherent brightness than
         # any other color; 'pure' yellow is perceived to
         # be 93% as bright as white.  In order to make
@@ -46,7 +55,7 @@ def hsv2rgb_rainbow(hsv, rgb, numLeds=None):
         # On ARM and other non-AVR platforms, we just shift 3.
         offset8 <<= 3
 
-        third = scale8(offset8, (256 / 3))  # max = 85
+        third = scale8(offset8, (256 // 3))  # max = 85
         r = 0
         g = 0
         b = 0
@@ -75,7 +84,7 @@ def hsv2rgb_rainbow(hsv, rgb, numLeds=None):
                     if Y2:
                         r = K170 + third
                         # uint8_t twothirds = (third << 1);
-                        twothirds = scale8(offset8, ((256 * 2) / 3))  # max=170
+                        twothirds = scale8(offset8, ((256 * 2) // 3))  # max=170
                         g = K85 + twothirds
                         b = 0
                         FORCE_REFERENCE(b)
@@ -88,7 +97,7 @@ def hsv2rgb_rainbow(hsv, rgb, numLeds=None):
                     # case 2: # Y -> G
                     if Y1:
                         # uint8_t twothirds = (third << 1);
-                        twothirds = scale8(offset8, ((256 * 2) / 3))  # max=170
+                        twothirds = scale8(offset8, ((256 * 2) // 3))  # max=170
                         r = K171 - twothirds
                         g = K170 + third
                         b = 0
@@ -119,7 +128,7 @@ def hsv2rgb_rainbow(hsv, rgb, numLeds=None):
                     r = 0
                     FORCE_REFERENCE(r)
                     # uint8_t twothirds = (third << 1);
-                    twothirds = scale8(offset8, ((256 * 2) / 3))  # max=170
+                    twothirds = scale8(offset8, ((256 * 2) // 3))  # max=170
                     g = K171 - twothirds  # K170?
                     b = K85 + twothirds
 
@@ -231,6 +240,174 @@ def hsv2rgb_rainbow(hsv, rgb, numLeds=None):
             hsv2rgb_rainbow(hsv[i], rgb[i])
 
 
+# The hue only picks the full saturation, full value color, so that part of
+# hsv2rgb_rainbow is a lookup table.  These are the r, g and b tables for every
+# hue along with the brightness floor added for each saturation and the
+# dimmed value used for each value.  They are made with the single pixel
+# conversion the first time a buffer is converted, so the two always match.
+_rainbow_tables = None
+
+
+def _get_rainbow_tables():
+    global _rainbow_tables
+
+    if _rainbow_tables is None:
+        r = bytearray(256)
+        g = bytearray(256)
+        b = bytearray(256)
+        hsv = CHSV(0, 255, 255)
+        rgb = CRGB()
+
+        for hue in range(256):
+            hsv.hue = hue
+            hsv2rgb_rainbow(hsv, rgb)
+            r[hue] = rgb.r
+            g[hue] = rgb.g
+            b[hue] = rgb.b
+
+        floor = bytes(scale8(255 - sat, 255 - sat) for sat in range(256))
+        dim = bytes(scale8_video_LEAVING_R1_DIRTY(val, val) for val in range(256))
+        _rainbow_tables = (bytes(r), bytes(g), bytes(b), floor, dim)
+
+    return _rainbow_tables
+
+
+# hsv2rgb_rainbow of a whole CHSVBuffer into a CRGBBuffer.  The white channel
+# of an RGBW buffer is left alone, the same as the single pixel version.
+def _hsv2rgb_rainbow_buffer(hsv, rgb, numLeds=None):
+    count = len(hsv) if numLeds is None else numLeds
+    if not count:
+        return
+
+    tables = _get_rainbow_tables()
+    start = hsv.start
+    hues = hsv.h[start:start + count]
+    sats = hsv.s[start:start + count]
+    vals = hsv.v[start:start + count]
+
+    if bulk8.numpy is not None:
+        _rainbow_numpy(rgb, hues, sats, vals, tables, count)
+    else:
+        _rainbow_python(rgb, hues, sats, vals, tables, count)
+
+    rgb.mark_dirty(0, count)
+
+
+def _rainbow_numpy(rgb, hues, sats, vals, tables, count):
+    numpy = bulk8.numpy
+    r, g, b, floor, dim = [numpy.frombuffer(t, numpy.uint8) for t in tables]
+
+    hue = numpy.frombuffer(hues, numpy.uint8)
+    out = numpy.empty((count, 3), numpy.uint16)
+    out[:, 0] = r[hue]
+    out[:, 1] = g[hue]
+    out[:, 2] = b[hue]
+
+    if FASTLED_SCALE8_FIXED == 1:
+        fixed, nonzero = 1, 0
+    else:
+        fixed, nonzero = 0, 1
+
+    sat = numpy.frombuffer(sats, numpy.uint8).astype(numpy.uint16)
+    desaturated = sat != 255
+    if desaturated.any():
+        scaled = numpy.where(out != 0, ((out * (sat + fixed)[:, None]) >> 8) + nonzero, 0)
+        scaled += floor[sat][:, None]
+        scaled[sat == 0] = 255
+        out = numpy.where(desaturated[:, None], scaled, out)
+
+    val = numpy.frombuffer(vals, numpy.uint8)
+    dimmed = val != 255
+    if dimmed.any():
+        val = dim[val].astype(numpy.uint16)
+        scaled = numpy.where(out != 0, ((out * (val + fixed)[:, None]) >> 8) + nonzero, 0)
+        scaled[val == 0] = 0
+        out = numpy.where(dimmed[:, None], scaled, out)
+
+    dest = numpy.frombuffer(rgb.buf, numpy.uint8, count * rgb.bpp, rgb.start)
+    dest.reshape(count, rgb.bpp)[:, :3] = out
+
+
+def _rainbow_python(rgb, hues, sats, vals, tables, count):
+    r_table, g_table, b_table, floor, dim = tables
+
+    try:
+        r = bytearray(hues.translate(r_table))
+        g = bytearray(hues.translate(g_table))
+        b = bytearray(hues.translate(b_table))
+    except AttributeError:
+        # MicroPython has no bytearray.translate
+        r = bytearray(r_table[h] for h in hues)
+        g = bytearray(g_table[h] for h in hues)
+        b = bytearray(b_table[h] for h in hues)
+
+    if FASTLED_SCALE8_FIXED == 1:
+        fixed, nonzero = 1, 0
+    else:
+        fixed, nonzero = 0, 1
+
+    # only the pixels that are not at full saturation/value need any more work
+    if sats.count(255) != count:
+        for i in range(count):
+            sat = sats[i]
+            if sat == 255:
+                continue
+
+            if sat == 0:
+                r[i] = g[i] = b[i] = 255
+                continue
+
+            brightness_floor = floor[sat]
+            sat += fixed
+
+            c = r[i]
+            r[i] = (((c * sat) >> 8) + nonzero if c else 0) + brightness_floor
+            c = g[i]
+            g[i] = (((c * sat) >> 8) + nonzero if c else 0) + brightness_floor
+            c = b[i]
+            b[i] = (((c * sat) >> 8) + nonzero if c else 0) + brightness_floor
+
+    if vals.count(255) != count:
+        for i in range(count):
+            val = vals[i]
+            if val == 255:
+                continue
+
+            val = dim[val]
+            if val == 0:
+                r[i] = g[i] = b[i] = 0
+                continue
+
+            val += fixed
+
+            c = r[i]
+            if c:
+                r[i] = ((c * val) >> 8) + nonzero
+            c = g[i]
+            if c:
+                g[i] = ((c * val) >> 8) + nonzero
+            c = b[i]
+            if c:
+                b[i] = ((c * val) >> 8) + nonzero
+
+    buf = rgb.buf
+    bpp = rgb.bpp
+    start = rgb.start
+    end = start + count * bpp
+
+    try:
+        buf[start:end:bpp] = r
+        buf[start + 1:end:bpp] = g
+        buf[start + 2:end:bpp] = b
+    except NotImplementedError:
+        # MicroPython can only assign to contiguous slices
+        for i in range(count):
+            pos = start + i * bpp
+            buf[pos] = r[i]
+            buf[pos + 1] = g[i]
+            buf[pos + 2] = b[i]
+
+
 HUE_MAX_RAINBOW = 255
 
 
@@ -619,94 +796,154 @@ K85 = 85
 def FIXFRAC8(N, D):
     return (N * 256) / D
 
-# This function is only an approximation, and it is not
-# nearly as fast as the normal HSV-to-RGB conversion.
-# See extended notes in the .h file.
+# White extraction for RGBW leds.
+#
+# The white led of an RGBW pixel is not pure white, it has a color of its own
+# (warm white strips look like Tungsten100W or Halogen, cool white like
+# DirectSunlight).  For an RGB color the white led takes over as much of the
+# color as it can: w is the largest level where w * white fits inside of the
+# color for every channel, and w * white is taken back out of r, g and b.
+# Going back to RGB adds w * white onto r, g and b again.
+#
+# Everything is integer math through 256 entry tables, built once for each
+# white color and shared between converters.
+_rgbw_tables = {}
 
 
-def rgb2rgbw(rgb, rgbw):
-    r = rgb.r
-    g = rgb.g
-    b = rgb.g
+def _get_rgbw_tables(white):
+    tables = _rgbw_tables.get(white)
 
-    if r == 255 and g == 255 and b == 255:
-        rgbw.r = 0
-        rgbw.g = 0
-        rgbw.b = 0
-        rgbw.w = 255
-        return
+    if tables is None:
+        to_white = []
+        from_white = []
 
-    elif r == 0 and g == 0 and b == 0:
-        rgbw.r = 0
-        rgbw.g = 0
-        rgbw.b = 0
-        rgbw.w = 0
-        return
+        for shift in (16, 8, 0):
+            c = (white >> shift) & 0xFF
+            if c:
+                to_white.append(bytes(min(255, (i * 255) // c) for i in range(256)))
+            else:
+                # the white led has none of this channel, so it puts no limit on w
+                to_white.append(bytes([255]) * 256)
 
-    hsv = rgb2hsv_approximate(rgb)
+            from_white.append(bytes((w * c) // 255 for w in range(256)))
 
-    # this conversion is close I am sure
-    # that is can be done better then what
-    # I am doing. I am using an RGB input
-    # value and then visually matching what
-    # my LED's are showing to be as close
-    # to the same color as I can get.
+        tables = tuple(to_white + from_white)
+        _rgbw_tables[white] = tables
 
-    # first problem is I am using my eyes and not a meter.
-    # second problem is (255, 255, 255, 0) and (0, 0, 0, 255)
-    # are not the same color white. This is why I am as
-    # close as I can get
+    return tables
 
-    # the trick to this whole thing is to convert RGB to HSV
-    # then think of the Saturation as how much white and
-    # the Value as how bright the white is. It is kind
-    # of a funky way to determine how to set the white led.
 
-    s = hsv.s
-    v = hsv.v
-    hsv.s = 81.0
+# Converts RGB colors to RGBW and back for a white led of the given color.
+#
+# @param white - color of the white led, a color code (one of the color
+#                temperature constants such as Tungsten100W) or a CRGB
+class RGBWConverter(object):
+
+    def __init__(self, white=UncorrectedTemperature):
+        if isinstance(white, CRGB):
+            white = (white.r << 16) | (white.g << 8) | white.b
+
+        self.white = white
+        (
+            self.r_to_w,
+            self.g_to_w,
+            self.b_to_w,
+            self.w_to_r,
+            self.w_to_g,
+            self.w_to_b
+        ) = _get_rgbw_tables(white)
+
+    # @returns (r, g, b, w)
+    def to_rgbw(self, r, g, b):
+        w = min(self.r_to_w[r], self.g_to_w[g], self.b_to_w[b])
+        return r - self.w_to_r[w], g - self.w_to_g[w], b - self.w_to_b[w], w
+
+    # @returns (r, g, b)
+    def to_rgb(self, r, g, b, w):
+        return (
+            min(255, r + self.w_to_r[w]),
+            min(255, g + self.w_to_g[w]),
+            min(255, b + self.w_to_b[w])
+        )
+
+    # Convert the first count leds of an RGB CRGBBuffer into an RGBW one.
+    # @param src - 3 byte per pixel CRGBBuffer
+    # @param dst - 4 byte per pixel CRGBBuffer, one is made if not given
+    # @param count - number of leds, all of src if not given
+    # @returns dst
+    def convert(self, src, dst=None, count=None):
+        if count is None:
+            count = len(src)
+        if dst is None:
+            dst = CRGBBuffer(count, 4)
+
+        if not count:
+            return dst
+
+        if bulk8.numpy is not None:
+            self._convert_numpy(src, dst, count)
+        else:
+            self._convert_python(src, dst, count)
 
-    hsv2rgb_rainbow(hsv, rgbw)
+        dst.mark_dirty(0, count)
+        return dst
 
-    s = (1 - (s / 100.0)) * 100.0
-    s /= 100.0
-    v /= 100.0
-    rgbw.w = (255 * (s / 2)) * v
+    def _convert_numpy(self, src, dst, count):
+        numpy = bulk8.numpy
+        r_to_w, g_to_w, b_to_w, w_to_r, w_to_g, w_to_b = [
+            numpy.frombuffer(t, numpy.uint8) for t in _get_rgbw_tables(self.white)
+        ]
 
+        rgb = numpy.frombuffer(src.buf, numpy.uint8, count * 3, src.start).reshape(count, 3)
+        out = numpy.frombuffer(dst.buf, numpy.uint8, count * 4, dst.start).reshape(count, 4)
 
-def rgbw2rgb(rgbw, rgb):
-    r = rgbw.r
-    g = rgbw.g
-    b = rgbw.b
-    w = rgbw.w
+        w = numpy.minimum(numpy.minimum(r_to_w[rgb[:, 0]], g_to_w[rgb[:, 1]]), b_to_w[rgb[:, 2]])
+        out[:, 0] = rgb[:, 0] - w_to_r[w]
+        out[:, 1] = rgb[:, 1] - w_to_g[w]
+        out[:, 2] = rgb[:, 2] - w_to_b[w]
+        out[:, 3] = w
 
-    if r == 0 and g == 0 and b == 0 and w == 255:
-        rgb.r = 255
-        rgb.g = 255
-        rgb.b = 255
-        return
+    def _convert_python(self, src, dst, count):
+        s_buf = src.buf
+        s_start = src.start
+        s_end = s_start + count * 3
+        d_buf = dst.buf
+        d_start = dst.start
+        d_end = d_start + count * 4
 
-    elif r == 0 and g == 0 and b == 0 and w == 0:
-        rgb.r = 0
-        rgb.g = 0
-        rgb.b = 0
-        return
+        try:
+            r = bytes(s_buf[s_start:s_end:3])
+            g = bytes(s_buf[s_start + 1:s_end:3])
+            b = bytes(s_buf[s_start + 2:s_end:3])
+            w = bytes(map(min, r.translate(self.r_to_w), g.translate(self.g_to_w), b.translate(self.b_to_w)))
 
-    hsv = rgb2hsv_approximate(rgbw)
+            d_buf[d_start:d_end:4] = bytes(x - y for x, y in zip(r, w.translate(self.w_to_r)))
+            d_buf[d_start + 1:d_end:4] = bytes(x - y for x, y in zip(g, w.translate(self.w_to_g)))
+            d_buf[d_start + 2:d_end:4] = bytes(x - y for x, y in zip(b, w.translate(self.w_to_b)))
+            d_buf[d_start + 3:d_end:4] = w
 
-    try:
-        w += (w / (1 - (hsv.v / 100.0))) / 2
-    except ZeroDivisionError:
-        pass
+        except (NotImplementedError, AttributeError):
+            # MicroPython has no stepped slices or bytes.translate
+            to_rgbw = self.to_rgbw
+            for i in range(count):
+                pos = s_start + i * 3
+                d_pos = d_start + i * 4
+                d_buf[d_pos:d_pos + 4] = bytes(to_rgbw(s_buf[pos], s_buf[pos + 1], s_buf[pos + 2]))
+
+
+# converter used by rgb2rgbw/rgbw2rgb when one is not passed in
+DefaultRGBWConverter = RGBWConverter()
+
+
+def rgb2rgbw(rgb, rgbw, converter=None):
+    if converter is None:
+        converter = DefaultRGBWConverter
+
+    rgbw.r, rgbw.g, rgbw.b, rgbw.w = converter.to_rgbw(rgb.r, rgb.g, rgb.b)
 
-    s = (1 - ((w / 255.0) * 2)) * 100.0  # * 16.0) * 100.0
-    hsv.s = s
 
-    hsv2rgb_rainbow(hsv, rgb)
+def rgbw2rgb(rgbw, rgb, converter=None):
+    if converter is None:
+        converter = DefaultRGBWConverter
 
-    if rgb.r > 255:
-        rgb.r = 255
-    if rgb.g > 255:
-        rgb.g = 255
-    if rgb.b > 255:
-        rgb.b = 255
+    rgb.r, rgb.g, rgb.b = converter.to_rgb(rgbw.r, rgbw.g, rgbw.b, rgbw.w or 0)
@@ -305,6 +305,7 @@ from .math8 import *
 from .random8 import *
 from .scale8 import *
 from .trig8 import *
+from .bulk8 import *
 
 # # # # # # # # # # # # # # # # # # # # # # # # 
 
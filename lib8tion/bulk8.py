@@ -0,0 +1,222 @@
+from . import *
+# @ingroup lib8tion
+
+# @defgroup Bulk Bulk math functions
+# The lib8tion math run over a whole run of bytes in a single call, for
+# working on all of the leds of a CRGBBuffer at once.  The results are the
+# same, bit for bit, as calling the per byte functions on every channel.
+#
+# Every kernel takes a bytearray and the [start, end) range of bytes to
+# work on, and rhs, which is one of
+#   an int - the same value is used for every byte, this is done with a
+#            256 entry lookup table and bytes.translate
+#   a short run of bytes - repeated over the range, one byte for each
+#            channel of a pixel (the channels of a CRGB)
+#   a run of bytes the same length as the range - byte for byte (another
+#            set of leds)
+#
+# The byte for byte kernels use NumPy when it is available, otherwise they
+# fall back to plain python over the two runs of bytes.
+# @{
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# scale tables that have already been built, see scale8_table
+_scale8_tables = {}
+
+
+# The 256 entry lookup table of scale8 (or scale8_video) by scale, with an
+# optional dither value added to every nonzero byte before it is scaled the
+# way PixelController does it.  Tables are cached, the same few scales are
+# used frame after frame.
+# @param scale - the scale
+# @param video - use scale8_video, a nonzero byte never scales to zero
+# @param dither - added (saturating) to nonzero bytes before scaling
+# @returns 256 bytes
+def scale8_table(scale, video=False, dither=0):
+    key = (scale, video, dither)
+    table = _scale8_tables.get(key)
+
+    if table is None:
+        if len(_scale8_tables) >= 256:
+            _scale8_tables.clear()
+
+        func = scale8_video if video else scale8
+        table = bytes(
+            [0] + [func(qadd8(i, dither), scale) for i in range(1, 256)]
+        )
+        _scale8_tables[key] = table
+
+    return table
+
+
+# 8 to 16 bit tables that have already been built, see expand16_table
+_expand16_tables = {}
+
+
+# The 8 to 16 bit expansion of a channel, with gamma and a scale (the
+# brightness and color correction of the channel) applied at 16 bits, so
+# the scaling does not throw away the low bits the way scale8 does.  The
+# table is split into its low and high bytes, two 256 entry tables that
+# bytes.translate can run a whole channel of a strip through.
+# @param scale - the scale, 255 keeps the full range
+# @param gamma - gamma applied to the 8 bit value, 1.0 is linear
+# @returns (low bytes, high bytes), 256 bytes each
+def expand16_table(scale=255, gamma=1.0):
+    key = (scale, gamma)
+    tables = _expand16_tables.get(key)
+
+    if tables is None:
+        if len(_expand16_tables) >= 64:
+            _expand16_tables.clear()
+
+        if gamma == 1.0:
+            values = [(i * 257 * scale + 127) // 255 for i in range(256)]
+        else:
+            values = [int(((i / 255.0) ** gamma) * 65535 * scale / 255 + 0.5) for i in range(256)]
+
+        tables = (
+            bytes(v & 0xFF for v in values),
+            bytes(v >> 8 for v in values)
+        )
+        _expand16_tables[key] = tables
+
+    return tables
+
+
+# run bytes [start, end) of buf through a 256 entry lookup table
+def translate8(buf, start, end, table):
+    data = buf[start:end]
+
+    try:
+        buf[start:end] = data.translate(table)
+    except AttributeError:
+        # MicroPython has no bytearray.translate
+        pos = start
+        for b in data:
+            buf[pos] = table[b]
+            pos += 1
+
+
+def _kernel(buf, start, end, rhs, table, pair, vector):
+    if start >= end:
+        return
+
+    if isinstance(rhs, int):
+        translate8(buf, start, end, table(rhs))
+        return
+
+    count = end - start
+    if len(rhs) != count:
+        rhs = bytes(rhs) * (count // len(rhs))
+
+    if numpy is not None and vector is not None:
+        a = numpy.frombuffer(buf, numpy.uint8, count, start)
+        b = numpy.frombuffer(rhs, numpy.uint8, count).astype(numpy.uint16)
+        a[:] = vector(a.astype(numpy.uint16), b)
+    else:
+        buf[start:end] = bytes(pair(buf[start:end], rhs))
+
+
+# qadd8 of every byte
+def qadd8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i + d if i + d < 255 else 255 for i in range(256)),
+        lambda a, b: (x + y if x + y < 255 else 255 for x, y in zip(a, b)),
+        None if numpy is None else lambda a, b: numpy.minimum(a + b, 255)
+    )
+
+
+# qsub8 of every byte
+def qsub8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i - d if i > d else 0 for i in range(256)),
+        lambda a, b: (x - y if x > y else 0 for x, y in zip(a, b)),
+        None if numpy is None else lambda a, b: numpy.where(a > b, a - b, 0)
+    )
+
+
+# qmul8 of every byte
+def qmul8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i * d if i * d < 255 else 255 for i in range(256)),
+        lambda a, b: (x * y if x * y < 255 else 255 for x, y in zip(a, b)),
+        None if numpy is None else lambda a, b: numpy.minimum(a * b, 255)
+    )
+
+
+# scale8 of every byte
+def scale8_bulk(buf, start, end, rhs):
+    if FASTLED_SCALE8_FIXED == 1:
+        _kernel(
+            buf, start, end, rhs,
+            scale8_table,
+            lambda a, b: ((x * (y + 1)) >> 8 for x, y in zip(a, b)),
+            None if numpy is None else lambda a, b: (a * (b + 1)) >> 8
+        )
+    else:
+        _kernel(
+            buf, start, end, rhs,
+            scale8_table,
+            lambda a, b: ((x * y) >> 8 for x, y in zip(a, b)),
+            None if numpy is None else lambda a, b: (a * b) >> 8
+        )
+
+
+# scale8_video of every byte
+def scale8_video_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda s: scale8_table(s, True),
+        lambda a, b: (((x * y) >> 8) + (y != 0) if x else 0 for x, y in zip(a, b)),
+        None if numpy is None else lambda a, b: numpy.where(a == 0, 0, ((a * b) >> 8) + (b != 0))
+    )
+
+
+# the larger of each byte and rhs (the |= operator of CRGB)
+def max8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i if i > d else d for i in range(256)),
+        lambda a, b: (x if x > y else y for x, y in zip(a, b)),
+        None if numpy is None else numpy.maximum
+    )
+
+
+# the smaller of each byte and rhs (the &= operator of CRGB)
+def min8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i if i < d else d for i in range(256)),
+        lambda a, b: (x if x < y else y for x, y in zip(a, b)),
+        None if numpy is None else numpy.minimum
+    )
+
+
+# shift every byte right
+def rshift8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i >> d for i in range(256)),
+        lambda a, b: (x >> y for x, y in zip(a, b)),
+        None if numpy is None else lambda a, b: a >> b
+    )
+
+
+# divide every byte
+def div8_bulk(buf, start, end, rhs):
+    _kernel(
+        buf, start, end, rhs,
+        lambda d: bytes(i // d for i in range(256)),
+        lambda a, b: (x // y for x, y in zip(a, b)),
+        None
+    )
+
+# @}
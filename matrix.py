@@ -0,0 +1,120 @@
+# @file matrix.py
+# 2D framebuffer for led matrices
+
+from .pixelset import *
+from .xymap import *
+
+
+# A width x height matrix of leds.  The led index of every (x, y) position
+# is worked out once when the matrix is made (see xy_table) so XY(), the row,
+# column and rect views and the 2d blur/noise functions are all table lookups.
+#
+# A CRGBMatrix is a CPixelView over the whole of its leds, so it can be handed
+# to anything that takes a set of leds.  Integer indexes and iterating go in
+# led (wiring) order, indexing with an (x, y) tuple goes through the layout.
+#
+# @param width - width of the matrix
+# @param height - height of the matrix
+# @param leds - led storage, a CRGBBuffer of width * height leds is made if not given
+# @param serpentine - every other row of the wiring runs backwards
+# @param rotation - 0, 90, 180 or 270, how many degrees clockwise the wiring is turned
+# @param flipX - mirror the matrix left to right
+# @param flipY - mirror the matrix top to bottom
+# @param bpp - bytes per pixel of the CRGBBuffer that is made when leds is not given
+class CRGBMatrix(CPixelView):
+
+    def __init__(
+        self,
+        width,
+        height,
+        leds=None,
+        serpentine=False,
+        rotation=0,
+        flipX=False,
+        flipY=False,
+        bpp=3
+    ):
+        count = width * height
+
+        if leds is None:
+            leds = CRGBBuffer(count, bpp)
+        elif len(leds) < count:
+            raise ValueError('a %dx%d matrix needs %d leds, got %d' % (width, height, count, len(leds)))
+
+        super(CRGBMatrix, self).__init__(leds, count)
+
+        self.width = width
+        self.height = height
+        self.serpentine = serpentine
+        self.rotation = rotation
+        self.flipX = flipX
+        self.flipY = flipY
+        self.xytable = xy_table(width, height, serpentine, rotation, flipX, flipY)
+
+    # led index of the pixel at x, y
+    def XY(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError('CRGBMatrix position (%d, %d) out of range' % (x, y))
+
+        return self.xytable[y * self.width + x]
+
+    def __getitem__(self, x):
+        if isinstance(x, tuple):
+            return self.leds[self.XY(*x)]
+
+        return super(CRGBMatrix, self).__getitem__(x)
+
+    def __setitem__(self, x, color):
+        if isinstance(x, tuple):
+            x = self.XY(*x)
+
+        super(CRGBMatrix, self).__setitem__(x, color)
+
+    # the pixels of row y, left to right
+    def row(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError('CRGBMatrix row out of range')
+
+        base = y * self.width
+        return CPixelMapView(self.leds, self.xytable[base:base + self.width])
+
+    # the pixels of column x, top to bottom
+    def column(self, x):
+        if not 0 <= x < self.width:
+            raise IndexError('CRGBMatrix column out of range')
+
+        table = self.xytable
+        return CPixelMapView(self.leds, [table[i] for i in range(x, len(table), self.width)])
+
+    # the pixels of a width x height rectangle with its top left corner at
+    # x, y, row by row
+    def rect(self, x, y, width, height):
+        if (
+            x < 0 or y < 0 or
+            x + width > self.width or
+            y + height > self.height
+        ):
+            raise IndexError('CRGBMatrix rect out of range')
+
+        table = self.xytable
+        indexes = []
+        for row in range(y, y + height):
+            base = row * self.width + x
+            indexes.extend(table[base:base + width])
+
+        return CPixelMapView(self.leds, indexes)
+
+    def blur2d(self, blur_amount):
+        blur2d(self.leds, self.width, self.height, blur_amount, self.xytable)
+        return self
+
+    def blurRows(self, blur_amount):
+        blurRows(self.leds, self.width, self.height, blur_amount, self.xytable)
+        return self
+
+    def blurColumns(self, blur_amount):
+        blurColumns(self.leds, self.width, self.height, blur_amount, self.xytable)
+        return self
+
+    def __repr__(self):
+        return 'CRGBMatrix(%d, %d)' % (self.width, self.height)
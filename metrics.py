@@ -0,0 +1,164 @@
+# @file metrics.py
+# rolling frame timings, how long frames take and where the time goes
+
+from .fastled_delay import ticks_us, ticks_diff
+
+
+# the stages a frame is timed in, in the order they happen
+#
+#   frame  - from the start of one show to the start of the next, what the fps is worked out from
+#   render - from the end of one show to the start of the next, the time the sketch spends drawing
+#   wait   - waiting for the frame's deadline (see setMaxRefreshRate)
+#   power  - working out the power limited brightness
+#   encode - scaling, dithering and encoding the leds, totalled over the controllers
+#   output - writing the encoded leds out to the leds and sinks, totalled over the controllers
+#   show   - the whole of the show call
+METRIC_STAGES = ('frame', 'render', 'wait', 'power', 'encode', 'output', 'show')
+
+METRIC_FRAME = 0
+METRIC_RENDER = 1
+METRIC_WAIT = 2
+METRIC_POWER = 3
+METRIC_ENCODE = 4
+METRIC_OUTPUT = 5
+METRIC_SHOW = 6
+
+
+# Keeps the timings of the last history frames in a ring for every stage
+# of METRIC_STAGES.  A frame is timed by begin(), add() for each stage as it
+# is done and end().  That is a few ticks_us calls and list stores a frame,
+# cheap enough to be left on, the sorting for the percentiles is only done
+# when stats() is asked for.
+#
+# The encode and output times are totalled over the controllers, when the
+# controllers are shown side by side (see CFastLED.setParallel) they can add
+# up to more than the show took.
+#
+# @param history - number of frames to keep the timings of
+class CFrameMetrics(object):
+
+    def __init__(self, history=64):
+        if history < 1:
+            raise ValueError('history must be at least 1')
+
+        self.enabled = True
+        self.history = history
+        self.m_Rings = [[0] * history for _ in METRIC_STAGES]
+        self.m_Current = [0] * len(METRIC_STAGES)
+        self.m_nFrames = 0
+        self.m_Start = None  # ticks the frame being timed started at
+        self.m_LastStart = None
+        self.m_LastEnd = None
+
+    # start timing a frame
+    def begin(self):
+        if not self.enabled:
+            return
+
+        now = ticks_us()
+        current = self.m_Current
+        for i in range(len(current)):
+            current[i] = 0
+
+        if self.m_LastStart is not None:
+            current[METRIC_FRAME] = ticks_diff(now, self.m_LastStart)
+            current[METRIC_RENDER] = ticks_diff(now, self.m_LastEnd)
+
+        self.m_Start = now
+
+    # add time to a stage of the frame being timed
+    # @param stage - one of the METRIC_ stage numbers
+    # @param us - the time to add
+    def add(self, stage, us):
+        if self.m_Start is not None:
+            self.m_Current[stage] += us
+
+    # Time since start, added to a stage.  For timing a stage with
+    #   start = ticks_us(); ...; metrics.since(METRIC_POWER, start)
+    # @returns now, so the next stage can be timed from it
+    def since(self, stage, start):
+        now = ticks_us()
+        if self.m_Start is not None:
+            self.m_Current[stage] += ticks_diff(now, start)
+        return now
+
+    # finish the frame being timed, its timings go into the rings
+    def end(self):
+        start = self.m_Start
+        if start is None:
+            return
+
+        now = ticks_us()
+        current = self.m_Current
+        current[METRIC_SHOW] = ticks_diff(now, start)
+
+        # the first frame has no frame before it to have a frame or render time
+        index = self.m_nFrames % self.history
+        for ring, value in zip(self.m_Rings, current):
+            ring[index] = value
+
+        self.m_nFrames += 1
+        self.m_LastStart = start
+        self.m_LastEnd = now
+        self.m_Start = None
+
+    # number of frames that have been timed
+    def frames(self):
+        return self.m_nFrames
+
+    # frames per second over the frames that are kept, 0 until there have been two frames
+    def fps(self):
+        count = min(self.m_nFrames, self.history)
+        ring = self.m_Rings[METRIC_FRAME]
+        total = 0
+        timed = 0
+        for i in range(count):
+            if ring[i]:
+                total += ring[i]
+                timed += 1
+
+        if not total:
+            return 0
+
+        return timed * 1000000 / total
+
+    # The timings of one stage over the frames that are kept
+    # @param stage - a METRIC_ stage number or name
+    # @returns dict of min, mean, p95, p99 and max, in us
+    def stage(self, stage):
+        if not isinstance(stage, int):
+            stage = METRIC_STAGES.index(stage)
+
+        count = min(self.m_nFrames, self.history)
+        samples = self.m_Rings[stage][:count]
+
+        if stage in (METRIC_FRAME, METRIC_RENDER) and count and self.m_nFrames <= self.history:
+            # the first frame has nothing before it to be timed from
+            samples = samples[1:]
+            count -= 1
+
+        if not count:
+            return dict(min=0, mean=0, p95=0, p99=0, max=0)
+
+        samples.sort()
+        return dict(
+            min=samples[0],
+            mean=sum(samples) / count,
+            p95=samples[min(count - 1, (count * 95) // 100)],
+            p99=samples[min(count - 1, (count * 99) // 100)],
+            max=samples[-1]
+        )
+
+    # The timings of the frames that are kept
+    # @returns dict with frames, fps and the stage() dict of every stage keyed on its name
+    def stats(self):
+        stats = dict(frames=self.m_nFrames, fps=self.fps())
+        for i, name in enumerate(METRIC_STAGES):
+            stats[name] = self.stage(i)
+        return stats
+
+    def reset(self):
+        self.m_nFrames = 0
+        self.m_Start = None
+        self.m_LastStart = None
+        self.m_LastEnd = None
@@ -1,6 +1,8 @@
 
 from . import *
 from .lib8tion import *
+from .xymap import *
+from .profiling import profiled
 
 
 # Noise functions provided by the library.
@@ -471,6 +473,7 @@ class q44(object):
 # //     return (v *mulby44.i)  + ((v * mulby44.f) >> 4);
 # // }
 
+@profiled
 def fill_raw_noise8(pData, num_points, octaves, x, scale, time_):
     _xx = x
     scx = scale
@@ -484,6 +487,7 @@ def fill_raw_noise8(pData, num_points, octaves, x, scale, time_):
     scx <<= 1
 
 
+@profiled
 def fill_raw_noise16into8(pData, num_points, octaves, x, scale, time_):
     _xx = x
     scx = scale
@@ -503,6 +507,7 @@ def fill_raw_noise16into8(pData, num_points, octaves, x, scale, time_):
     scx <<= 1
 
 
+@profiled
 def fill_raw_2dnoise8(
     pData,
     width,
@@ -592,6 +597,7 @@ def fill_raw_2dnoise8(
         y += scaley
 
 
+@profiled
 def fill_raw_2dnoise16(pData, width, height, octaves, freq88, amplitude, skip, x, scalex, y, scaley, time_):
     if octaves > 1:
         fill_raw_2dnoise16(
@@ -649,6 +655,7 @@ nmin = 11111110
 nmax = 0
 
 
+@profiled
 def fill_raw_2dnoise16into8(
         pData,
         width,
@@ -727,6 +734,7 @@ def fill_raw_2dnoise16into8(
                         pRow[jj] = scale8(pRow[jj], invamp) + noise_base
 
 
+@profiled
 def fill_noise8(
     leds,
     num_leds,
@@ -744,10 +752,16 @@ def fill_noise8(
     fill_raw_noise8(V, num_leds, octaves, x, scale, time_)
     fill_raw_noise8(H, num_leds, hue_octaves, hue_x, hue_scale, time_)
 
+    if isinstance(leds, CRGBBuffer):
+        hsv = CHSVBuffer(num_leds, bytearray(H), bytearray([255]) * num_leds, bytearray(V))
+        hsv2rgb_rainbow(hsv, leds, num_leds)
+        return
+
     for i in range(num_leds):
         leds[i] = CHSV(H[i], 255, V[i])
 
 
+@profiled
 def fill_noise16(
     leds,
     num_leds,
@@ -766,10 +780,17 @@ def fill_noise16(
     fill_raw_noise16into8(V, num_leds, octaves, x, scale, time_)
     fill_raw_noise8(H, num_leds, hue_octaves, hue_x, hue_scale, time_)
 
+    if isinstance(leds, CRGBBuffer):
+        H = bytearray((h + hue_shift_) & 0xFF for h in H)
+        hsv = CHSVBuffer(num_leds, H, bytearray([255]) * num_leds, bytearray(V))
+        hsv2rgb_rainbow(hsv, leds, num_leds)
+        return
+
     for i in range(num_leds):
         leds[i] = CHSV(H[i] + hue_shift_, 255, V[i])
 
 
+@profiled
 def fill_2dnoise8(
     leds,
     width,
@@ -797,22 +818,25 @@ def fill_2dnoise8(
 
     w1 = width - 1
     h1 = height - 1
+
+    # leds can also be a CRGBMatrix, its layout table is used in place of
+    # the serpentine flag
+    leds, table = resolve_xymap(leds, width, height, None, serpentine)
+
     for i in range(height):
         wb = i * width
         for j in range(width):
             led = CRGB(CHSV(H[h1-i][w1-j], 255, V[i][j]))
-
-            pos = j
-            if serpentine and (i & 0x1):
-                pos = w1 - j
+            pos = table[wb + j]
 
             if blend_:
-                leds[wb + pos] >>= 1
-                leds[wb + pos] += led >> 1
+                leds[pos] >>= 1
+                leds[pos] += led >> 1
             else:
-                leds[wb + pos] = led
+                leds[pos] = led
 
 
+@profiled
 def fill_2dnoise16(
     leds,
     width,
@@ -845,17 +869,18 @@ def fill_2dnoise16(
     h1 = height - 1
     hue_shift >>= 8
 
+    # leds can also be a CRGBMatrix, its layout table is used in place of
+    # the serpentine flag
+    leds, table = resolve_xymap(leds, width, height, None, serpentine)
+
     for i in range(height):
         wb = i * width
         for j in range(width):
             led = CRGB(CHSV(hue_shift + (H[h1 - i][w1 - j]), 196, V[i][j]))
-
-            pos = j
-            if serpentine and (i & 0x1):
-                pos = w1 - j
+            pos = table[wb + j]
 
             if blend_:
-                leds[wb + pos] >>= 1
-                leds[wb + pos] += led >> 1
+                leds[pos] >>= 1
+                leds[pos] += led >> 1
             else:
-                leds[wb + pos] = led
+                leds[pos] = led
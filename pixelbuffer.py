@@ -0,0 +1,676 @@
+# @file pixelbuffer.py
+# contiguous, bytearray backed storage for led data
+
+from .pixeltypes import *
+from .lib8tion import bulk8
+
+
+# Counts the writes made to a led bytearray.  One of these is shared by a
+# CRGBBuffer and every slice and CRGBRef made from it, every write path of
+# those bumps the counters.
+#
+# generation goes up on any write.  Code that wants to know whether some of
+# the leds changed (a controller skipping a show, the power calculation
+# reusing last frame's number) registers a segment, a [start, end, generation]
+# list covering those bytes, and only writes that overlap the segment bump
+# its generation.  If the generation is the same as it was the last time the
+# work was done, the work can be skipped.
+class CDirtyTracker(object):
+    __slots__ = ('generation', 'segments')
+
+    def __init__(self):
+        self.generation = 0
+        self.segments = []
+
+    # bytes [start, end) have been written to
+    def mark(self, start, end):
+        self.generation += 1
+        for seg in self.segments:
+            if seg[0] < end and start < seg[1]:
+                seg[2] += 1
+
+    # the [start, end, generation] segment for bytes [start, end), made the
+    # first time it is asked for
+    def segment(self, start, end):
+        for seg in self.segments:
+            if seg[0] == start and seg[1] == end:
+                return seg
+
+        seg = [start, end, 0]
+        self.segments.append(seg)
+        return seg
+
+
+# A CRGB that does not own its color.  The channels are read from and
+# written to a slot inside of a CRGBBuffer so every CRGB method (+=, nscale8,
+# setHSV, ...) writes straight through to the buffer.  These are handed out
+# by CRGBBuffer.__getitem__ and are cheap to make, they only hold the buffer
+# and the byte position of the pixel.
+class CRGBRef(CRGB):
+    __slots__ = ('_buf', '_pos', '_bpp', '_dirty')
+
+    def __init__(self, buf, pos, bpp=3, dirty=None):
+        self._buf = buf
+        self._pos = pos
+        self._bpp = bpp
+        self._dirty = dirty
+
+    def _set(self, pos, value):
+        self._buf[pos] = int(value) & 0xFF
+        if self._dirty is not None:
+            self._dirty.mark(pos, pos + 1)
+
+    @property
+    def r(self):
+        return self._buf[self._pos]
+
+    @r.setter
+    def r(self, value):
+        self._set(self._pos, value)
+
+    @property
+    def g(self):
+        return self._buf[self._pos + 1]
+
+    @g.setter
+    def g(self, value):
+        self._set(self._pos + 1, value)
+
+    @property
+    def b(self):
+        return self._buf[self._pos + 2]
+
+    @b.setter
+    def b(self, value):
+        self._set(self._pos + 2, value)
+
+    # a 3 byte per pixel buffer has no white slot, so white reads as None
+    # (the same as an RGB CRGB) and writes of None are dropped.
+    @property
+    def w(self):
+        if self._bpp == 4:
+            return self._buf[self._pos + 3]
+
+        return None
+
+    @w.setter
+    def w(self, value):
+        if self._bpp == 4:
+            self._set(self._pos + 3, value or 0)
+        elif value:
+            raise ValueError('3 byte per pixel buffer has no white channel')
+
+
+# Array of leds stored as one contiguous bytearray, 3 (RGB) or 4 (RGBW) bytes
+# per pixel, in r, g, b(, w) order.  Indexing hands out CRGBRef objects so it
+# can be used anywhere a list of CRGB objects is used.  Slicing returns another
+# CRGBBuffer that shares the same bytearray (no copy is made), this is what
+# lets CFastLED.addLeds carve a controller's leds out of a larger buffer.
+#
+# The bulk helpers (fill, nscale8, channel_sums, ...) work directly on the
+# bytes and are what the colorutils/power functions use when they are handed
+# a CRGBBuffer.
+#
+# Every write is counted by a CDirtyTracker (dirty) shared with the slices of
+# the buffer.  Code that writes to buf or raw() directly has to call
+# mark_dirty() afterwards, otherwise show() can skip the change.
+#
+# @param nLeds - number of leds
+# @param bpp - bytes per pixel, 3 for RGB or 4 for RGBW
+# @param buf - an existing bytearray to wrap (the buffer is allocated if not given)
+# @param start - pixel offset of this buffer inside of buf
+# @param dirty - the CDirtyTracker of buf, a new one is made if not given
+class CRGBBuffer(object):
+
+    def __init__(self, nLeds, bpp=3, buf=None, start=0, dirty=None):
+        if bpp not in (3, 4):
+            raise ValueError('bpp must be 3 or 4')
+
+        if buf is None:
+            buf = bytearray(nLeds * bpp)
+
+        if dirty is None:
+            dirty = CDirtyTracker()
+
+        self.buf = buf
+        self.dirty = dirty
+        self.bpp = bpp
+        self.nLeds = nLeds
+        self.start = start * bpp
+        self.end = self.start + nLeds * bpp
+
+    # number of leds in this buffer
+    def size(self):
+        return self.nLeds
+
+    def __len__(self):
+        return self.nLeds
+
+    # memoryview over the bytes of this buffer, no copy is made
+    def raw(self):
+        return memoryview(self.buf)[self.start:self.end]
+
+    def _slice(self, x):
+        start, stop, step = x.indices(self.nLeds)
+        if step != 1:
+            raise ValueError('CRGBBuffer slices must be contiguous, use a CPixelView to step')
+
+        if stop < start:
+            stop = start
+
+        return CRGBBuffer(stop - start, self.bpp, self.buf, self.start // self.bpp + start, self.dirty)
+
+    def _pos(self, x):
+        if x < 0:
+            x += self.nLeds
+        if not 0 <= x < self.nLeds:
+            raise IndexError('CRGBBuffer index out of range')
+
+        return self.start + x * self.bpp
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return self._slice(x)
+
+        return CRGBRef(self.buf, self._pos(x), self.bpp, self.dirty)
+
+    def __setitem__(self, x, color):
+        if isinstance(x, slice):
+            start, stop, step = x.indices(self.nLeds)
+            if isinstance(color, CRGBBuffer):
+                # the bytearray is shared with the other views of it, it can not change size
+                count = len(range(start, stop, step))
+                if len(color) != count:
+                    raise ValueError(
+                        'attempt to assign %d leds to a slice of %d leds' % (len(color), count)
+                    )
+
+            if isinstance(color, CRGBBuffer) and step == 1 and color.bpp == self.bpp:
+                pos = self.start + start * self.bpp
+                end = pos + count * self.bpp
+                self.buf[pos:end] = color.raw()
+                self.dirty.mark(pos, end)
+            else:
+                for i, c in zip(range(start, stop, step), color):
+                    self[i] = c
+            return
+
+        pos = self._pos(x)
+        self.buf[pos:pos + self.bpp] = self.color_bytes(color)
+        self.dirty.mark(pos, pos + self.bpp)
+
+    def __iter__(self):
+        buf = self.buf
+        bpp = self.bpp
+        dirty = self.dirty
+        for pos in range(self.start, self.end, bpp):
+            yield CRGBRef(buf, pos, bpp, dirty)
+
+    # convert a CRGB, CHSV, color code or an (r, g, b[, w]) sequence into
+    # the bytes for a single pixel of this buffer
+    def color_bytes(self, color):
+        if isinstance(color, CHSV):
+            color = CRGB(color)
+
+        if isinstance(color, CRGB):
+            color = color.raw
+        elif isinstance(color, int):
+            color = [(color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF, (color >> 24) & 0xFF]
+
+        data = bytearray(self.bpp)
+        for i in range(min(self.bpp, len(color))):
+            if color[i] is not None:
+                data[i] = int(color[i]) & 0xFF
+
+        return data
+
+    # set leds [start, start + count) to a single color with one slice assignment
+    def fill(self, color, start=0, count=None):
+        if count is None:
+            count = self.nLeds - start
+
+        pos = self.start + start * self.bpp
+        self.buf[pos:pos + count * self.bpp] = bytes(self.color_bytes(color)) * count
+        self.dirty.mark(pos, pos + count * self.bpp)
+        return self
+
+    # zero out all of the leds
+    def clear(self):
+        self.buf[self.start:self.end] = bytes(self.end - self.start)
+        self.dirty.mark(self.start, self.end)
+        return self
+
+    # run every byte of the buffer through a 256 entry lookup table
+    def translate(self, table, count=None):
+        end = self.end if count is None else self.start + count * self.bpp
+        translate8(self.buf, self.start, end, table)
+        self.dirty.mark(self.start, end)
+        return self
+
+    # scale every channel of every led by scale / 256
+    def nscale8(self, scale, count=None):
+        end = self.end if count is None else self.start + count * self.bpp
+        scale8_bulk(self.buf, self.start, end, scale)
+        self.dirty.mark(self.start, end)
+        return self
+
+    # scale every channel of every led, a nonzero channel never scales to zero
+    # unless scale is zero
+    def nscale8_video(self, scale, count=None):
+        end = self.end if count is None else self.start + count * self.bpp
+        scale8_video_bulk(self.buf, self.start, end, scale)
+        self.dirty.mark(self.start, end)
+        return self
+
+    def fadeToBlackBy(self, fadefactor, count=None):
+        return self.nscale8(255 - fadefactor, count)
+
+    def fadeLightBy(self, fadefactor, count=None):
+        return self.nscale8_video(255 - fadefactor, count)
+
+    # mark leds [first, first + count) as written to, for code that changes
+    # buf or raw() directly
+    def mark_dirty(self, first=0, count=None):
+        if count is None:
+            count = self.nLeds - first
+
+        pos = self.start + first * self.bpp
+        self.dirty.mark(pos, pos + count * self.bpp)
+        return self
+
+    # the [start, end, generation] segment of the dirty tracker covering the
+    # leds of this buffer, generation goes up whenever one of them is written
+    def segment(self):
+        return self.dirty.segment(self.start, self.end)
+
+    # sum of each channel over the first count leds
+    # @returns a list of bpp totals, [r, g, b(, w)]
+    def channel_sums(self, count=None):
+        end = self.end if count is None else self.start + count * self.bpp
+        data = self.buf[self.start:end]
+        return [sum(data[i::self.bpp]) for i in range(self.bpp)]
+
+    def __repr__(self):
+        return 'CRGBBuffer(%d, bpp=%d)' % (self.nLeds, self.bpp)
+
+
+# Led data with 16 bits for every channel, 6 bytes a led, r g b, low byte
+# first.  Chipsets with more than 8 bits a channel (HD108, LPD1886) are sent
+# from one of these so brightness, color correction and gamma do not lose the
+# low bits that 8 bit scaling does.
+#
+# Effects can keep drawing into an 8 bit CRGBBuffer, from8 converts a whole
+# strip with expand16_table lookups, two bytes.translate calls for every
+# channel.
+#
+# @param nLeds - number of leds
+# @param buf - bytearray to use, one is made if not given
+class CRGB16Buffer(object):
+
+    def __init__(self, nLeds, buf=None):
+        if buf is None:
+            buf = bytearray(nLeds * 6)
+
+        self.buf = buf
+        self.nLeds = nLeds
+        self.dirty = CDirtyTracker()
+
+    def size(self):
+        return self.nLeds
+
+    def __len__(self):
+        return self.nLeds
+
+    # memoryview over the bytes of the buffer, no copy is made
+    def raw(self):
+        return memoryview(self.buf)[:self.nLeds * 6]
+
+    def _pos(self, x):
+        if x < 0:
+            x += self.nLeds
+        if not 0 <= x < self.nLeds:
+            raise IndexError('CRGB16Buffer index out of range')
+
+        return x * 6
+
+    def __getitem__(self, x):
+        buf = self.buf
+        pos = self._pos(x)
+        return CRGB16(
+            buf[pos] | (buf[pos + 1] << 8),
+            buf[pos + 2] | (buf[pos + 3] << 8),
+            buf[pos + 4] | (buf[pos + 5] << 8)
+        )
+
+    # @param color - a CRGB16, or a CRGB which is expanded to 16 bits
+    def __setitem__(self, x, color):
+        pos = self._pos(x)
+        self.buf[pos:pos + 6] = self.color_bytes(color)
+        self.dirty.mark(pos, pos + 6)
+
+    def __iter__(self):
+        for i in range(self.nLeds):
+            yield self[i]
+
+    # the 6 bytes of a CRGB16, CRGB, color code or (r, g, b) 16 bit sequence
+    def color_bytes(self, color):
+        if isinstance(color, int):
+            color = CRGB(color)
+        if not isinstance(color, CRGB16):
+            color = CRGB16(color) if isinstance(color, CRGB) else CRGB16(*color)
+
+        return bytes((
+            color.r & 0xFF, (color.r >> 8) & 0xFF,
+            color.g & 0xFF, (color.g >> 8) & 0xFF,
+            color.b & 0xFF, (color.b >> 8) & 0xFF
+        ))
+
+    def fill(self, color, start=0, count=None):
+        if count is None:
+            count = self.nLeds - start
+
+        self.buf[start * 6:(start + count) * 6] = self.color_bytes(color) * count
+        self.dirty.mark(start * 6, (start + count) * 6)
+        return self
+
+    def clear(self):
+        self.buf[:self.nLeds * 6] = bytes(self.nLeds * 6)
+        self.dirty.mark(0, self.nLeds * 6)
+        return self
+
+    def mark_dirty(self, first=0, count=None):
+        if count is None:
+            count = self.nLeds - first
+
+        self.dirty.mark(first * 6, (first + count) * 6)
+        return self
+
+    def segment(self):
+        return self.dirty.segment(0, self.nLeds * 6)
+
+    # Convert 8 bit leds into this buffer.
+    # @param src - CRGBBuffer to convert
+    # @param tables - (low, high) expand16_table for each of r, g and b, the plain expansion if not given
+    # @param count - number of leds, all of src if not given
+    # @param order - the source channel for each of the 3 channels of this buffer, so the 16 bit leds can be
+    #                written in wire order (see rgb_order_channels)
+    # @returns self
+    def from8(self, src, tables=None, count=None, order=(0, 1, 2)):
+        if count is None:
+            count = min(len(src), self.nLeds)
+        if tables is None:
+            tables = (expand16_table(),) * 3
+
+        bpp = src.bpp
+        raw = bytes(src.buf[src.start:src.start + count * bpp])
+        buf = self.buf
+        end = count * 6
+
+        try:
+            for slot, channel in enumerate(order):
+                low, high = tables[channel]
+                plane = raw[channel::bpp]
+                buf[slot * 2:end:6] = plane.translate(low)
+                buf[slot * 2 + 1:end:6] = plane.translate(high)
+
+        except (NotImplementedError, AttributeError):
+            # MicroPython has no stepped slices or bytes.translate
+            pos = 0
+            for i in range(0, count * bpp, bpp):
+                for channel in order:
+                    low, high = tables[channel]
+                    value = raw[i + channel]
+                    buf[pos] = low[value]
+                    buf[pos + 1] = high[value]
+                    pos += 2
+
+        self.dirty.mark(0, end)
+        return self
+
+    # Copy 16 bit leds into this buffer with each channel scaled by scale / 255.
+    # @param src - CRGB16Buffer to copy
+    # @param scale - CRGB scale (see CLEDController.getAdjustment)
+    # @param count - number of leds, all of src if not given
+    # @param order - the source channel for each of the 3 channels of this buffer
+    # @returns self
+    def scaled_from(self, src, scale, count=None, order=(0, 1, 2)):
+        if count is None:
+            count = min(len(src), self.nLeds)
+
+        scales = (scale.r, scale.g, scale.b)
+        numpy = bulk8.numpy
+
+        if numpy is not None:
+            values = numpy.frombuffer(src.buf, numpy.uint16, count * 3).reshape(count, 3).astype(numpy.uint32)
+            out = numpy.frombuffer(self.buf, numpy.uint16, count * 3).reshape(count, 3)
+            for slot, channel in enumerate(order):
+                out[:, slot] = (values[:, channel] * scales[channel] + 127) // 255
+        else:
+            data = bytes(src.buf[:count * 6])
+            buf = self.buf
+            pos = 0
+            for i in range(0, count * 6, 6):
+                for channel in order:
+                    p = i + channel * 2
+                    value = ((data[p] | (data[p + 1] << 8)) * scales[channel] + 127) // 255
+                    buf[pos] = value & 0xFF
+                    buf[pos + 1] = value >> 8
+                    pos += 2
+
+        self.dirty.mark(0, count * 6)
+        return self
+
+    def __repr__(self):
+        return 'CRGB16Buffer(%d)' % self.nLeds
+
+
+# A CHSV that does not own its color, the hue, sat and val are read from and
+# written to one slot of the planes of a CHSVBuffer.
+class CHSVRef(CHSV):
+    __slots__ = ('_planes', '_pos')
+
+    def __init__(self, planes, pos):
+        self._planes = planes
+        self._pos = pos
+
+    @property
+    def hue(self):
+        return self._planes[0][self._pos]
+
+    @hue.setter
+    def hue(self, value):
+        self._planes[0][self._pos] = int(value) & 0xFF
+
+    @property
+    def sat(self):
+        return self._planes[1][self._pos]
+
+    @sat.setter
+    def sat(self, value):
+        self._planes[1][self._pos] = int(value) & 0xFF
+
+    @property
+    def val(self):
+        return self._planes[2][self._pos]
+
+    @val.setter
+    def val(self, value):
+        self._planes[2][self._pos] = int(value) & 0xFF
+
+
+# Array of HSV colors stored as three bytearrays, one each for the hue, the
+# saturation and the value of every led.  Keeping the channels in separate
+# planes is what lets hsv2rgb_rainbow convert the whole buffer at once, the
+# hues can go through a lookup table in one call.  Indexing hands out CHSVRef
+# objects and slicing shares the planes the same as CRGBBuffer.
+#
+# @param nLeds - number of leds
+# @param h - existing bytearray of hues to wrap (allocated if not given)
+# @param s - existing bytearray of saturations to wrap (allocated if not given)
+# @param v - existing bytearray of values to wrap (allocated if not given)
+# @param start - pixel offset of this buffer inside of the planes
+class CHSVBuffer(object):
+
+    def __init__(self, nLeds, h=None, s=None, v=None, start=0):
+        self.h = bytearray(nLeds) if h is None else h
+        self.s = bytearray(nLeds) if s is None else s
+        self.v = bytearray(nLeds) if v is None else v
+        self.nLeds = nLeds
+        self.start = start
+        self.end = start + nLeds
+
+    def size(self):
+        return self.nLeds
+
+    def __len__(self):
+        return self.nLeds
+
+    def _pos(self, x):
+        if x < 0:
+            x += self.nLeds
+        if not 0 <= x < self.nLeds:
+            raise IndexError('CHSVBuffer index out of range')
+
+        return self.start + x
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            start, stop, step = x.indices(self.nLeds)
+            if step != 1:
+                raise ValueError('CHSVBuffer slices must be contiguous')
+
+            if stop < start:
+                stop = start
+
+            return CHSVBuffer(stop - start, self.h, self.s, self.v, self.start + start)
+
+        return CHSVRef((self.h, self.s, self.v), self._pos(x))
+
+    def __setitem__(self, x, color):
+        if isinstance(x, slice):
+            start, stop, step = x.indices(self.nLeds)
+            for i, c in zip(range(start, stop, step), color):
+                self[i] = c
+            return
+
+        pos = self._pos(x)
+        hue, sat, val = color
+        self.h[pos] = int(hue) & 0xFF
+        self.s[pos] = int(sat) & 0xFF
+        self.v[pos] = int(val) & 0xFF
+
+    def __iter__(self):
+        planes = (self.h, self.s, self.v)
+        for pos in range(self.start, self.end):
+            yield CHSVRef(planes, pos)
+
+    # set leds [start, start + count) to a single color
+    def fill(self, color, start=0, count=None):
+        if count is None:
+            count = self.nLeds - start
+
+        hue, sat, val = color
+        pos = self.start + start
+        self.h[pos:pos + count] = bytes([int(hue) & 0xFF]) * count
+        self.s[pos:pos + count] = bytes([int(sat) & 0xFF]) * count
+        self.v[pos:pos + count] = bytes([int(val) & 0xFF]) * count
+        return self
+
+    def clear(self):
+        return self.fill((0, 0, 0))
+
+    def __repr__(self):
+        return 'CHSVBuffer(%d)' % self.nLeds
+
+
+# Two or three CRGBBuffers that take turns being drawn into and being shown.
+#
+# Effects draw into back while the controllers output front, swap() makes the
+# back buffer the front one.  The order of the buffers is a single tuple that
+# is replaced in one assignment, so anything reading front or back sees either
+# the old frame or the new one, never half of each.  With three buffers the
+# frame that was just shown is not drawn into again until the swap after the
+# next one, which lets an output that is still sending it (DMA, RMT, a
+# background show) finish while the next frame is being drawn.
+#
+# Hand a CFrameBuffer to CFastLED.addLeds in place of the led data, the offset
+# and number of leds work the same as they do for a CRGBBuffer.  CFastLED.show()
+# swaps every frame buffer that was added before writing out the leds.
+#
+# All of the buffers share one CDirtyTracker, so skipping unchanged frames
+# still works when the front buffer changes under a controller.
+#
+# @param nLeds - number of leds in each buffer
+# @param bpp - bytes per pixel, 3 for RGB or 4 for RGBW
+# @param count - number of buffers, 2 (double) or 3 (triple)
+# @param preserve - copy the frame that was just shown into the new back buffer,
+#                   so effects that build on the last frame (fadeToBlackBy trails
+#                   and the like) work the same as they do with a single buffer.
+#                   When False the back buffer holds whatever frame was last
+#                   drawn into it and has to be redrawn in full.
+class CFrameBuffer(object):
+
+    def __init__(self, nLeds, bpp=3, count=2, preserve=True):
+        if count not in (2, 3):
+            raise ValueError('count must be 2 or 3')
+
+        self.dirty = CDirtyTracker()
+        self.buffers = tuple(CRGBBuffer(nLeds, bpp, dirty=self.dirty) for _ in range(count))
+        self.nLeds = nLeds
+        self.bpp = bpp
+        self.preserve = preserve
+        self.m_Order = tuple(range(count))  # buffer indexes, front first then back
+        self.m_Bindings = []
+
+    def size(self):
+        return self.nLeds
+
+    def __len__(self):
+        return self.nLeds
+
+    # the buffer being shown
+    @property
+    def front(self):
+        return self.buffers[self.m_Order[0]]
+
+    # the buffer to draw the next frame into
+    @property
+    def back(self):
+        return self.buffers[self.m_Order[1]]
+
+    # Hand leds [nOffset, nOffset + nLeds) of the front buffer to a controller
+    # and keep it pointed at the front buffer on every swap.  The slice of each
+    # buffer is made here so a swap does not have to make any.
+    def bind(self, pLed, nOffset, nLeds):
+        views = tuple(buf[nOffset:nOffset + nLeds] for buf in self.buffers)
+        self.m_Bindings.append((pLed, views))
+        pLed.setLeds(views[self.m_Order[0]], nLeds)
+        return pLed
+
+    # make the back buffer the front one
+    # @returns the new back buffer
+    def swap(self):
+        order = self.m_Order[1:] + self.m_Order[:1]
+        self.m_Order = order
+
+        front = order[0]
+        for pLed, views in self.m_Bindings:
+            pLed.m_Data = views[front]
+
+        back = self.buffers[order[1]]
+        if self.preserve:
+            back.buf[:] = self.buffers[front].buf
+        else:
+            # the front buffer holds a different frame than the one last shown
+            self.dirty.mark(0, len(back.buf))
+
+        return back
+
+    # zero out every buffer
+    def clear(self):
+        for buf in self.buffers:
+            buf.clear()
+        return self
+
+    def __repr__(self):
+        return 'CFrameBuffer(%d, count=%d)' % (self.nLeds, len(self.buffers))
@@ -1,4 +1,3 @@
-
 from . import *
 from .colorutils import *
 
@@ -6,46 +5,67 @@ from .colorutils import *
 #  Represents a set of CRGB led objects.  Provides the [] array operator, and works like a normal array in that case.
 #  This should be kept in sync with the set of functions provided by CRGB as well as functions in colorutils.  Note
 #  that a pixel set is a window into another set of led data, it is not its own set of led data.
+#
+#  The window is kept as the underlying storage (leds, a list of CRGB or a CRGBBuffer), the index of the first
+#  pixel in that storage (offset), the signed length (len, negative when the set runs backwards) and the step
+#  between pixels (dir, 1 or -1).  Nothing is copied when a view is made, reads and writes go straight through to
+#  the underlying storage, and a view of a view is just another window over the same storage.
 class CPixelView(object):
 
     def __init__(self, leds=None, len_=None, _start=None, _end=None, other=None):
-        if isinstance(other, CPixelView):
-            self.dir = other.dir
-            self.len = other.len
-            self.leds = other.leds
-            self.end_pos = other.end_pos
-        elif isinstance(leds, CPixelView):
-            self.dir = leds.dir
-            self.len = leds.len
-            self.leds = leds.leds
-            self.end_pos = leds.end_pos
-
-        elif len_ is not None and _start is not None:
+        if other is not None:
+            leds = other
+
+        if len_ is not None and _start is not None and _end is None:
             _end = _start
             _start = len_
             len_ = None
 
+        if isinstance(leds, CPixelView):
+            parent = leds
+            self.leds = parent.leds
+
+            if _start is None and len_ is None:
+                self.offset = parent.offset
+                self.dir = parent.dir
+                self.len = parent.len
+                self.end_pos = parent.end_pos
+                return
+        else:
+            parent = None
+            self.leds = leds
+
         if _start is not None and _end is not None:
             if _end - _start < 0:
-                self.dir = -1
+                step = -1
             else:
-                self.dir = 1
+                step = 1
 
-            self.len = (_end - _start) + self.dir
-            self.leds = leds[_start:]
-            self.end_pos = _start + self.len
+            length = (_end - _start) + step
+        else:
+            _start = 0
+            length = len_
+            step = -1 if len_ < 0 else 1
 
+        if parent is None:
+            self.offset = _start
+            self.dir = step
         else:
-            self.dir = -1 if len_ < 0 else 1
-            self.len = len_
-            self.leds = leds
-            self.end_pos = len_
+            # positions are relative to the parent, fold them into the parent's window
+            self.offset = parent.offset + _start * parent.dir
+            self.dir = step * parent.dir
+
+        self.len = abs(length) * self.dir
+        self.end_pos = self.offset + self.len
 
     # Get the size of this set
     # @return the size of the set
     def size(self):
         return abs(self.len)
 
+    def __len__(self):
+        return abs(self.len)
+
     # Whether or not this set goes backwards
     # @return whether or not the set is backwards
     def reversed(self):
@@ -54,7 +74,8 @@ class CPixelView(object):
     # do these sets point to the same thing (note, this is different from the contents of the set being the same)
     def __eq__(self, rhs):
         return (
-            self.leds == rhs.leds and
+            self.leds is rhs.leds and
+            self.offset == rhs.offset and
             self.len == rhs.len and
             self.dir == rhs.dir
         )
@@ -63,127 +84,229 @@ class CPixelView(object):
     def __ne__(self, rhs):
         return not self.__eq__(rhs)
 
-    # access a single element in this set, just like an array operator
+    # index into the underlying storage for the x'th pixel of this set
+    def _index(self, x):
+        size = abs(self.len)
+        if x < 0:
+            x += size
+        if not 0 <= x < size:
+            raise IndexError('CPixelView index out of range')
+
+        return self.offset + x * self.dir
+
+    # access a single element in this set, just like an array operator.  A slice is a view of the set, a step of -1
+    # runs it backwards, a view can not skip pixels so any other step is a ValueError.
     def __getitem__(self, x):
         if isinstance(x, slice):
-            start = x.start
-            stop = x.stop
+            start, stop, step = x.indices(abs(self.len))
+            if step == -1:
+                if start <= stop:
+                    return CPixelView(self, 0)
+
+                return CPixelView(self, start, stop + 1)
 
-            if start is None:
-                start = 0
-            if stop is None:
-                stop = len(self.leds)
+            if step != 1:
+                raise ValueError('CPixelView slices can only step by 1 or -1')
 
-            return CPixelView(self.leds, start, stop)
+            if stop <= start:
+                return CPixelView(self, 0)
 
-        if self.dir & 0x80:
-            return self.leds[-x]
+            return CPixelView(self, start, stop - 1)
 
-        return self.leds[x]
+        return self.leds[self._index(x)]
+
+    def __setitem__(self, x, color):
+        if isinstance(x, slice):
+            for pixel, c in zip(self[x], color):
+                pixel.setRGB(*CRGB(c).raw)
+            return
+
+        if isinstance(color, CHSV):
+            color = CRGB(color)
+
+        self.leds[self._index(x)] = color
+
+    def __iter__(self):
+        leds = self.leds
+        pos = self.offset
+        step = self.dir
+        for _ in range(abs(self.len)):
+            yield leds[pos]
+            pos += step
+
+    # access a subset of this set, start and end are both inclusive (same as the C++ operator())
+    def __call__(self, start, end):
+        return CPixelView(self, start, end)
 
     def __neg__(self):
-        return CPixelView(self.leds, self.len - self.dir, 0)
+        size = abs(self.len)
+        if not size:
+            return CPixelView(self, 0)
+
+        return CPixelView(self, size - 1, 0)
+
+    # the storage for this set when it can be handed to the colorutils functions directly.  A forward window into
+    # a CRGBBuffer is sliced (which shares the bytes) so the bulk buffer paths are used, anything else gets the view
+    # itself, which indexes in the right direction without copying.
+    def _window(self):
+        if self.dir == 1 and isinstance(self.leds, CRGBBuffer):
+            return self.leds[self.offset:self.offset + abs(self.len)]
+
+        return self
+
+    # (buf, start, end) of the bytes under this set when it is a window into a CRGBBuffer.  A backwards set covers
+    # the same bytes as the forwards one, only the order of the pixels is different.
+    def _region(self):
+        leds = self.leds
+        if not self.len or not isinstance(leds, CRGBBuffer):
+            return None
+
+        if self.dir == 1:
+            first = self.offset
+        else:
+            first = self.offset + self.len + 1
+
+        start = leds.start + first * leds.bpp
+        return leds.buf, start, start + abs(self.len) * leds.bpp
+
+    # Run one of the lib8tion bulk kernels (qadd8_bulk, scale8_bulk, ...) over every channel of every pixel in this
+    # set.  rhs can be a number, a CRGB or another set of the same size.  Returns False without touching anything
+    # when this set or rhs can't be done in bulk and the per pixel loop has to be used instead.
+    def _bulk(self, kernel, rhs):
+        region = self._region()
+        if region is None:
+            return False
+
+        buf, start, end = region
+        bpp = self.leds.bpp
+
+        if isinstance(rhs, CPixelView):
+            other = rhs._region()
+            if (
+                other is None or
+                rhs.dir != self.dir or
+                rhs.size() != self.size() or
+                rhs.leds.bpp != bpp
+            ):
+                return False
+
+            other_buf, other_start, other_end = other
+            # pixels of an overlapping set get changed part way through the per pixel loop
+            if other_buf is buf and other_start != start and other_start < end and start < other_end:
+                return False
+
+            rhs = memoryview(other_buf)[other_start:other_end]
+
+        elif isinstance(rhs, CRGB):
+            if len(rhs) != bpp:
+                return False
+
+            rhs = bytes(rhs)
+
+        elif not isinstance(rhs, int) or not 0 <= rhs <= 255:
+            return False
+
+        kernel(buf, start, end, rhs)
+        self.leds.dirty.mark(start, end)
+        return True
 
     def dump(self):
         pass
 
     # Add the passed in value to r,g, b for all the pixels in this set
     def addToRGB(self, inc):
-        for pixel in self.leds:
-            pixel += inc
+        if self._bulk(qadd8_bulk, inc):
+            return self
+
+        for pixel in self:
+            pixel.addToRGB(inc)
 
         return self
 
     # Add every pixel in the other set to this set
     def __iadd__(self, rhs):
-        if isinstance(rhs, CPixelView):
-            if rhs.len > self.len:
-                for i in range(rhs.len):
-                    try:
-                        pixel = self[i]
-                    except IndexError:
-                        break
-
-                    pixel += rhs[i]
-            else:
-                for i in range(self.len):
-                    try:
-                        pixel = rhs[i]
-                    except IndexError:
-                        break
+        if self._bulk(qadd8_bulk, rhs):
+            return self
 
-                    self[i] += pixel
-        else:
-            for pixel in self.leds:
+        if isinstance(rhs, CPixelView):
+            for pixel, other in zip(self, rhs):
+                pixel += other
+        elif isinstance(rhs, CRGB):
+            for pixel in self:
                 pixel += rhs
+        else:
+            self.addToRGB(rhs)
 
         return self
 
     # Subtract the passed in value from r,g,b for all pixels in this set
     def subFromRGB(self, inc):
-        for pixel in self.leds:
-            pixel -= inc
+        if self._bulk(qsub8_bulk, inc):
+            return self
+
+        for pixel in self:
+            pixel.subtractFromRGB(inc)
 
         return self
 
     # Subtract every pixel in the other set from this set
     def __isub__(self, rhs):
-        if isinstance(rhs, CPixelView):
-            if rhs.len > self.len:
-                for i in range(rhs.len):
-                    try:
-                        pixel = self[i]
-                    except IndexError:
-                        break
-
-                    pixel -= rhs[i]
+        if self._bulk(qsub8_bulk, rhs):
+            return self
 
-            else:
-                for i in range(self.len):
-                    try:
-                        pixel = rhs[i]
-                    except IndexError:
-                        break
-
-                    self[i] -= pixel
+        if isinstance(rhs, CPixelView):
+            for pixel, other in zip(self, rhs):
+                pixel -= other
         else:
-            for pixel in self.leds:
+            for pixel in self:
                 pixel -= rhs
 
         return self
 
-    # Divide every led by the given value
-    def __idiv__(self, d):
-        for pixel in self.leds:
-            pixel //= d
+    # Divide every led by the given value, leds /= d and leds //= d both divide down to whole numbers
+    def __ifloordiv__(self, d):
+        if self._bulk(div8_bulk, d):
+            return self
+
+        for pixel in self:
+            pixel.setRGB(*(pixel // d).raw)
 
         return self
 
+    __itruediv__ = __ifloordiv__
+    __idiv__ = __ifloordiv__
+
     def __imul__(self, d):
-        for pixel in self.leds:
+        if self._bulk(qmul8_bulk, d):
+            return self
+
+        for pixel in self:
             pixel *= d
 
         return self
 
     def __irshift__(self, d):
-        for pixel in self.leds:
+        if self._bulk(rshift8_bulk, d):
+            return self
+
+        for pixel in self:
             pixel >>= d
 
         return self
 
     # Scale every led by the given scale
     def nscale8_video(self, scaledown):
-        for pixel in self.leds:
+        if self._bulk(scale8_video_bulk, scaledown):
+            return self
+
+        for pixel in self:
             pixel.nscale8_video(scaledown)
 
         return self
 
     # Scale down every led by the given scale
     def __imod__(self, scaledown):
-        for pixel in self.leds:
-            pixel.nscale8_video(scaledown)
-
-        return self
+        return self.nscale8_video(scaledown)
 
     # Fade every led down by the given scale
     def fadeLightBy(self, fadefactor):
@@ -191,26 +314,14 @@ class CPixelView(object):
 
     # Scale every led by the given scale
     def nscale8(self, scaledown):
-        if isinstance(scaledown, CPixelView):
-            if scaledown.len() > self.len():
-                for i in range(scaledown.len()):
-                    try:
-                        pixel = self[i]
-                    except IndexError:
-                        break
-
-                    pixel.nscale8(scaledown[i])
-            else:
-                for i in range(self.len()):
-                    try:
-                        pixel = scaledown[i]
-                    except IndexError:
-                        break
+        if self._bulk(scale8_bulk, scaledown):
+            return self
 
-                    self[i].nscale8(pixel)
+        if isinstance(scaledown, CPixelView):
+            for pixel, other in zip(self, scaledown):
+                pixel.nscale8(other)
         else:
-
-            for pixel in self.leds:
+            for pixel in self:
                 pixel.nscale8(scaledown)
 
         return self
@@ -220,56 +331,34 @@ class CPixelView(object):
         return self.nscale8(255 - fade)
 
     def __ior__(self, rhs):
-        if isinstance(rhs, CPixelView):
-            if rhs.len > self.len:
-                for i in range(rhs.len):
-                    try:
-                        pixel = self[i]
-                    except IndexError:
-                        break
-
-                    pixel |= rhs[i]
-            else:
-                for i in range(self.len):
-                    try:
-                        pixel = rhs[i]
-                    except IndexError:
-                        break
+        if self._bulk(max8_bulk, rhs):
+            return self
 
-                    self[i] |= pixel
+        if isinstance(rhs, CPixelView):
+            for pixel, other in zip(self, rhs):
+                pixel |= other
         else:
-            for pixel in self.leds:
+            for pixel in self:
                 pixel |= rhs
 
         return self
 
     def __iand__(self, rhs):
-        if isinstance(rhs, CPixelView):
-            if rhs.len > self.len:
-                for i in range(rhs.len):
-                    try:
-                        pixel = self[i]
-                    except IndexError:
-                        break
-
-                    pixel &= rhs[i]
-            else:
-                for i in range(self.len):
-                    try:
-                        pixel = rhs[i]
-                    except IndexError:
-                        break
+        if self._bulk(min8_bulk, rhs):
+            return self
 
-                    self[i] &= pixel
+        if isinstance(rhs, CPixelView):
+            for pixel, other in zip(self, rhs):
+                pixel &= other
         else:
-            for pixel in self.leds:
+            for pixel in self:
                 pixel &= rhs
 
         return self
 
     # Returns whether or not any leds in this set are non-zero
     def __bool__(self):
-        for pixel in self.leds:
+        for pixel in self:
             if pixel:
                 return True
 
@@ -277,20 +366,11 @@ class CPixelView(object):
 
     # Color util functions
     def fill_solid(self, color):
-        for pixel in self.leds:
-            if isinstance(color, CHSV):
-                pixel.setHSV(color)
-            else:
-                pixel.setRGB(color)
-
+        fill_solid(self._window(), self.size(), color)
         return self
 
     def fill_rainbow(self, initialhue, deltahue=5):
-        if self.dir >= 0:
-            fill_rainbow(self.leds, self.len, initialhue, deltahue)
-        else:
-            fill_rainbow(self.leds[:self.len + 1], -self.len, initialhue, deltahue)
-
+        fill_rainbow(self._window(), self.size(), initialhue, deltahue)
         return self
 
     def fill_gradient(
@@ -301,12 +381,7 @@ class CPixelView(object):
             c4=None,
             directionCode=SHORTEST_HUES
     ):
-
-        if self.dir >= 0:
-            fill_gradient(self.leds, self.len, c1, c2, c3, c4, directionCode)
-        else:
-            fill_gradient(self.leds[:self.len + 1], -self.len, c1, c2, c3, c4, directionCode)
-
+        fill_gradient(self, self.size(), c1, c2, c3, c4, directionCode)
         return self
 
     def fill_gradient_RGB(
@@ -317,58 +392,29 @@ class CPixelView(object):
             c4=None,
             directionCode=SHORTEST_HUES
     ):
-
-        if self.dir >= 0:
-            fill_gradient_RGB(self.leds, self.len, c1, c2, c3, c4, directionCode)
-        else:
-            fill_gradient_RGB(self.leds[:self.len + 1], -self.len, c1, c2, c3, c4, directionCode)
-
+        fill_gradient_RGB(self, self.size(), c1, c2, c3, c4, directionCode)
         return self
 
     def nblend(self, overlay, amountOfOverlay):
         if isinstance(overlay, CPixelView):
-            if overlay.len() > self.len():
-                for i in range(overlay.len()):
-                    try:
-                        pixel = self[i]
-                    except IndexError:
-                        break
-
-                    nblend(pixel, overlay[i], amountOfOverlay)
-
-            else:
-                for i in range(self.len()):
-                    try:
-                        pixel = overlay[i]
-                    except IndexError:
-                        break
-
-                    nblend(self[i], pixel, amountOfOverlay)
-
+            for pixel, other in zip(self, overlay):
+                nblend(pixel, other, amountOfOverlay)
         else:
-            for pixel in self.leds:
+            for pixel in self:
                 nblend(pixel, overlay, amountOfOverlay)
 
+        return self
+
     # Note: only bringing in a 1d blur, not sure 2d blur makes sense when looking at sub arrays
     def blur1d(self, blur_amount):
-        if self.dir >= 0:
-            blur1d(self.leds, self.len, blur_amount)
-        else:
-            blur1d(self.leds[self.len + 1], -self.len, blur_amount)
-
+        blur1d(self._window(), self.size(), blur_amount)
         return self
 
     def napplyGamma_video(self, gammaR, gammaG=None, gammaB=None):
         if gammaG is None and gammaB is None:
-            if self.dir >= 0:
-                napplyGamma_video(self.leds, self.len, gammaR)
-            else:
-                napplyGamma_video(self.leds[self.len + 1], -self.len, gammaR)
+            napplyGamma_video(self, self.size(), gammaR)
         else:
-            if self.dir >= 0:
-                napplyGamma_video(self.leds, self.len, gammaR, gammaG, gammaB)
-            else:
-                napplyGamma_video(self.leds[self.len + 1], -self.len, gammaR, gammaG, gammaB)
+            napplyGamma_video(self, self.size(), gammaR, gammaG, gammaB)
 
         return self
 
@@ -376,9 +422,79 @@ class CPixelView(object):
 CRGBSet = CPixelView
 
 
+# A CPixelView that owns its leds.  CRGBArray(n) allocates a CRGBBuffer of n leds (the python version of the C++
+# CRGBArray<SIZE>), any other arguments are handled the same as CPixelView.
 class CRGBArray(CRGBSet):
 
     def __init__(self, *args, **kwargs):
+        if len(args) == 1 and isinstance(args[0], int) and not kwargs:
+            args = (CRGBBuffer(args[0]), args[0])
+
         super(CRGBArray, self).__init__(*args, **kwargs)
 
-        self.rawleds = [pixel for pixel in self.leds]
+        # views never copy, so the raw leds are just the underlying storage
+        self.rawleds = self.leds
+
+
+# A pixel set over an arbitrary list of led indexes instead of an evenly spaced run of leds.  This is what the rows,
+# columns and rectangles of a CRGBMatrix are, their leds are not next to each other in the strip.  Like CPixelView
+# nothing is copied, reads and writes go straight through to the underlying storage.
+class CPixelMapView(CPixelView):
+
+    def __init__(self, leds, indexes):
+        if isinstance(leds, CPixelView):
+            indexes = [leds._index(i) for i in indexes]
+            leds = leds.leds
+
+        self.leds = leds
+        self.indexes = indexes
+        self.offset = 0
+        self.dir = 1
+        self.len = len(indexes)
+        self.end_pos = self.len
+
+    def __eq__(self, rhs):
+        return (
+            self.leds is rhs.leds and
+            list(self.indexes) == list(getattr(rhs, 'indexes', ()))
+        )
+
+    def _index(self, x):
+        size = self.len
+        if x < 0:
+            x += size
+        if not 0 <= x < size:
+            raise IndexError('CPixelMapView index out of range')
+
+        return self.indexes[x]
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            indexes = self.indexes
+            return CPixelMapView(self.leds, [indexes[i] for i in range(*x.indices(self.len))])
+
+        return self.leds[self._index(x)]
+
+    def __iter__(self):
+        leds = self.leds
+        for i in self.indexes:
+            yield leds[i]
+
+    def __call__(self, start, end):
+        step = -1 if end < start else 1
+        indexes = self.indexes
+        return CPixelMapView(self.leds, [indexes[i] for i in range(start, end + step, step)])
+
+    def __neg__(self):
+        return CPixelMapView(self.leds, list(reversed(self.indexes)))
+
+    def _window(self):
+        return self
+
+    # the pixels are scattered through the storage, so there is no run of bytes for the bulk kernels
+    def _region(self):
+        return None
+
+    def blur1d(self, blur_amount):
+        blurIndexes(self.leds, self.indexes, blur_amount)
+        return self
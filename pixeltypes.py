@@ -1,103 +1,115 @@
-
 # Forward declaration of hsv2rgb_rainbow here,
 # to avoid circular dependencies.
 # Representation of an HSV pixel (hue, saturation, value (aka brightness)).
 
-
+# CHSV and CRGB keep their channels in __slots__ so there is no per instance
+# dict and reading/writing a channel is a plain attribute access.  The short
+# names (hue/sat/val and r/g/b/w) are the real storage, the long names are
+# aliases.  raw builds a new list of the channels on every read, so hot paths
+# read the slots (c.r) or index the object (c[0]), which reads and writes the
+# channels directly without building a list.
 class CHSV(object):
-
-    @property
-    def hue(self):
-        return self._hue
-
-    @hue.setter
-    def hue(self, value):
-        self._hue = value
+    __slots__ = ('hue', 'sat', 'val')
 
     @property
     def h(self):
-        return self._hue
+        return self.hue
 
     @h.setter
     def h(self, value):
-        self._hue = value
+        self.hue = value
 
     @property
     def saturation(self):
-        return self._saturation
+        return self.sat
 
     @saturation.setter
     def saturation(self, value):
-        self._saturation = value
-
-    @property
-    def sat(self):
-        return self._saturation
-
-    @sat.setter
-    def sat(self, value):
-        self._saturation = value
+        self.sat = value
 
     @property
     def s(self):
-        return self._saturation
+        return self.sat
 
     @s.setter
     def s(self, value):
-        self._saturation = value
+        self.sat = value
 
     @property
     def value(self):
-        return self._value
+        return self.val
 
     @value.setter
     def value(self, value):
-        self._value = value
-
-    @property
-    def val(self):
-        return self._value
-
-    @val.setter
-    def val(self, value):
-        self._value = value
+        self.val = value
 
     @property
     def v(self):
-        return self._value
+        return self.val
 
     @v.setter
     def v(self, value):
-        self._value = value
+        self.val = value
 
+    # the channels as a new list, [hue, sat, val]
     @property
     def raw(self):
-        return [self._hue, self._saturation, self._value]
+        return [self.hue, self.sat, self.val]
 
     def __getitem__(self, index):
-        return self.raw[index]
+        if index == 0:
+            return self.hue
+        if index == 1:
+            return self.sat
+        if index == 2:
+            return self.val
+
+        raise IndexError('CHSV index out of range')
+
+    def __setitem__(self, index, value):
+        if index == 0:
+            self.hue = value
+        elif index == 1:
+            self.sat = value
+        elif index == 2:
+            self.val = value
+        else:
+            raise IndexError('CHSV index out of range')
+
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        yield self.hue
+        yield self.sat
+        yield self.val
 
     def __init__(self, iH=None, iS=None, iV=None, rhs=None):
-        if isinstance(iH, CHSV):
-            self._hue, self._saturation, self._value = iH.raw
-        elif rhs is not None:
-            self._hue, self._saturation, self._value = rhs.raw
+        if iS is not None:
+            self.hue = iH
+            self.sat = iS
+            self.val = iV if iV is not None else 0
+            return
+
+        if rhs is not None:
+            iH = rhs
+
+        if iH is None:
+            self.hue = 0
+            self.sat = 0
+            self.val = 0
         else:
-            if iH is None:
-                iH = 0
-            if iS is None:
-                iS = 0
-            if iV is None:
-                iV = 0
+            self.hue, self.sat, self.val = iH
 
-            self._hue = iH
-            self._saturation = iS
-            self._value = iV
+    # build a CHSV from a (hue, sat, val) tuple, skipping the type checks in __init__
+    @classmethod
+    def from_tuple(cls, hsv):
+        return cls(hsv[0], hsv[1], hsv[2])
 
     def setHSV(self, iH, iS, iV):
-        self._hue = iH
-        self._saturation = iS
-        self._value = iV
+        self.hue = iH
+        self.sat = iS
+        self.val = iV
         return self
 
 
@@ -113,93 +125,93 @@ HUE_PINK = 224
 
 
 # Representation of an RGB pixel (Red, Green, Blue)
+# w is None for a plain RGB pixel and holds the white channel for RGBW pixels.
 class CRGB(object):
+    __slots__ = ('r', 'g', 'b', 'w')
 
     @property
     def white(self):
-        return self._white
+        return self.w
 
     @white.setter
     def white(self, value):
-        self._white = value
-
-    @property
-    def w(self):
-        return self._white
-
-    @w.setter
-    def w(self, value):
-        self._white = value
+        self.w = value
 
     @property
     def red(self):
-        return self._red
+        return self.r
 
     @red.setter
     def red(self, value):
-        self._red = value
-
-    @property
-    def r(self):
-        return self._red
-
-    @r.setter
-    def r(self, value):
-        self._red = value
+        self.r = value
 
     @property
     def green(self):
-        return self._green
+        return self.g
 
     @green.setter
     def green(self, value):
-        self._green = value
-
-    @property
-    def g(self):
-        return self._green
-
-    @g.setter
-    def g(self, value):
-        self._green = value
+        self.g = value
 
     @property
     def blue(self):
-        return self._blue
+        return self.b
 
     @blue.setter
     def blue(self, value):
-        self._blue = value
+        self.b = value
 
+    # the channels as a new list, [r, g, b] or [r, g, b, w] when there is a white channel
     @property
-    def b(self):
-        return self._blue
+    def raw(self):
+        if self.w is None:
+            return [self.r, self.g, self.b]
 
-    @b.setter
-    def b(self, value):
-        self._blue = value
+        return [self.r, self.g, self.b, self.w]
 
-    @property
-    def raw(self):
-        if self._white is None:
-            return [self._red, self._green, self._blue]
+    def __getitem__(self, index):
+        if index == 0:
+            return self.r
+        if index == 1:
+            return self.g
+        if index == 2:
+            return self.b
+        if index == 3 and self.w is not None:
+            return self.w
+
+        raise IndexError('CRGB index out of range')
+
+    def __setitem__(self, index, value):
+        if index == 0:
+            self.r = value
+        elif index == 1:
+            self.g = value
+        elif index == 2:
+            self.b = value
+        elif index == 3:
+            self.w = value
         else:
-            return [self._red, self._green, self._blue, self._white]
+            raise IndexError('CRGB index out of range')
 
-    def get_data_stream(self, rgb_order):
-        rgb_order = str(rgb_order / 10000).split('.')[-1]
+    def __len__(self):
+        return 3 if self.w is None else 4
 
-        while rgb_order.count('0') > 1:
-            rgb_order = rgb_order[1:]
+    def __iter__(self):
+        yield self.r
+        yield self.g
+        yield self.b
+        if self.w is not None:
+            yield self.w
 
-        rgb_order = list(int(item) for item in list(rgb_order))
+    def get_data_stream(self, rgb_order):
+        rgb_order = rgb_order_channels(rgb_order)
 
-        if 3 in rgb_order and self._white is None:
+        if 3 in rgb_order and self.w is None:
             rgbw = CRGB()
             rgb2rgbw(self, rgbw)
-            values = [rgbw.r, rgbw.b, rgbw.g, rgbw.w]
+            values = [rgbw.r, rgbw.g, rgbw.b, rgbw.w]
         else:
-            values = [self._red, self._green, self._blue, self._white]
+            values = [self.r, self.g, self.b, self.w]
 
         bytes_ = []
         for index in rgb_order:
@@ -215,72 +227,94 @@ class CRGB(object):
 
         return bit_array
 
-    def __getitem__(self, index):
-        return self.raw[index]
-
+    # CRGB(r, g, b[, w]) is checked first since it is by far the most common
+    # way a CRGB gets made.  A single int is a color code (0xRRGGBB or
+    # 0xWWRRGGBB), the same as CRGB(uint32_t colorcode) in the C++ library.
     def __init__(self, iR=None, iG=None, iB=None, iW=None, colorcode=None, rhs=None):
-        if isinstance(iR, CRGB):
-            raw = iR.raw
-            if len(raw) == 4:
-                self._red, self._green, self._blue, self._white = raw
-            else:
-                self._white = None
-                self._red, self._green, self._blue = raw
-
-        if isinstance(iR, CHSV):
-            self._red = 0
-            self._green = 0
-            self._blue = 0
-            self._white = None
-            hsv2rgb_rainbow(iR, self)
+        if iG is not None:
+            self.r = iR
+            self.g = iG
+            self.b = iB if iB is not None else 0
+            self.w = iW
+            return
 
-        elif isinstance(rhs, CRGB):
-            raw = iR.raw
-            if len(raw) == 4:
-                self._red, self._green, self._blue, self._white = raw
-            else:
-                self._white = None
-                self._red, self._green, self._blue = raw
-
-        elif isinstance(rhs, CHSV):
-            self._red = 0
-            self._green = 0
-            self._blue = 0
-            self._white = None
-            hsv2rgb_rainbow(rhs, self)
-
-        elif isinstance(colorcode, int):
-            self._red = (colorcode >> 16) & 0xFF
-            self._green = (colorcode >> 8) & 0xFF
-            self._blue = (colorcode >> 0) & 0xFF
-
-            if colorcode > 16777215:
-                self._white = (colorcode >> 24) & 0xFF
-            else:
-                self._white = None
+        if rhs is not None:
+            iR = rhs
+        elif colorcode is not None:
+            iR = colorcode
+
+        if iR is None:
+            self.r = 0
+            self.g = 0
+            self.b = 0
+            self.w = iW
+
+        elif isinstance(iR, int):
+            self.r = (iR >> 16) & 0xFF
+            self.g = (iR >> 8) & 0xFF
+            self.b = iR & 0xFF
+            self.w = (iR >> 24) & 0xFF if iR > 0xFFFFFF else None
+
+        elif isinstance(iR, CRGB):
+            self.r = iR.r
+            self.g = iR.g
+            self.b = iR.b
+            self.w = iR.w
+
+        elif isinstance(iR, CHSV):
+            self.r = 0
+            self.g = 0
+            self.b = 0
+            self.w = None
+            hsv2rgb_rainbow(iR, self)
 
         else:
-            if iR is None:
-                iR = 0
-            if iG is None:
-                iG = 0
-            if iB is None:
-                iB = 0
-
-            self._red = iR
-            self._green = iG
-            self._blue = iB
-            self._white = iW
+            self._set_sequence(iR)
+
+    def _set_sequence(self, data):
+        self.r = data[0]
+        self.g = data[1]
+        self.b = data[2]
+        self.w = data[3] if len(data) > 3 else None
+
+    # The from_* constructors skip the type checks in __init__ and go straight
+    # to the CRGB(r, g, b[, w]) path, use these in pixel loops where the input
+    # type is already known.
+
+    # build a CRGB from a packed 0xRRGGBB (or 0xWWRRGGBB) int
+    @classmethod
+    def from_code(cls, colorcode):
+        return cls(
+            (colorcode >> 16) & 0xFF,
+            (colorcode >> 8) & 0xFF,
+            colorcode & 0xFF,
+            (colorcode >> 24) & 0xFF if colorcode > 0xFFFFFF else None
+        )
+
+    # build a CRGB from 3 (or 4 if bpp is 4) bytes starting at offset
+    @classmethod
+    def from_bytes(cls, data, offset=0, bpp=3):
+        return cls(
+            data[offset],
+            data[offset + 1],
+            data[offset + 2],
+            data[offset + 3] if bpp == 4 else None
+        )
+
+    # build a CRGB from an (r, g, b) or (r, g, b, w) tuple
+    @classmethod
+    def from_tuple(cls, rgb):
+        return cls(*rgb)
 
     def setRGB(self, nR, nG, nB, nW=None):
-        self._red = nR
-        self._green = nG
-        self._blue = nB
-        self._white = nW
+        self.r = nR
+        self.g = nG
+        self.b = nB
+        self.w = nW
         return self
 
     def setHSV(self, hue, sat, val):
-        if self._white is not None:
+        if self.w is not None:
             rgb = CRGB()
             hsv2rgb_rainbow(CHSV(hue, sat, val), rgb)
             rgb2rgbw(rgb, self)
@@ -296,33 +330,33 @@ class CRGB(object):
 
     def setColorCode(self, colorcode):
         if colorcode > 16777215:
-            self._white = (colorcode >> 24) & 0xFF
+            self.w = (colorcode >> 24) & 0xFF
         else:
-            self._white = None
+            self.w = None
 
-        self._red = (colorcode >> 16) & 0xFF
-        self._green = (colorcode >> 8) & 0xFF
-        self._blue = (colorcode >> 0) & 0xFF
+        self.r = (colorcode >> 16) & 0xFF
+        self.g = (colorcode >> 8) & 0xFF
+        self.b = (colorcode >> 0) & 0xFF
         return self
 
     def __iadd__(self, rhs):
-        if self._white is None and rhs.w is None:
-            self._red = qadd8(self._red, rhs.r)
-            self._green = qadd8(self._green, rhs.g)
-            self._blue = qadd8(self._blue, rhs.b)
-
-        elif self._white is not None and rhs.w is not None:
-            self._white = qadd8(self._white, rhs.w)
-            self._red = qadd8(self._red, rhs.r)
-            self._green = qadd8(self._green, rhs.g)
-            self._blue = qadd8(self._blue, rhs.b)
+        if self.w is None and rhs.w is None:
+            self.r = qadd8(self.r, rhs.r)
+            self.g = qadd8(self.g, rhs.g)
+            self.b = qadd8(self.b, rhs.b)
+
+        elif self.w is not None and rhs.w is not None:
+            self.w = qadd8(self.w, rhs.w)
+            self.r = qadd8(self.r, rhs.r)
+            self.g = qadd8(self.g, rhs.g)
+            self.b = qadd8(self.b, rhs.b)
         elif rhs.w is not None:
             rgb = CRGB()
             rgbw2rgb(rhs, rgb)
 
-            rgb.r = qadd8(self._red, rgb.r)
-            rgb.g = qadd8(self._green, rgb.g)
-            rgb.b = qadd8(self._blue, rgb.b)
+            rgb.r = qadd8(self.r, rgb.r)
+            rgb.g = qadd8(self.g, rgb.g)
+            rgb.b = qadd8(self.b, rgb.b)
 
             rgb2rgbw(rgb, self)
         else:
@@ -338,34 +372,34 @@ class CRGB(object):
         return self
 
     def addToRGB(self, d):
-        self._red = qadd8(self._red, d)
-        self._green = qadd8(self._green, d)
-        self._blue = qadd8(self._blue, d)
+        self.r = qadd8(self.r, d)
+        self.g = qadd8(self.g, d)
+        self.b = qadd8(self.b, d)
 
-        if self._white is not None:
-            self._white = qadd8(self._white, d)
+        if self.w is not None:
+            self.w = qadd8(self.w, d)
 
         return self
 
     def __isub__(self, rhs):
         if isinstance(rhs, CRGB):
-            if self._white is None and rhs.w is None:
-                self._red = qsub8(self._red, rhs.r)
-                self._green = qsub8(self._green, rhs.g)
-                self._blue = qsub8(self._blue, rhs.b)
-
-            elif self._white is not None and rhs.w is not None:
-                self._white = qsub8(self._white, rhs.w)
-                self._red = qsub8(self._red, rhs.r)
-                self._green = qsub8(self._green, rhs.g)
-                self._blue = qsub8(self._blue, rhs.b)
+            if self.w is None and rhs.w is None:
+                self.r = qsub8(self.r, rhs.r)
+                self.g = qsub8(self.g, rhs.g)
+                self.b = qsub8(self.b, rhs.b)
+
+            elif self.w is not None and rhs.w is not None:
+                self.w = qsub8(self.w, rhs.w)
+                self.r = qsub8(self.r, rhs.r)
+                self.g = qsub8(self.g, rhs.g)
+                self.b = qsub8(self.b, rhs.b)
             elif rhs.w is not None:
                 rgb = CRGB()
                 rgbw2rgb(rhs, rgb)
 
-                rgb.r = qsub8(self._red, rgb.r)
-                rgb.g = qsub8(self._green, rgb.g)
-                rgb.b = qsub8(self._blue, rgb.b)
+                rgb.r = qsub8(self.r, rgb.r)
+                rgb.g = qsub8(self.g, rgb.g)
+                rgb.b = qsub8(self.b, rgb.b)
 
                 rgb2rgbw(rgb, self)
             else:
@@ -383,59 +417,59 @@ class CRGB(object):
         return self
 
     def subtractFromRGB(self, d):
-        self._red = qsub8(self._red, d)
-        self._green = qsub8(self._green, d)
-        self._blue = qsub8(self._blue, d)
+        self.r = qsub8(self.r, d)
+        self.g = qsub8(self.g, d)
+        self.b = qsub8(self.b, d)
 
-        if self._white is not None:
-            self._white = qsub8(self._white, d)
+        if self.w is not None:
+            self.w = qsub8(self.w, d)
 
         return self
 
     def __idiv__(self, d):
-        self._red /= d
-        self._green /= d
-        self._blue /= d
+        self.r /= d
+        self.g /= d
+        self.b /= d
 
-        if self._white is not None:
-            self._white /= d
+        if self.w is not None:
+            self.w /= d
 
         return self
 
     def __irshift__(self, d):
-        self._red >>= d
-        self._green >>= d
-        self._blue >>= d
+        self.r >>= d
+        self.g >>= d
+        self.b >>= d
 
-        if self._white is not None:
-            self._white >>= d
+        if self.w is not None:
+            self.w >>= d
 
         return self
 
     def __imul__(self, d):
-        self._red = qmul8(self._red, d)
-        self._green = qmul8(self._green, d)
-        self._blue = qmul8(self._blue, d)
+        self.r = qmul8(self.r, d)
+        self.g = qmul8(self.g, d)
+        self.b = qmul8(self.b, d)
 
-        if self._white is not None:
-            self._white = qmul8(self._white, d)
+        if self.w is not None:
+            self.w = qmul8(self.w, d)
 
         return self
 
     def nscale8_video(self, scaledown):
-        if self._white is None:
-            self._red, self._green, self._blue = nscale8x3_video(
-                self._red,
-                self._green,
-                self._blue,
+        if self.w is None:
+            self.r, self.g, self.b = nscale8x3_video(
+                self.r,
+                self.g,
+                self.b,
                 scaledown
             )
         else:
-            self._red, self._green, self._blue, self._white = nscale8x4_video(
-                self._red,
-                self._green,
-                self._blue,
-                self._white,
+            self.r, self.g, self.b, self.w = nscale8x4_video(
+                self.r,
+                self.g,
+                self.b,
+                self.w,
                 scaledown
             )
 
@@ -452,53 +486,57 @@ class CRGB(object):
     def scale8(self, scaledown):
         if isinstance(scaledown, CRGB):
             out = CRGB()
-            out.r = scale8(self._red, scaledown.r)
-            out.g = scale8(self._green, scaledown.g)
-            out.b = scale8(self._blue, scaledown.b)
-            out.w = scale8(self._white, scaledown.w)
+            out.r = scale8(self.r, scaledown.r)
+            out.g = scale8(self.g, scaledown.g)
+            out.b = scale8(self.b, scaledown.b)
+            out.w = scale8(self.w, scaledown.w)
 
             return out
         else:
-            if self._white is None:
-                self._red, self._green, self._blue = nscale8x3(
-                    self._red,
-                    self._green,
-                    self._blue,
+            if self.w is None:
+                self.r, self.g, self.b = nscale8x3(
+                    self.r,
+                    self.g,
+                    self.b,
                     scaledown
                 )
             else:
-                self._red, self._green, self._blue, self._white = nscale8x4(
-                    self._red,
-                    self._green,
-                    self._blue,
-                    self._white,
+                self.r, self.g, self.b, self.w = nscale8x4(
+                    self.r,
+                    self.g,
+                    self.b,
+                    self.w,
                     scaledown
                 )
 
             return self
 
     def nscale8(self, scaledown):
-        self._red = scale8(self._red, scaledown.r)
-        self._green = scale8(self._green, scaledown.g)
-        self._blue = scale8(self._blue, scaledown.b)
+        if not isinstance(scaledown, CRGB):
+            return self.scale8(scaledown)
+
+        self.r = scale8(self.r, scaledown.r)
+        self.g = scale8(self.g, scaledown.g)
+        self.b = scale8(self.b, scaledown.b)
 
-        self._white = scale8(self._white, scaledown.w)
+        if self.w is not None and scaledown.w is not None:
+            self.w = scale8(self.w, scaledown.w)
         return self
 
     def fadeToBlackBy(self, fadefactor):
-        if self._white is None:
-            self._red, self._green, self._blue = nscale8x3(
-                self._red,
-                self._green,
-                self._blue,
+        if self.w is None:
+            self.r, self.g, self.b = nscale8x3(
+                self.r,
+                self.g,
+                self.b,
                 255 - fadefactor
             )
         else:
-            self._red, self._green, self._blue, self._white = nscale8x4(
-                self._red,
-                self._green,
-                self._blue,
-                self._white,
+            self.r, self.g, self.b, self.w = nscale8x4(
+                self.r,
+                self.g,
+                self.b,
+                self.w,
                 255 - fadefactor
             )
 
@@ -506,68 +544,68 @@ class CRGB(object):
 
     def __ior__(self, rhs):
         if isinstance(rhs, CRGB):
-            if rhs.r > self._red:
-                self._red = rhs.r
-            if rhs.g > self._green:
-                self._green = rhs.g
-            if rhs.b > self._blue:
-                self._blue = rhs.b
-
-            if self._white is not None and rhs.w is not None:
-                if rhs.w > self._white:
-                    self._white = rhs.w
+            if rhs.r > self.r:
+                self.r = rhs.r
+            if rhs.g > self.g:
+                self.g = rhs.g
+            if rhs.b > self.b:
+                self.b = rhs.b
+
+            if self.w is not None and rhs.w is not None:
+                if rhs.w > self.w:
+                    self.w = rhs.w
             elif rhs.w is not None:
-                self._white = rhs.w
+                self.w = rhs.w
 
         else:
-            if rhs > self._red:
-                self._red = rhs
-            if rhs > self._green:
-                self._green = rhs
-            if rhs > self._blue:
-                self._blue = rhs
-            if self._white is not None and rhs > self._white:
-                self._white = rhs
+            if rhs > self.r:
+                self.r = rhs
+            if rhs > self.g:
+                self.g = rhs
+            if rhs > self.b:
+                self.b = rhs
+            if self.w is not None and rhs > self.w:
+                self.w = rhs
 
         return self
 
     def __iand__(self, rhs):
         if isinstance(rhs, CRGB):
-            if rhs.r < self._red:
-                self._red = rhs.r
-            if rhs.g < self._green:
-                self._green = rhs.g
-            if rhs.b < self._blue:
-                self._blue = rhs.b
-
-            if self._white is not None and rhs.w is not None:
-                if rhs.w < self.white:
-                    self._white = rhs.w
+            if rhs.r < self.r:
+                self.r = rhs.r
+            if rhs.g < self.g:
+                self.g = rhs.g
+            if rhs.b < self.b:
+                self.b = rhs.b
+
+            if self.w is not None and rhs.w is not None:
+                if rhs.w < self.w:
+                    self.w = rhs.w
             elif rhs.w is not None:
-                self._white = rhs.w
+                self.w = rhs.w
 
         else:
-            if rhs < self._red:
-                self._red = rhs
-            if rhs < self._green:
-                self._green = rhs
-            if rhs < self._blue:
-                self._blue = rhs
-            if self._white is not None and rhs < self._white:
-                self._white = rhs
+            if rhs < self.r:
+                self.r = rhs
+            if rhs < self.g:
+                self.g = rhs
+            if rhs < self.b:
+                self.b = rhs
+            if self.w is not None and rhs < self.w:
+                self.w = rhs
 
         return self
 
     def __bool__(self):
-        return self._red != 0 or self._green != 0 or self._blue != 0 or int(self._white) != 0
+        return self.r != 0 or self.g != 0 or self.b != 0 or (self.w or 0) != 0
 
     def __neg__(self):
         retval = CRGB()
-        retval.r = 255 - self._red
-        retval.g = 255 - self._green
-        retval.b = 255 - self._blue
-        if self._white is not None:
-            retval.w = 255 - self._white
+        retval.r = 255 - self.r
+        retval.g = 255 - self.g
+        retval.b = 255 - self.b
+        if self.w is not None:
+            retval.w = 255 - self.w
 
         return retval
 
@@ -586,7 +624,7 @@ class CRGB(object):
         # Y' = 0.2126 R' + 0.7152 G' + 0.0722 B'
         #      54            183       18 (!)
 
-        if self._white is None:
+        if self.w is None:
             rgb = self
         else:
             rgb = CRGB()
@@ -607,7 +645,7 @@ class CRGB(object):
         else:
             eightyfive = 86
 
-        if self._white is None:
+        if self.w is None:
             rgb = self
         else:
             rgb = CRGB()
@@ -622,7 +660,7 @@ class CRGB(object):
         return avg
 
     def maximizeBrightness(self, limit=255):
-        if self.white is None:
+        if self.w is None:
             rgb = self
 
         else:
@@ -642,15 +680,15 @@ class CRGB(object):
             rgb.g = (rgb.g * factor) / 256
             rgb.b = (rgb.b * factor) / 256
 
-        if self._white is None:
-            self._red = rgb.r
-            self._green = rgb.g
-            self._blue = rgb.b
+        if self.w is None:
+            self.r = rgb.r
+            self.g = rgb.g
+            self.b = rgb.b
         else:
             rgb2rgbw(rgb, self)
 
     def lerp8(self, other, frac):
-        if self._white is None:
+        if self.w is None:
             rgb = self
         else:
             rgb = CRGB()
@@ -663,7 +701,7 @@ class CRGB(object):
         return rgb
 
     def lerp16(self, other, frac):
-        if self._white is None:
+        if self.w is None:
             rgb = self
         else:
             rgb = CRGB()
@@ -676,7 +714,7 @@ class CRGB(object):
         return rgb
 
     def getParity(self):
-        if self._white is None:
+        if self.w is None:
             rgb = self
         else:
             rgb = CRGB()
@@ -690,7 +728,7 @@ class CRGB(object):
 
         if parity == curparity:
             return
-        if self._white is None:
+        if self.w is None:
             rgb = self
         else:
             rgb = CRGB()
@@ -734,183 +772,183 @@ class CRGB(object):
 
                 rgb.b ^= 0x01
 
-        if self._white is None:
-            self._red = rgb.r
-            self._green = rgb.g
-            self._blue = rgb.b
+        if self.w is None:
+            self.r = rgb.r
+            self.g = rgb.g
+            self.b = rgb.b
         else:
             rgb2rgbw(rgb, self)
 
     def __eq__(self, rhs):
-        return self._red == rhs.r and self._green == rhs.g and self._blue == rhs.b and self._white == rhs.w
+        return self.r == rhs.r and self.g == rhs.g and self.b == rhs.b and self.w == rhs.w
 
     def __ne__(self, rhs):
         return not self.__eq__(rhs)
 
     def __lt__(self, rhs):
-        sl = self._red + self._green + self._blue + int(self._white)
-        sr = rhs.r + rhs.g + rhs.b + int(rhs.w)
+        sl = self.r + self.g + self.b + (self.w or 0)
+        sr = rhs.r + rhs.g + rhs.b + (rhs.w or 0)
         return sl < sr
 
     def __gt__(self, rhs):
-        sl = self._red + self._green + self._blue + int(self._white)
-        sr = rhs.r + rhs.g + rhs.b + int(rhs.w)
+        sl = self.r + self.g + self.b + (self.w or 0)
+        sr = rhs.r + rhs.g + rhs.b + (rhs.w or 0)
         return sl > sr
 
     def __le__(self, rhs):
-        sl = self._red + self._green + self._blue + int(self._white)
-        sr = rhs.r + rhs.g + rhs.b + int(rhs.w)
+        sl = self.r + self.g + self.b + (self.w or 0)
+        sr = rhs.r + rhs.g + rhs.b + (rhs.w or 0)
         return sl <= sr
 
     def __ge__(self, rhs):
-        sl = self._red + self._green + self._blue + int(self._white)
-        sr = rhs.r + rhs.g + rhs.b + int(rhs.w)
+        sl = self.r + self.g + self.b + (self.w or 0)
+        sr = rhs.r + rhs.g + rhs.b + (rhs.w or 0)
         return sl >= sr
 
     def __add__(self, p2):
-        if self._white is None and p2.w is None:
+        if self.w is None and p2.w is None:
             return CRGB(
-                qadd8(self._red, p2.r),
-                qadd8(self._green, p2.g),
-                qadd8(self._blue, p2.b)
+                qadd8(self.r, p2.r),
+                qadd8(self.g, p2.g),
+                qadd8(self.b, p2.b)
             )
-        elif self._white is not None and p2.w is not None:
+        elif self.w is not None and p2.w is not None:
             return CRGB(
-                qadd8(self._red, p2.r),
-                qadd8(self._green, p2.g),
-                qadd8(self._blue, p2.b),
-                qadd8(self._white, p2.w)
+                qadd8(self.r, p2.r),
+                qadd8(self.g, p2.g),
+                qadd8(self.b, p2.b),
+                qadd8(self.w, p2.w)
             )
-        elif self._white is not None:
+        elif self.w is not None:
             return CRGB(
-                qadd8(self._red, p2.r),
-                qadd8(self._green, p2.g),
-                qadd8(self._blue, p2.b),
-                self._white
+                qadd8(self.r, p2.r),
+                qadd8(self.g, p2.g),
+                qadd8(self.b, p2.b),
+                self.w
             )
         else:
             return CRGB(
-                qadd8(self._red, p2.r),
-                qadd8(self._green, p2.g),
-                qadd8(self._blue, p2.b),
+                qadd8(self.r, p2.r),
+                qadd8(self.g, p2.g),
+                qadd8(self.b, p2.b),
                 p2.w
             )
 
     def __sub__(self, p2):
-        if self._white is None and p2.w is None:
+        if self.w is None and p2.w is None:
             return CRGB(
-                qsub8(self._red, p2.r),
-                qsub8(self._green, p2.g),
-                qsub8(self._blue, p2.b)
+                qsub8(self.r, p2.r),
+                qsub8(self.g, p2.g),
+                qsub8(self.b, p2.b)
             )
-        elif self._white is not None and p2.w is not None:
+        elif self.w is not None and p2.w is not None:
             return CRGB(
-                qsub8(self._red, p2.r),
-                qsub8(self._green, p2.g),
-                qsub8(self._blue, p2.b),
-                qsub8(self._white, p2.w)
+                qsub8(self.r, p2.r),
+                qsub8(self.g, p2.g),
+                qsub8(self.b, p2.b),
+                qsub8(self.w, p2.w)
             )
-        elif self._white is not None:
+        elif self.w is not None:
             return CRGB(
-                qsub8(self._red, p2.r),
-                qsub8(self._green, p2.g),
-                qsub8(self._blue, p2.b),
-                self._white
+                qsub8(self.r, p2.r),
+                qsub8(self.g, p2.g),
+                qsub8(self.b, p2.b),
+                self.w
             )
         else:
             return CRGB(
-                qsub8(self._red, p2.r),
-                qsub8(self._green, p2.g),
-                qsub8(self._blue, p2.b),
+                qsub8(self.r, p2.r),
+                qsub8(self.g, p2.g),
+                qsub8(self.b, p2.b),
                 p2.w
             )
 
     def __mul__(self, d):
-        if self._white is None:
+        if self.w is None:
             return CRGB(
-                qmul8(self._red, d),
-                qmul8(self._green, d),
-                qmul8(self._blue, d)
+                qmul8(self.r, d),
+                qmul8(self.g, d),
+                qmul8(self.b, d)
             )
         else:
             return CRGB(
-                qmul8(self._red, d),
-                qmul8(self._green, d),
-                qmul8(self._blue, d),
-                qmul8(self._white, d)
+                qmul8(self.r, d),
+                qmul8(self.g, d),
+                qmul8(self.b, d),
+                qmul8(self.w, d)
             )
 
     def __floordiv__(self, d):
-        if self._white is None:
+        if self.w is None:
             return CRGB(
-                self._red // d,
-                self._green // d,
-                self._blue // d
+                self.r // d,
+                self.g // d,
+                self.b // d
             )
         else:
             return CRGB(
-                self._red // d,
-                self._green // d,
-                self._blue // d,
-                self._white // d
+                self.r // d,
+                self.g // d,
+                self.b // d,
+                self.w // d
             )
 
     def __and__(self, p2):
-        if self._white is None and p2.w is None:
+        if self.w is None and p2.w is None:
             return CRGB(
-                self._red if self._red < p2.r else p2.r,
-                self._green if self._green < p2.g else p2.g,
-                self._blue if self._blue < p2.b else p2.b
+                self.r if self.r < p2.r else p2.r,
+                self.g if self.g < p2.g else p2.g,
+                self.b if self.b < p2.b else p2.b
             )
-        elif self._white is not None and p2.w is not None:
+        elif self.w is not None and p2.w is not None:
             return CRGB(
-                self._red if self._red < p2.r else p2.r,
-                self._green if self._green < p2.g else p2.g,
-                self._blue if self._blue < p2.b else p2.b,
-                self._white if self._white < p2.w else p2.w
+                self.r if self.r < p2.r else p2.r,
+                self.g if self.g < p2.g else p2.g,
+                self.b if self.b < p2.b else p2.b,
+                self.w if self.w < p2.w else p2.w
             )
-        elif self._white is not None:
+        elif self.w is not None:
             return CRGB(
-                self._red if self._red < p2.r else p2.r,
-                self._green if self._green < p2.g else p2.g,
-                self._blue if self._blue < p2.b else p2.b,
-                self._white
+                self.r if self.r < p2.r else p2.r,
+                self.g if self.g < p2.g else p2.g,
+                self.b if self.b < p2.b else p2.b,
+                self.w
             )
         else:
             return CRGB(
-                self._red if self._red < p2.r else p2.r,
-                self._green if self._green < p2.g else p2.g,
-                self._blue if self._blue < p2.b else p2.b,
+                self.r if self.r < p2.r else p2.r,
+                self.g if self.g < p2.g else p2.g,
+                self.b if self.b < p2.b else p2.b,
                 p2.w
             )
 
     def __or__(self, p2):
 
-        if self._white is None and p2.w is None:
+        if self.w is None and p2.w is None:
             return CRGB(
-                self._red if self._red > p2.r else p2.r,
-                self._green if self._green > p2.g else p2.g,
-                self._blue if self._blue > p2.b else p2.b,
+                self.r if self.r > p2.r else p2.r,
+                self.g if self.g > p2.g else p2.g,
+                self.b if self.b > p2.b else p2.b,
             )
-        elif self._white is not None and p2.w is not None:
+        elif self.w is not None and p2.w is not None:
             return CRGB(
-                self._red if self._red > p2.r else p2.r,
-                self._green if self._green > p2.g else p2.g,
-                self._blue if self._blue > p2.b else p2.b,
-                self._white if self._white > p2.w else p2.w
+                self.r if self.r > p2.r else p2.r,
+                self.g if self.g > p2.g else p2.g,
+                self.b if self.b > p2.b else p2.b,
+                self.w if self.w > p2.w else p2.w
             )
-        elif self._white is not None:
+        elif self.w is not None:
             return CRGB(
-                self._red if self._red > p2.r else p2.r,
-                self._green if self._green > p2.g else p2.g,
-                self._blue if self._blue > p2.b else p2.b,
-                self._white
+                self.r if self.r > p2.r else p2.r,
+                self.g if self.g > p2.g else p2.g,
+                self.b if self.b > p2.b else p2.b,
+                self.w
             )
         else:
             return CRGB(
-                self._red if self._red > p2.r else p2.r,
-                self._green if self._green > p2.g else p2.g,
-                self._blue if self._blue > p2.b else p2.b,
+                self.r if self.r > p2.r else p2.r,
+                self.g if self.g > p2.g else p2.g,
+                self.b if self.b > p2.b else p2.b,
                 p2.w
             )
 
@@ -960,6 +998,60 @@ BGWR = 2130
 BWGR = 2310
 WBGR = 3210
 
+
+# A color with 16 bits for each channel, the pixel of a CRGB16Buffer.  Built
+# from a CRGB the 8 bit channels are expanded to the full 16 bit range.
+class CRGB16(object):
+    __slots__ = ('r', 'g', 'b')
+
+    def __init__(self, r=0, g=0, b=0):
+        if isinstance(r, CRGB):
+            r, g, b = r.r * 257, r.g * 257, r.b * 257
+
+        self.r = r
+        self.g = g
+        self.b = b
+
+    def __iter__(self):
+        return iter((self.r, self.g, self.b))
+
+    def __eq__(self, other):
+        return isinstance(other, CRGB16) and tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    # the 8 bit CRGB, the high byte of every channel
+    def to_crgb(self):
+        return CRGB(self.r >> 8, self.g >> 8, self.b >> 8)
+
+    def __repr__(self):
+        return 'CRGB16(%d, %d, %d)' % (self.r, self.g, self.b)
+
+
+# channel orders that have already been worked out, keyed on the rgb order
+_rgb_order_channels = {}
+
+
+# Work out the channel that goes in each slot of an rgb order.  The orders are
+# written as the channel indexes, 0 = red, 1 = green, 2 = blue and 3 = white,
+# one per digit with the leading 0 dropped (GRB is 102, RGB is 12).
+# @returns a tuple of channel indexes in the order they are sent, GRB is (1, 0, 2)
+def rgb_order_channels(RGB_ORDER):
+    channels = _rgb_order_channels.get(RGB_ORDER)
+
+    if channels is None:
+        digits = str(RGB_ORDER)
+        digits = '0' * ((4 if '3' in digits else 3) - len(digits)) + digits
+        channels = tuple(int(c) for c in digits)
+
+        if sorted(channels) != list(range(len(channels))):
+            raise ValueError('%r is not an rgb order' % RGB_ORDER)
+
+        _rgb_order_channels[RGB_ORDER] = channels
+
+    return channels
+
 AliceBlue = 0xF0F8FF
 Amethyst = 0x9966CC
 AntiqueWhite = 0xFAEBD7
@@ -1118,4 +1210,4 @@ FairyLight = 0xFFE42D
 FairyLightNCC = 0xFF9D2A
 
 from .lib8tion import *  # NOQA
-from hsv2rgb import *  # NOQA
+from .hsv2rgb import *  # NOQA
@@ -1,5 +1,6 @@
 
 from . import *
+from .pixelbuffer import CRGBBuffer
 
 gRed_mW = 16 * 5  # 16mA @ 5v = 80mW
 gGreen_mW = 11 * 5  # 11mA @ 5v = 55mW
@@ -29,11 +30,15 @@ def calculate_unscaled_power_mW(ledbuffer, numLeds):  # 25354
     green32 = 0
     blue32 = 0
 
-    # This loop might benefit from an AVR assembly version -MEK
-    for led in ledbuffer:
-        red32 += led.r
-        green32 += led.g
-        blue32  += led.b
+    if isinstance(ledbuffer, CRGBBuffer):
+        # sum the channels straight off of the bytes
+        red32, green32, blue32 = ledbuffer.channel_sums(numLeds)[:3]
+    else:
+        # This loop might benefit from an AVR assembly version -MEK
+        for led in ledbuffer:
+            red32 += led.r
+            green32 += led.g
+            blue32  += led.b
 
     red32 *= gRed_mW
     green32 *= gGreen_mW
@@ -47,6 +52,23 @@ def calculate_unscaled_power_mW(ledbuffer, numLeds):  # 25354
     return total
 
 
+# unscaled power of a controller's leds.  For leds in a CRGBBuffer the number
+# is kept and reused until one of the controller's leds is written to.
+def _controller_power_mW(pCur):
+    seg = pCur.m_Segment
+    if seg is None:
+        return calculate_unscaled_power_mW(pCur.leds(), pCur.size())
+
+    if pCur.m_Power is not None and pCur.m_Power[0] == seg[2]:
+        pCur.m_nSkippedPowerLeds += pCur.size()
+        return pCur.m_Power[1]
+
+    generation = seg[2]
+    total = calculate_unscaled_power_mW(pCur.leds(), pCur.size())
+    pCur.m_Power = (generation, total)
+    return total
+
+
 def calculate_max_brightness_for_power_vmA(
     ledbuffer,
     numLeds,
@@ -74,12 +96,8 @@ def calculate_max_brightness_for_power_mW(
 
         total_mW = gMCU_mW
 
-        pCur = CLEDController.head()
-
-        while pCur:
-            total_mW += calculate_unscaled_power_mW(pCur.leds(), pCur.size())
-            pCur = pCur.next()
-
+        for pCur in CLEDController.controllers():
+            total_mW += _controller_power_mW(pCur)
 
         if POWER_DEBUG_PRINT == 1:
             print("power demand at full brightness mW =", total_mW)
@@ -97,7 +115,6 @@ def calculate_max_brightness_for_power_mW(
             if POWER_LED > 0:
                 if gMaxPowerIndicatorLEDPinNumber:
                     Pin(gMaxPowerIndicatorLEDPinNumber).lo()
-                }
 
             if POWER_DEBUG_PRINT == 1:
                 print("demand is under the limit")
@@ -0,0 +1,243 @@
+# @file profiling.py
+# hook points around the show pipeline and the heavy color/noise functions
+# that profilers can register callbacks at
+
+try:
+    import _thread
+except ImportError:
+    # a port built without threads
+    _thread = None
+
+from .fastled_delay import ticks_us, ticks_diff
+
+
+# The hook points and the hooks registered at them, only points that have a
+# hook registered are in here.  The points are
+#
+#   show       - CFastLED.show
+#   show_async - CFastLED.show_async and ashow handing a frame to the worker
+#   showColor  - CFastLED.showColor
+#   showLeds   - CLEDController.showLeds, for every controller, on the
+#                worker or pool thread that shows it when there is one
+#   power      - the power limiting function (see setMaxPowerInMilliWatts)
+#
+# and one for every function decorated with profiled(), named after the
+# function (fill_rainbow, blur2d, fill_noise8, ...).  Hooks registered at
+# every point are under None.
+#
+# The call sites only check whether this dict is empty before doing anything
+# else, as long as no hook is registered that is all the profiling costs.
+hooks = {}
+
+# the names of the functions decorated with profiled()
+profiled_points = []
+
+
+# Base of the profiling hooks.  enter() is called when a hook point is
+# entered and exit() when it is left, on the thread that runs the hook
+# point.  The points nest, a showLeds is entered and left inside of a show.
+#
+# A hook has to be quick about it, it runs in the middle of the frame it is
+# timing.
+class CProfileHook(object):
+
+    # a hook point is entered
+    # @param name - name of the hook point
+    # @param args - dict of what the point is working on, None if there is nothing to say
+    def enter(self, name, args=None):
+        pass
+
+    # a hook point is left, after the point was entered on the same thread
+    # @param name - name of the hook point
+    def exit(self, name):
+        pass
+
+
+# Register a hook
+# @param hook - a CProfileHook
+# @param points - names of the hook points to register at, every point when not given
+# @returns hook
+def add_hook(hook, points=None):
+    if points is None:
+        points = (None,)
+    elif isinstance(points, str):
+        points = (points,)
+
+    for point in points:
+        registered = hooks.get(point)
+        if registered is None:
+            hooks[point] = (hook,)
+        elif hook not in registered:
+            hooks[point] = registered + (hook,)
+
+    return hook
+
+
+# Take a hook out from every point it is registered at
+def remove_hook(hook):
+    for point in list(hooks):
+        registered = tuple(h for h in hooks[point] if h is not hook)
+        if registered:
+            hooks[point] = registered
+        else:
+            del hooks[point]
+
+
+# take every hook out
+def clear_hooks():
+    hooks.clear()
+
+
+# Call the hooks of a point as it is entered.  Call sites check hooks first,
+#   if profiling.hooks:
+#       profiling.enter('show')
+def enter(name, args=None):
+    for hook in hooks.get(name, ()):
+        hook.enter(name, args)
+    for hook in hooks.get(None, ()):
+        hook.enter(name, args)
+
+
+# Call the hooks of a point as it is left, in the opposite order to enter()
+def exit(name):
+    for hook in reversed(hooks.get(None, ())):
+        hook.exit(name)
+    for hook in reversed(hooks.get(name, ())):
+        hook.exit(name)
+
+
+# Run func as a hook point, for call sites that have already checked hooks
+#   if profiling.hooks:
+#       profiling.call('show', self._show, scale)
+# @returns what func returns
+def call(name, func, *args):
+    enter(name)
+    try:
+        return func(*args)
+    finally:
+        exit(name)
+
+
+# Make a function a hook point named after it.  With no hooks registered the
+# function is called straight through after the check of hooks, the extra
+# call is nothing next to the whole strip the decorated functions work on.
+# Functions that are called for every led are not decorated.
+def profiled(func):
+    name = func.__name__
+    profiled_points.append(name)
+
+    def wrapper(*args, **kwargs):
+        if not hooks:
+            return func(*args, **kwargs)
+
+        enter(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            exit(name)
+
+    try:
+        wrapper.__name__ = name
+        wrapper.__doc__ = func.__doc__
+    except AttributeError:
+        # MicroPython functions have no writable attributes
+        pass
+
+    return wrapper
+
+
+# Records the hook points as Chrome trace events, a B event when a point is
+# entered and an E event when it is left, with the time in µs from when the
+# hook was made and the thread the point ran on.  save() writes them as the
+# JSON of the trace event format, which chrome://tracing, Perfetto and
+# speedscope load.
+#
+#   trace = profiling.add_hook(profiling.CChromeTraceHook())
+#   ...
+#   trace.save('frames.json')
+#
+# Events are kept in memory until saved, once limit of them have been kept
+# no more points are started and their events are dropped (counted in
+# dropped) so a hook that is left running can not use up the memory.  The E
+# events of the points that were already started are still kept, every B in
+# the trace has its E.
+#
+# @param limit - the most events to keep
+# @param pid - process id the events are put down to
+class CChromeTraceHook(CProfileHook):
+
+    def __init__(self, limit=100000, pid=1):
+        self.limit = limit
+        self.pid = pid
+        self.dropped = 0
+        self.m_Events = []
+        self.m_Open = {}  # [points started, points dropped inside of them] keyed on thread
+        self.m_Start = ticks_us()
+
+    def _event(self, name, phase, tid, args):
+        self.m_Events.append((name, phase, ticks_diff(ticks_us(), self.m_Start), tid, args))
+
+    def enter(self, name, args=None):
+        tid = 0 if _thread is None else _thread.get_ident()
+        depth = self.m_Open.get(tid)
+        if depth is None:
+            depth = self.m_Open[tid] = [0, 0]
+
+        # a point inside of a dropped point is dropped as well, so the E events pair up with the B events
+        if depth[1] or len(self.m_Events) >= self.limit:
+            depth[1] += 1
+            self.dropped += 1
+            return
+
+        depth[0] += 1
+        self._event(name, 'B', tid, args)
+
+    def exit(self, name):
+        tid = 0 if _thread is None else _thread.get_ident()
+        depth = self.m_Open.get(tid)
+
+        if depth is not None and depth[1]:
+            depth[1] -= 1
+            self.dropped += 1
+        elif depth is not None and depth[0]:
+            # the B event was kept, so is the E event past the limit
+            depth[0] -= 1
+            self._event(name, 'E', tid, None)
+        elif len(self.m_Events) < self.limit:
+            # a point that was entered before the hook was added
+            self._event(name, 'E', tid, None)
+        else:
+            self.dropped += 1
+
+    def __len__(self):
+        return len(self.m_Events)
+
+    # the events in the trace event format
+    # @returns list of event dicts
+    def events(self):
+        events = []
+        for name, phase, ts, tid, args in self.m_Events:
+            event = dict(name=name, cat='fastled', ph=phase, ts=ts, pid=self.pid, tid=tid)
+            if args:
+                event['args'] = args
+            events.append(event)
+
+        return events
+
+    # Write the trace as JSON
+    # @param path - file to write to
+    def save(self, path):
+        try:
+            import json
+        except ImportError:
+            import ujson as json
+
+        with open(path, 'w') as f:
+            f.write(json.dumps(dict(traceEvents=self.events(), displayTimeUnit='ms')))
+
+    # forget the events that have been recorded and start the clock over
+    def clear(self):
+        self.m_Events = []
+        self.m_Open = {}
+        self.dropped = 0
+        self.m_Start = ticks_us()
@@ -0,0 +1,291 @@
+# @file showworker.py
+# a background thread that writes frames out to the leds, so the next frame can
+# be drawn while the last one is still being encoded and sent
+
+try:
+    import _thread
+except ImportError:
+    # a port built without threads
+    _thread = None
+
+from .pixelbuffer import CRGBBuffer
+
+
+# Runs controller.showLeds for frames handed to it by CFastLED.show_async on a
+# thread of its own.  Encoding a frame, the waveform and any sinks all happen on
+# that thread while the main loop draws the next frame.
+#
+# A frame is a list of (controller, data, generation) tuples and the brightness
+# to show it at.  data is what the controller shows, either a copy of its leds
+# made when the frame was handed over or the front buffer of a CFrameBuffer,
+# which is not drawn into again until the worker is done with it.
+#
+# No more than depth frames are ever waiting or being shown, put() blocks
+# until the worker has caught up when that many are.  That is the back
+# pressure, drawing can only get depth frames ahead of the leds.
+#
+# Only _thread locks are used so the worker runs on MicroPython ports that have
+# threads as well as on CPython.  Everything but the worker thread itself is
+# meant to be called from a single thread.
+#
+# @param depth - number of frames that can be waiting or being shown at once
+class CShowWorker(object):
+
+    def __init__(self, depth=1):
+        if _thread is None:
+            raise NotImplementedError('threads are not available on this port')
+        if depth < 1:
+            raise ValueError('depth must be at least 1')
+
+        self.depth = depth
+        self.m_Queue = []
+        self.m_nPending = 0  # frames put and not done yet
+        self.m_nShown = 0  # frames the worker has finished
+        self.m_Error = None
+        self.m_bRunning = False
+
+        self.m_Lock = _thread.allocate_lock()
+
+        # released by put() when the worker is waiting for a frame
+        self.m_Wake = _thread.allocate_lock()
+        self.m_Wake.acquire()
+        self.m_bIdle = False
+
+        # released by the worker when put() or wait() is waiting on it
+        self.m_Done = _thread.allocate_lock()
+        self.m_Done.acquire()
+        self.m_bBlocked = False
+
+        # copies of the led data, made by snapshot(), keyed on the controller
+        self.m_Copies = {}
+
+        # CShowPool the controllers of a frame are shown on, one after the other when None
+        self.pool = None
+
+    # frames that are waiting or being shown
+    def pending(self):
+        return self.m_nPending
+
+    # number of frames that have been shown
+    def shown(self):
+        return self.m_nShown
+
+    # whether put() would have to wait
+    def full(self):
+        return self.m_nPending >= self.depth
+
+    def start(self):
+        if not self.m_bRunning:
+            self.m_bRunning = True
+            _thread.start_new_thread(self._run, ())
+
+    # Stop the thread once the frames that are pending have been shown.
+    def stop(self):
+        if self.m_bRunning:
+            self._push(None)
+            self.wait(0)
+
+    def _push(self, job):
+        with self.m_Lock:
+            self.m_Queue.append(job)
+            self.m_nPending += 1
+            if self.m_bIdle:
+                self.m_bIdle = False
+                self.m_Wake.release()
+
+    # Block until no more than count frames are pending.
+    # @param count - frames that can still be pending
+    def wait(self, count=0):
+        while True:
+            with self.m_Lock:
+                if self.m_nPending <= count:
+                    break
+                self.m_bBlocked = True
+
+            self.m_Done.acquire()
+
+        self._raise()
+
+    # Copy the leds a controller shows into a buffer of the worker's.  There
+    # are depth + 1 copies for each controller so the one written to is never
+    # one a pending frame is using, as long as there is room for the frame.
+    # Data that is not a CRGBBuffer is handed over as it is.
+    def snapshot(self, pLed, data):
+        if not isinstance(data, CRGBBuffer):
+            return data
+
+        copies = self.m_Copies.get(pLed)
+        if copies is None or copies[1][0].nLeds != data.nLeds or copies[1][0].bpp != data.bpp:
+            copies = [0, [CRGBBuffer(data.nLeds, data.bpp) for _ in range(self.depth + 1)]]
+            self.m_Copies[pLed] = copies
+
+        index = copies[0]
+        copies[0] = (index + 1) % len(copies[1])
+
+        copy = copies[1][index]
+        copy.buf[:] = data.raw()
+        return copy
+
+    # Hand a frame to the worker, waiting for room if depth frames are
+    # already pending.
+    # @param frame - list of (controller, data, generation)
+    # @param brightness - the scale to show the frame at
+    def put(self, frame, brightness):
+        self.wait(self.depth - 1)
+        self.start()
+        self._push((frame, brightness))
+
+    def _raise(self):
+        error = self.m_Error
+        if error is not None:
+            self.m_Error = None
+            raise error
+
+    def _run(self):
+        while True:
+            with self.m_Lock:
+                if self.m_Queue:
+                    job = self.m_Queue.pop(0)
+                else:
+                    job = False
+                    self.m_bIdle = True
+
+            if job is False:
+                self.m_Wake.acquire()
+                continue
+
+            if job is not None:
+                frame, brightness = job
+                pool = self.pool
+                try:
+                    if pool is not None and len(frame) > 1:
+                        pool.run([(pLed.showLeds, (brightness, data, generation)) for pLed, data, generation in frame])
+                    else:
+                        for pLed, data, generation in frame:
+                            pLed.showLeds(brightness, data, generation)
+                except Exception as err:
+                    self.m_Error = err
+
+            with self.m_Lock:
+                self.m_nPending -= 1
+                if job is not None:
+                    self.m_nShown += 1
+                else:
+                    self.m_bRunning = False
+
+                if self.m_bBlocked:
+                    self.m_bBlocked = False
+                    self.m_Done.release()
+
+            if job is None:
+                break
+
+
+# A pool of threads that shows controllers side by side.  run() hands out the
+# tasks to the pool threads and the calling thread, each takes the next task
+# that nobody has started, and returns once all of them are done.
+#
+# This pays off when the controllers spend their time outside of the
+# interpreter lock, waiting on SPI/RMT/DMA writes, sockets and files of the
+# sinks, or NumPy doing the encoding.  Controllers that only run Python code
+# take turns on the interpreter lock and are no faster than one at a time.
+#
+# @param threads - number of threads showing controllers, counting the one calling run()
+class CShowPool(object):
+
+    def __init__(self, threads=4):
+        if _thread is None:
+            raise NotImplementedError('threads are not available on this port')
+        if threads < 1:
+            raise ValueError('threads must be at least 1')
+
+        self.threads = threads
+        self.m_Tasks = []
+        self.m_nRemaining = 0
+        self.m_Error = None
+        self.m_bStop = False
+
+        self.m_Lock = _thread.allocate_lock()
+
+        # released by run() once the last task is done when it is waiting on them
+        self.m_Done = _thread.allocate_lock()
+        self.m_Done.acquire()
+        self.m_bBlocked = False
+
+        # a lock for every pool thread, released by run() to wake the thread, and
+        # whether the thread is waiting on it
+        self.m_Wakes = []
+        self.m_Idle = []
+        for i in range(threads - 1):
+            wake = _thread.allocate_lock()
+            wake.acquire()
+            self.m_Wakes.append(wake)
+            self.m_Idle.append(False)
+            _thread.start_new_thread(self._run, (i,))
+
+    # Run every task and wait for them to finish.  The first error raised by a
+    # task is raised here once they are all done.
+    # @param tasks - list of (function, args)
+    def run(self, tasks):
+        with self.m_Lock:
+            self.m_Tasks = list(tasks)
+            self.m_Tasks.reverse()
+            self.m_nRemaining = len(tasks)
+
+            for i, idle in enumerate(self.m_Idle):
+                if idle:
+                    self.m_Idle[i] = False
+                    self.m_Wakes[i].release()
+
+        self._work()
+
+        with self.m_Lock:
+            waiting = self.m_nRemaining > 0
+            self.m_bBlocked = waiting
+
+        if waiting:
+            self.m_Done.acquire()
+
+        error = self.m_Error
+        if error is not None:
+            self.m_Error = None
+            raise error
+
+    # stop the pool threads
+    def close(self):
+        with self.m_Lock:
+            self.m_bStop = True
+            for i, idle in enumerate(self.m_Idle):
+                if idle:
+                    self.m_Idle[i] = False
+                    self.m_Wakes[i].release()
+
+    def _work(self):
+        while True:
+            with self.m_Lock:
+                if not self.m_Tasks:
+                    return
+                func, args = self.m_Tasks.pop()
+
+            try:
+                func(*args)
+            except Exception as err:
+                if self.m_Error is None:
+                    self.m_Error = err
+
+            with self.m_Lock:
+                self.m_nRemaining -= 1
+                if not self.m_nRemaining and self.m_bBlocked:
+                    self.m_bBlocked = False
+                    self.m_Done.release()
+
+    def _run(self, index):
+        wake = self.m_Wakes[index]
+        while True:
+            with self.m_Lock:
+                if self.m_bStop:
+                    break
+                self.m_Idle[index] = True
+
+            wake.acquire()
+            self._work()
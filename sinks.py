@@ -0,0 +1,241 @@
+# @file sinks.py
+# places for controllers to send their encoded frames to other than led pins
+
+try:
+    import socket
+except ImportError:
+    try:
+        import usocket as socket
+    except ImportError:
+        # a port built without networking
+        socket = None
+
+
+# Base of the frame sinks.  A controller with a sink set (see
+# CPixelLEDController.setSink) writes every frame it shows to the sink as the
+# encoded bytes, in rgb order with the scale and dithering applied, the same
+# bytes that would go out to the leds.  Each frame is handed over with a single
+# write call.
+#
+# The controller tells the sink what its frames are made of with setLayout
+# when the sink is set, order is the channel (0 r, 1 g, 2 b, 3 w) of each byte
+# of a led in the order the leds take them, (1, 0, 2) for GRB leds.  It is None
+# when the frames are not a byte a channel, the SPI frames of APA102 and HD108
+# leds with their headers and the 16 bit leds of chipsets with extra bits.
+class CFrameSink(object):
+    order = (0, 1, 2)
+
+    # the layout of the frames of the controller writing to this sink
+    def setLayout(self, order):
+        self.order = order
+
+    # take a frame
+    # @param frame - the encoded bytes of the frame, only valid for the call
+    def write(self, frame):
+        raise NotImplementedError
+
+    # release anything the sink holds open
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Keeps the last few frames in memory, for tests and for looking at what a
+# controller is sending.  The frames are copied into bytearrays that are
+# reused once the ring has gone all the way around.
+#
+# @param size - number of frames to keep
+class CMemorySink(CFrameSink):
+
+    def __init__(self, size=8):
+        if size < 1:
+            raise ValueError('size must be at least 1')
+
+        self.size = size
+        self.count = 0  # frames written in all
+        self.m_Frames = [None] * size
+
+    def write(self, frame):
+        index = self.count % self.size
+        slot = self.m_Frames[index]
+
+        if slot is None or len(slot) != len(frame):
+            self.m_Frames[index] = bytearray(frame)
+        else:
+            slot[:] = frame
+
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    # the frames that are kept, oldest first
+    def frames(self):
+        first = self.count - len(self)
+        return [self.m_Frames[i % self.size] for i in range(first, self.count)]
+
+    # the last frame written, None if there has not been one
+    def last(self):
+        if not self.count:
+            return None
+
+        return self.m_Frames[(self.count - 1) % self.size]
+
+    def clear(self):
+        self.count = 0
+        self.m_Frames = [None] * self.size
+
+
+# Appends every frame to a file as raw bytes, back to back.  Every frame of a
+# controller is the same length so the file can be read back a frame at a
+# time.
+#
+# @param path - file to append to
+# @param flush - flush the file after every frame
+class CFileSink(CFrameSink):
+
+    def __init__(self, path, flush=False):
+        self.path = path
+        self.flush = flush
+        self.m_File = open(path, 'ab')
+
+    def write(self, frame):
+        self.m_File.write(frame)
+        if self.flush:
+            self.m_File.flush()
+
+    def close(self):
+        if self.m_File is not None:
+            self.m_File.close()
+            self.m_File = None
+
+
+# DDP (Distributed Display Protocol) header values, see CUDPSink
+DDP_PORT = 4048
+DDP_MAX_DATA = 1440
+DDP_FLAGS_VER1 = 0x40
+DDP_FLAGS_PUSH = 0x01
+DDP_TYPE_RGB24 = 0x0B
+DDP_TYPE_RGBW32 = 0x1B
+DDP_ID_DISPLAY = 0x01
+
+# the biggest payload a single UDP datagram can carry
+UDP_MAX_DATAGRAM = 65507
+
+
+# Sends every frame as UDP datagrams, to a bridge or a node that drives the
+# leds.
+#
+# With protocol 'raw' the frame goes out as it is in a single datagram, so a
+# frame can be no bigger than UDP_MAX_DATAGRAM bytes (21835 RGB leds), bigger
+# frames raise ValueError.  With protocol 'ddp' the frame is split into DDP
+# packets (the protocol WLED, xLights and the like take), a 10 byte header in
+# front of up to 1440 bytes of the frame with the push flag set on the last
+# packet of the frame.
+#
+# DDP carries leds in r, g, b(, w) order, the leds of the frame are put back in
+# that order from the order of the controller (see CFrameSink.setLayout) and
+# sent as RGB or RGBW.  Frames that are not a byte a channel can not be sent
+# as DDP and raise ValueError.
+#
+# host can be an IPv4 or an IPv6 address or a name, the socket is made for
+# the address family it resolves to.
+#
+# @param host - address to send to
+# @param port - port to send to, DDP_PORT if not given and protocol is 'ddp'
+# @param protocol - 'raw' or 'ddp'
+class CUDPSink(CFrameSink):
+
+    def __init__(self, host='127.0.0.1', port=None, protocol='raw'):
+        if socket is None:
+            raise NotImplementedError('sockets are not available on this port')
+        if protocol not in ('raw', 'ddp'):
+            raise ValueError('protocol must be raw or ddp')
+
+        if port is None:
+            if protocol != 'ddp':
+                raise ValueError('a port is needed for raw frames')
+            port = DDP_PORT
+
+        info = socket.getaddrinfo(host, port, 0, socket.SOCK_DGRAM)[0]
+
+        self.protocol = protocol
+        self.address = info[-1]
+        self.m_Socket = socket.socket(info[0], socket.SOCK_DGRAM)
+        self.m_nSequence = 0
+        self.m_Packet = bytearray(10 + DDP_MAX_DATA)
+        self.m_Leds = bytearray(0)
+
+    # The leds of a frame in r, g, b(, w) order, the frame itself when it is already in that order
+    def _leds(self, frame):
+        order = self.order
+        if order is None:
+            raise ValueError('DDP carries leds a byte a channel, this controller sends other frames')
+
+        channels = len(order)
+        if tuple(order) == tuple(range(channels)):
+            return frame
+
+        if len(self.m_Leds) != len(frame):
+            self.m_Leds = bytearray(len(frame))
+        leds = self.m_Leds
+
+        try:
+            frame = bytes(frame)
+            for slot, channel in enumerate(order):
+                leds[channel::channels] = frame[slot::channels]
+
+        except (NotImplementedError, AttributeError):
+            # MicroPython has no stepped slices
+            for pos in range(0, len(frame) - channels + 1, channels):
+                for slot, channel in enumerate(order):
+                    leds[pos + channel] = frame[pos + slot]
+
+        return leds
+
+    def write(self, frame):
+        if self.protocol == 'raw':
+            if len(frame) > UDP_MAX_DATAGRAM:
+                raise ValueError('frame of %d bytes is too big for a single datagram' % len(frame))
+
+            self.m_Socket.sendto(frame, self.address)
+            return
+
+        frame = self._leds(frame)
+        data_type = DDP_TYPE_RGBW32 if len(self.order) == 4 else DDP_TYPE_RGB24
+
+        # DDP sequence numbers go 1 to 15, 0 means not used
+        self.m_nSequence = self.m_nSequence % 15 + 1
+
+        frame = memoryview(frame)
+        packet = self.m_Packet
+        size = len(frame)
+        offset = 0
+
+        while True:
+            length = min(DDP_MAX_DATA, size - offset)
+            last = offset + length >= size
+
+            packet[0] = DDP_FLAGS_VER1 | (DDP_FLAGS_PUSH if last else 0)
+            packet[1] = self.m_nSequence
+            packet[2] = data_type
+            packet[3] = DDP_ID_DISPLAY
+            packet[4:8] = offset.to_bytes(4, 'big')
+            packet[8:10] = length.to_bytes(2, 'big')
+            packet[10:10 + length] = frame[offset:offset + length]
+
+            self.m_Socket.sendto(memoryview(packet)[:10 + length], self.address)
+
+            offset += length
+            if last:
+                break
+
+    def close(self):
+        if self.m_Socket is not None:
+            self.m_Socket.close()
+            self.m_Socket = None
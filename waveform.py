@@ -0,0 +1,219 @@
+# @file waveform.py
+# line coding of led data for clockless chipsets, the pulses the leds see on
+# their data line built from 256 entry lookup tables
+
+from .lib8tion import bulk8
+
+
+# Base of the clockless waveform encoders.
+#
+# A clockless chipset tells a 0 bit from a 1 bit by how long the data line is
+# held high.  The timing is given the same way the C++ ClocklessController
+# takes it, as three lengths in nanoseconds:
+#
+#   T1 - the line is high for T1 at the start of every bit
+#   T2 - for a 1 bit the line stays high for T2 more, for a 0 bit it goes low
+#   T3 - the line is low for the rest of the bit
+#
+# The pulses for every one of the 256 possible byte values are worked out once
+# (and shared by every encoder with the same timing), encoding a frame is then
+# one table lookup per byte into a bytearray that is kept from frame to frame.
+#
+# Subclasses fill in the table, self.width bytes of output for every byte of
+# led data, and self.tail, bytes added after the frame.
+#
+# @param T1 - high time at the start of every bit, in ns
+# @param T2 - extra high time of a 1 bit, in ns
+# @param T3 - low time at the end of every bit, in ns
+# @param flip - the output is inverted (TM1829)
+# @param extra - zero bits sent after the 8 bits of every byte, the XTRA0 of
+#                the C++ ClocklessController (4 for the 12 bit GE8822,
+#                GW6205 and LPD1886)
+class CWaveformEncoder(object):
+    width = 0
+    tail = b''
+
+    def __init__(self, T1, T2, T3, flip=False, extra=0):
+        self.T1 = T1
+        self.T2 = T2
+        self.T3 = T3
+        self.flip = flip
+        self.extra = extra
+        self.buf = bytearray(0)
+        self.entries = None
+        self.table = None
+
+    # length of one bit on the wire, in ns
+    def period(self):
+        return self.T1 + self.T2 + self.T3
+
+    # number of bits sent on the wire for every byte of led data
+    def bits_per_byte(self):
+        return 8 + self.extra
+
+    # the bits sent for a byte, most significant first, with the extra zero bits after them
+    def _bits(self, value):
+        count = 8 + self.extra
+        value <<= self.extra
+        return [(value >> i) & 0x1 for i in range(count - 1, -1, -1)]
+
+    def _build(self, key, pulse):
+        cached = _waveform_tables.get(key)
+        if cached is None:
+            entries = [pulse(value) for value in range(256)]
+            cached = (entries, b''.join(entries))
+            _waveform_tables[key] = cached
+
+        self.entries, self.table = cached
+
+    # the bytearray a frame of nBytes bytes of led data is encoded into
+    def output(self, nBytes):
+        return self._output(nBytes * self.width + len(self.tail))
+
+    def _output(self, size):
+        if len(self.buf) != size:
+            self.buf = bytearray(size)
+            self.buf[size - len(self.tail):] = self.tail
+
+        return self.buf
+
+    # Encode a frame of led data, usually the output of a CPixelEncoder
+    # @param data - the bytes to send, in wire order
+    # @returns the encoded bytearray, it is reused by the next frame
+    def encode(self, data):
+        count = len(data)
+        out = self.output(count)
+        size = count * self.width
+
+        numpy = bulk8.numpy
+        if numpy is not None:
+            table = numpy.frombuffer(self.table, numpy.uint8).reshape(256, self.width)
+            dst = numpy.frombuffer(out, numpy.uint8, size).reshape(count, self.width)
+            dst[:] = table[numpy.frombuffer(bytes(data), numpy.uint8)]
+        else:
+            out[:size] = b''.join([self.entries[b] for b in data])
+
+        return out
+
+    # Encode a frame of 16 bit led data for chipsets with more than 8 bits a channel.  The top bits of every value
+    # are sent, the high byte goes through the table and the bits that are left come from the first bytes of the
+    # table entry of the low byte, so no other tables are needed.
+    # @param data - 16 bit values low byte first, in wire order (see CRGB16Buffer)
+    # @param bits - bits sent for every value, 9 to 16 (12 for LPD1886)
+    # @returns the encoded bytearray, it is reused by the next frame
+    def encode16(self, data, bits=16):
+        if self.extra:
+            raise ValueError('encode16 needs an encoder without extra bits')
+        if not 8 < bits <= 16 or (bits * self.width) % 8:
+            raise ValueError('%d bits do not fill whole bytes of output' % bits)
+
+        count = len(data) // 2
+        width = self.width
+        per = bits * width // 8
+        low = per - width
+        out = self._output(count * per + len(self.tail))
+        size = count * per
+
+        numpy = bulk8.numpy
+        if numpy is not None:
+            table = numpy.frombuffer(self.table, numpy.uint8).reshape(256, width)
+            src = numpy.frombuffer(bytes(data), numpy.uint8, count * 2).reshape(count, 2)
+            dst = numpy.frombuffer(out, numpy.uint8, size).reshape(count, per)
+            dst[:, :width] = table[src[:, 1]]
+            dst[:, width:] = table[src[:, 0], :low]
+        else:
+            entries = self.entries
+            out[:size] = b''.join([entries[data[i + 1]] + entries[data[i]][:low] for i in range(0, count * 2, 2)])
+
+        return out
+
+
+# tables that have already been built, keyed on the encoding and the timing
+_waveform_tables = {}
+
+
+# Clockless data sent out of an SPI port (or I2S), every bit of led data is
+# sent as bits SPI bits.  The SPI clock has to be set to spi_rate, the number
+# of SPI bits that are high for a 0 and a 1 are picked so the pulses are as
+# close as they can get to the chipset timing.
+#
+# 3 SPI bits per bit makes the smallest output (WS2812 is 100 for a 0 and 110
+# for a 1 at 2.4MHz), 4 SPI bits per bit lines up with nibbles and has more
+# room for chipsets with long or short high times.
+#
+# @param bits - SPI bits for every bit of led data, 3 or 4
+# @param latch_us - length of the low reset/latch time added after the frame
+class CSPIWaveformEncoder(CWaveformEncoder):
+
+    def __init__(self, T1, T2, T3, bits=4, flip=False, latch_us=50, extra=0):
+        if bits not in (3, 4):
+            raise ValueError('bits must be 3 or 4')
+        if (bits * (8 + extra)) % 8:
+            raise ValueError('the extra bits do not fill whole bytes at %d SPI bits a bit' % bits)
+
+        super(CSPIWaveformEncoder, self).__init__(T1, T2, T3, flip, extra)
+
+        period = self.period()
+        zero = max(1, (T1 * bits + period // 2) // period)
+        one = ((T1 + T2) * bits + period // 2) // period
+        one = min(max(one, zero + 1), bits - 1)
+
+        self.bits = bits
+        self.width = bits * (8 + extra) // 8
+        self.spi_rate = bits * 1000000000 // period
+
+        # a latch of latch_us at spi_rate, rounded up to whole bytes
+        self.tail = bytes([0xFF if flip else 0x00]) * ((latch_us * self.spi_rate + 7999999) // 8000000)
+
+        mask = (1 << bits) - 1
+        patterns = (
+            (mask << (bits - zero)) & mask,
+            (mask << (bits - one)) & mask
+        )
+
+        width = self.width
+
+        def pulse(value):
+            word = 0
+            for bit in self._bits(value):
+                word = (word << bits) | patterns[bit]
+            if flip:
+                word ^= (1 << (width * 8)) - 1
+
+            return bytes((word >> (8 * (width - 1 - i))) & 0xFF for i in range(width))
+
+        self.zero_bits = zero
+        self.one_bits = one
+        self._build(('spi', bits, zero, one, flip, extra), pulse)
+
+
+# Clockless data sent with the ESP32 RMT peripheral.  Every bit of led data is
+# one 32 bit RMT item, (duration0, level0, duration1, level1) with the
+# durations counted in ticks of the RMT clock, little endian the way the RMT
+# memory takes them.  A zero item is added after the frame to end the
+# transmission.
+#
+# @param tick_ns - length of an RMT tick, 25ns is the 80MHz APB clock divided by 2
+class CRMTWaveformEncoder(CWaveformEncoder):
+    tail = bytes(4)
+
+    def __init__(self, T1, T2, T3, flip=False, tick_ns=25, extra=0):
+        super(CRMTWaveformEncoder, self).__init__(T1, T2, T3, flip, extra)
+        self.width = 4 * (8 + extra)
+
+        half = tick_ns // 2
+        period = (self.period() + half) // tick_ns
+        high = ((T1 + half) // tick_ns, (T1 + T2 + half) // tick_ns)
+        level0, level1 = (0, 1) if flip else (1, 0)
+
+        items = []
+        for bit in (0, 1):
+            item = high[bit] | (level0 << 15) | ((period - high[bit]) << 16) | (level1 << 31)
+            items.append(bytes((item >> (8 * i)) & 0xFF for i in range(4)))
+
+        def pulse(value):
+            return b''.join(items[bit] for bit in self._bits(value))
+
+        self.tick_ns = tick_ns
+        self.items = tuple(items)
+        self._build(('rmt', tuple(items), extra), pulse)
@@ -0,0 +1,99 @@
+# @file xymap.py
+# lookup tables that map (x, y) matrix coordinates to led indexes
+
+from array import array
+
+
+# layout tables that have already been built, keyed on the layout.  The same
+# table is handed to every matrix with the same layout.
+_xy_tables = {}
+
+
+# Build (or fetch the cached) lookup table for a width x height matrix.
+#
+# The table is indexed with y * width + x and holds the led index of that
+# pixel, so an XY() call is a single lookup instead of redoing the layout
+# math for every pixel of every frame.
+#
+# @param width - width of the matrix (as it is looked at, after rotating)
+# @param height - height of the matrix (as it is looked at, after rotating)
+# @param serpentine - every other row of the wiring runs backwards
+# @param rotation - 0, 90, 180 or 270, how many degrees clockwise the wiring
+#                   is turned relative to the picture
+# @param flipX - mirror the picture left to right
+# @param flipY - mirror the picture top to bottom
+# @returns an array of width * height led indexes
+def xy_table(width, height, serpentine=False, rotation=0, flipX=False, flipY=False):
+    key = (width, height, bool(serpentine), rotation, bool(flipX), bool(flipY))
+    table = _xy_tables.get(key)
+
+    if table is None:
+        table = _build_xy_table(width, height, serpentine, rotation, flipX, flipY)
+        _xy_tables[key] = table
+
+    return table
+
+
+def _build_xy_table(width, height, serpentine, rotation, flipX, flipY):
+    if rotation not in (0, 90, 180, 270):
+        raise ValueError('rotation must be 0, 90, 180 or 270')
+
+    # width of a row in the wiring, rows and columns trade places when the
+    # wiring is turned on its side
+    if rotation in (90, 270):
+        wire_width = height
+    else:
+        wire_width = width
+
+    w1 = width - 1
+    h1 = height - 1
+
+    table = array('H' if width * height <= 0x10000 else 'I')
+
+    for y in range(height):
+        for x in range(width):
+            px = w1 - x if flipX else x
+            py = h1 - y if flipY else y
+
+            if rotation == 90:
+                wx, wy = h1 - py, px
+            elif rotation == 180:
+                wx, wy = w1 - px, h1 - py
+            elif rotation == 270:
+                wx, wy = py, w1 - px
+            else:
+                wx, wy = px, py
+
+            if serpentine and (wy & 0x1):
+                wx = wire_width - 1 - wx
+
+            table.append(wy * wire_width + wx)
+
+    return table
+
+
+# Sort out the led storage and layout table for the matrix functions
+# (blur2d, fill_2dnoise8, ...).
+#
+# leds can be a CRGBMatrix, in which case its storage and table are used.
+# xymap can be a CRGBMatrix, an already built table or an XY(x, y) function,
+# when it is not given a plain (or serpentine) row by row layout is used.
+#
+# @returns (leds, table)
+def resolve_xymap(leds, width, height, xymap=None, serpentine=False):
+    if xymap is None and hasattr(leds, 'xytable'):
+        xymap = leds
+
+    if hasattr(leds, 'xytable'):
+        leds = leds.leds
+
+    if xymap is None:
+        return leds, xy_table(width, height, serpentine)
+
+    if hasattr(xymap, 'xytable'):
+        return leds, xymap.xytable
+
+    if callable(xymap):
+        return leds, [xymap(x, y) for y in range(height) for x in range(width)]
+
+    return leds, xymap